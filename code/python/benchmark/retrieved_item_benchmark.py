@@ -0,0 +1,80 @@
+"""
+Microbenchmark of the per-item work of ranking 50 retrieved items.
+
+For each item, ranking trims the schema JSON for the prompt, fills the prompt
+and builds the answer with the parsed schema. With [url, json_str, name, site]
+lists the JSON was parsed twice per item and again by every later stage; a
+RetrievedItem parses it once and keeps the trimmed description. Passes after
+the first stand for the regular track re-ranking the items after an aborted
+fast track, or a later stage reading them. Run from the code/python directory:
+
+    python benchmark/retrieved_item_benchmark.py [items] [passes]
+"""
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.prompts import fill_prompt, find_prompt
+from core.retrieved_item import RetrievedItem
+from core.utils.json_utils import trim_json
+
+from prompt_fill_benchmark import BenchmarkHandler, sample_item
+
+
+def legacy_rank(items, handler, prompt_str):
+    """Ranking's per-item work before RetrievedItem: trim_json parses, build_answer parses again."""
+    answers = []
+    for url, json_str, name, site in items:
+        prompt = fill_prompt(prompt_str, handler, {"item.description": trim_json(json_str)})
+        schema_object = json_str if isinstance(json_str, dict) else json.loads(json_str)
+        answers.append((url, name, site, schema_object, len(prompt)))
+    return answers
+
+
+def retrieved_item_rank(items, handler, prompt_str):
+    answers = []
+    for item in items:
+        prompt = fill_prompt(prompt_str, handler, {"item.description": item.description})
+        answers.append((item.url, item.name, item.site, item.schema_object, len(prompt)))
+    return answers
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    passes = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    handler = BenchmarkHandler()
+    prompt_str, _ = find_prompt(handler.site, handler.item_type, "RankingPrompt")
+    results = []
+    for i in range(count):
+        item = sample_item()
+        item["name"] = f"{item['name']} #{i}"
+        results.append([f"https://example.com/recipe/{i}", json.dumps(item), item["name"], "seriouseats", 0.8])
+
+    def legacy():
+        # The retriever returned copies of the lists, without scores
+        items = [list(result[:4]) for result in results]
+        for _ in range(passes):
+            legacy_rank(items, handler, prompt_str)
+
+    def retrieved():
+        # The retriever creates new RetrievedItems for every request
+        items = [RetrievedItem.from_result(result) for result in results]
+        for _ in range(passes):
+            retrieved_item_rank(items, handler, prompt_str)
+
+    assert legacy_rank([list(r[:4]) for r in results], handler, prompt_str) == \
+        retrieved_item_rank([RetrievedItem.from_result(r) for r in results], handler, prompt_str)
+
+    item_bytes = len(results[0][1])
+    print(f"Ranking {count} items of {item_bytes} bytes of JSON, {passes} pass(es) over the same items")
+    for label, fn in (("lists, parsed per use", legacy), ("RetrievedItem", retrieved)):
+        seconds = min(timeit.repeat(fn, number=20, repeat=3)) / 20
+        print(f"  {label:<24} {seconds * 1e3:8.2f} ms per request   {seconds / count * 1e6:8.1f} us per item")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Microbenchmark of the embedding representation used by the loaders.
+
+Compares lists of Python floats with the float32 vectors of core.vectors for
+memory per document and for writing and reading the text format of files with
+embeddings. Run from the code/python directory:
+
+    python benchmark/vector_benchmark.py [documents] [dimensions]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.vectors import as_vector, format_vector, np, parse_vector, to_bytes, from_bytes, vector_nbytes
+
+
+def legacy_format(embedding):
+    """db_load's format before float32 vectors."""
+    return str(embedding).replace(' ', '').replace('\n', '')
+
+
+def legacy_parse(embedding_str):
+    """documents_from_csv_line's parsing before float32 vectors."""
+    embedding_str = embedding_str.replace("[", "").replace("]", "")
+    return [float(x) for x in embedding_str.split(',')]
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    dimensions = int(sys.argv[2]) if len(sys.argv) > 2 else 1536
+    rng = random.Random(0)
+    lists = [[rng.uniform(-0.1, 0.1) for _ in range(dimensions)] for _ in range(documents)]
+    vectors = [as_vector(values) for values in lists]
+    list_lines = [legacy_format(values) for values in lists]
+    vector_lines = [format_vector(vector) for vector in vectors]
+
+    assert list(parse_vector(vector_lines[0])) == list(vectors[0])
+    assert list(from_bytes(to_bytes(vectors[0]))) == list(vectors[0])
+
+    backend = "numpy float32" if np is not None else "array('f')"
+    print(f"{documents} documents x {dimensions} dimensions, compact vectors are {backend}")
+    list_bytes = vector_nbytes(lists[0])
+    vector_bytes = vector_nbytes(vectors[0])
+    print(f"  memory per embedding     list {list_bytes:>8} B   float32 {vector_bytes:>8} B   ({list_bytes / vector_bytes:.1f}x)")
+    list_chars = sum(map(len, list_lines)) // documents
+    vector_chars = sum(map(len, vector_lines)) // documents
+    print(f"  text per embedding       list {list_chars:>8} ch  float32 {vector_chars:>8} ch")
+
+    cases = (
+        ("format", lambda: [legacy_format(values) for values in lists],
+                   lambda: [format_vector(vector) for vector in vectors]),
+        ("parse", lambda: [legacy_parse(line) for line in list_lines],
+                  lambda: [parse_vector(line) for line in vector_lines]),
+    )
+    for label, legacy, compact in cases:
+        legacy_seconds = min(timeit.repeat(legacy, number=1, repeat=3))
+        compact_seconds = min(timeit.repeat(compact, number=1, repeat=3))
+        print(f"  {label:<24} list {legacy_seconds / documents * 1e6:8.1f} us  float32 {compact_seconds / documents * 1e6:8.1f} us per embedding")
+    binary_seconds = min(timeit.repeat(lambda: [to_bytes(vector) for vector in vectors], number=1, repeat=3))
+    print(f"  {'binary (pgvector/gRPC)':<24} {binary_seconds / documents * 1e6:8.1f} us per embedding, {dimensions * 4} B")
+
+
+if __name__ == "__main__":
+    main()
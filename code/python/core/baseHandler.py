@@ -24,6 +24,7 @@ import core.router as router
 import methods.accompaniment as accompaniment
 import methods.recipe_substitution as substitution
 from core.state import NLWebHandlerState
+from core.utils.task_group import RequestTaskGroup
 from core.utils.utils import get_param, siteToItemType, log
 from misc.logger.logger import get_logger, LogLevel
 from misc.logger.logging_config_helper import get_configured_logger
@@ -132,6 +133,8 @@ class NLWebHandler:
         self.connection_alive_event = asyncio.Event()
         self.connection_alive_event.set()  # Initially alive
         self.abort_fast_track_event = asyncio.Event()
+        # Owns the ranking tasks so disconnects and aborts can cancel in-flight LLM calls
+        self.task_group = RequestTaskGroup(f"query {self.query_id}")
         self._state_lock = asyncio.Lock()
         self._send_lock = asyncio.Lock()
         
@@ -169,7 +172,21 @@ class NLWebHandler:
         else:
             self.connection_alive_event.clear()
 
-   
+    def is_client_connected(self):
+        """False once the connection event is cleared or the transport underneath has closed."""
+        if not self.connection_alive_event.is_set():
+            return False
+        is_connected = getattr(self.http_handler, "is_connected", None)
+        return is_connected() if callable(is_connected) else True
+
+    def on_client_disconnected(self):
+        logger.info(f"Client disconnected, cancelling outstanding work for query_id: {self.query_id}")
+        self.connection_alive_event.clear()
+        self.task_group.cancel(reason="client disconnected")
+
+    def start_task_group(self):
+        self.task_group.watch(self.is_client_connected, self.on_client_disconnected)
+
 
     async def send_message(self, message):
         import time
@@ -305,6 +322,7 @@ class NLWebHandler:
 
     async def runQuery(self):
         logger.info(f"Starting query execution for query_id: {self.query_id}")
+        self.start_task_group()
         try:
             await self.prepare()
             if (self.query_done):
@@ -363,6 +381,8 @@ class NLWebHandler:
             log(f"Error in runQuery: {e}")
             traceback.print_exc()
             raise
+        finally:
+            await self.task_group.close()
     
     async def prepare(self):
         logger.info("Starting preparation phase")
@@ -409,7 +429,8 @@ class NLWebHandler:
                     self.decontextualized_query, 
                     self.site,
                     query_params=self.query_params,
-                    handler=self
+                    handler=self,
+                    prune=True
                 )
                 self.final_retrieved_items = items
                 logger.debug(f"Retrieved {len(items)} items from database")
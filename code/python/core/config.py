@@ -36,6 +36,77 @@ class LLMProviderConfig:
     endpoint: Optional[str] = None
     api_version: Optional[str] = None
 
+@dataclass
+class LLMCacheConfig:
+    enabled: bool = False
+    max_entries: int = 10000
+    default_ttl: int = 0  # Seconds, for prompts not in prompt_ttls; a TTL of 0 disables caching
+    disk_path: Optional[str] = None  # Optional SQLite file for a persistent tier
+    prompt_ttls: Dict[str, int] = field(default_factory=dict)  # Per prompt-name TTL overrides
+
+@dataclass
+class LLMConcurrencyConfig:
+    enabled: bool = False
+    initial_limit: int = 32  # Concurrent calls allowed per endpoint and model at start
+    min_limit: int = 4
+    max_limit: int = 256
+    decrease_factor: float = 0.5  # Multiplier applied to the limit on throttling
+    cooldown: float = 1.0  # Minimum seconds between two decreases
+
+@dataclass
+class LLMHedgingConfig:
+    enabled: bool = False
+    secondary_endpoints: List[str] = field(default_factory=list)  # Tried in order after the preferred endpoint
+    percentile: float = 0.9  # Hedge once a call is slower than this percentile of recent latencies
+    min_samples: int = 20  # Latency samples needed before the percentile is trusted
+    default_delay: float = 2.0  # Hedge delay in seconds until enough samples exist
+    min_delay: float = 0.2
+    breaker_window: int = 50  # Recent calls considered for the error rate
+    breaker_error_rate: float = 0.5  # Error rate at which an endpoint is skipped
+    breaker_min_calls: int = 10
+    breaker_open_seconds: float = 30.0  # Time before a skipped endpoint gets a trial call
+
+@dataclass
+class LLMMockConfig:
+    latency_distribution: str = "lognormal"  # fixed, uniform, normal or lognormal
+    latency_mean: float = 0.5  # Seconds
+    latency_stddev: float = 0.2
+    latency_min: float = 0.0  # Sampled latencies are clamped to [latency_min, latency_max]
+    latency_max: float = 10.0
+    error_rate: float = 0.0  # Fraction of calls that fail with an error
+    throttle_rate: float = 0.0  # Fraction of calls that fail with a 429
+    timeout_rate: float = 0.0  # Fraction of calls that never answer within the timeout
+    seed: int = 0  # Changes every answer, latency and outcome
+    stream_chunk_chars: int = 16
+    stream_chunk_delay: float = 0.01  # Seconds between streamed chunks
+
+@dataclass
+class EmbeddingCacheConfig:
+    enabled: bool = False
+    max_entries: int = 10000
+    ttl: int = 3600  # Seconds; 0 keeps vectors until they are evicted
+
+@dataclass
+class EmbeddingStoreConfig:
+    enabled: bool = False
+    path: Optional[str] = None  # SQLite file, resolved like other data paths
+
+@dataclass
+class EmbeddingBatchingConfig:
+    enabled: bool = False
+    window_ms: float = 5.0  # How long the first query waits for others to join its batch
+    max_batch: int = 64
+    providers: List[str] = field(default_factory=lambda: ["openai", "azure_openai", "snowflake"])
+
+@dataclass
+class EmbeddingBulkConfig:
+    concurrency: int = 4
+    max_batch: int = 64
+    max_batch_tokens: Optional[int] = None
+    chars_per_token: float = 3.0  # Used to estimate token counts without a tokenizer
+    max_retries: int = 3
+    retry_backoff: float = 1.0  # Seconds before the first retry, doubled for each further retry
+
 @dataclass
 class EmbeddingProviderConfig:
     api_key: Optional[str] = None
@@ -43,6 +114,12 @@ class EmbeddingProviderConfig:
     api_version: Optional[str] = None
     model: Optional[str] = None
     config: Optional[Dict[str, Any]] = None
+    # Limits for batch_get_embeddings; unset values come from the bulk section
+    max_batch: Optional[int] = None  # Texts per request
+    max_batch_tokens: Optional[int] = None  # Estimated tokens per request
+    max_input_tokens: Optional[int] = None  # Longer texts are truncated
+    concurrency: Optional[int] = None  # Requests in flight at once
+    model_path: Optional[str] = None  # Model directory, for the local provider
 
 @dataclass
 class RetrievalProviderConfig:
@@ -56,6 +133,31 @@ class RetrievalProviderConfig:
     use_knn: Optional[bool] = None
     enabled: bool = False
     vector_type: Optional[str] = None
+    prefer_grpc: Optional[bool] = None  # Qdrant: send vectors as binary over gRPC instead of JSON
+
+@dataclass
+class RetrievalCacheConfig:
+    enabled: bool = False
+    max_entries: int = 1000
+    ttl: int = 300  # Seconds; 0 keeps results until they are evicted or invalidated by a write
+
+@dataclass
+class RetrievalStreamingConfig:
+    enabled: bool = False  # Fast track ranks items as each endpoint answers
+    endpoint_deadline: Optional[float] = None  # Seconds; endpoints slower than this are left out of ranking
+    late_results: str = "append"  # "append" keeps late items for later stages, "drop" cancels late endpoints
+
+@dataclass
+class RetrievalScoringConfig:
+    fusion: str = "interleave"  # "rrf" orders merged results by reciprocal rank fusion, "interleave" alternates endpoints
+    rrf_k: int = 60  # Rank offset of reciprocal rank fusion; larger values weigh lower ranks more evenly
+    prune: bool = False  # Leave results past the drop-off in similarity out of ranking
+    min_results: int = 10  # Results always sent to ranking when pruning
+    knee_threshold: float = 0.02  # Smallest drop-off, in similarity below a straight decline, that is cut
+
+@dataclass
+class SiteCatalogConfig:
+    ttl: int = 300  # Seconds before an endpoint's site list is refreshed in the background; 0 never refreshes
 
 
 @dataclass
@@ -136,6 +238,8 @@ class NLWebConfig:
     analyze_query_enabled: bool = False  # Enable or disable query analysis
     decontextualize_enabled: bool = True  # Enable or disable decontextualization
     required_info_enabled: bool = True  # Enable or disable required info checking
+    ranking_batch_size: int = 1  # Number of items ranked per LLM call
+    ranking_streaming_enabled: bool = False  # Stream ranking responses and stop once the score decides
     api_keys: Dict[str, str] = field(default_factory=dict)  # API keys for external services
 
 @dataclass
@@ -303,6 +407,59 @@ class AppConfig:
                     api_version=api_version
                 )
 
+            # Response cache for ask_llm
+            cache_data = data.get("cache", {}) or {}
+            disk_path = self._get_config_value(cache_data.get("disk_path"))
+            self.llm_cache = LLMCacheConfig(
+                enabled=cache_data.get("enabled", False),
+                max_entries=cache_data.get("max_entries", 10000),
+                default_ttl=cache_data.get("default_ttl", 0),
+                disk_path=self._resolve_path(disk_path) if disk_path else None,
+                prompt_ttls=cache_data.get("prompt_ttls", {}) or {}
+            )
+
+            # Adaptive concurrency limits for ask_llm
+            concurrency_data = data.get("concurrency", {}) or {}
+            self.llm_concurrency = LLMConcurrencyConfig(
+                enabled=concurrency_data.get("enabled", False),
+                initial_limit=concurrency_data.get("initial_limit", 32),
+                min_limit=concurrency_data.get("min_limit", 4),
+                max_limit=concurrency_data.get("max_limit", 256),
+                decrease_factor=concurrency_data.get("decrease_factor", 0.5),
+                cooldown=concurrency_data.get("cooldown", 1.0)
+            )
+
+            # Hedging and circuit breaking across endpoints
+            hedging_data = data.get("hedging", {}) or {}
+            self.llm_hedging = LLMHedgingConfig(
+                enabled=hedging_data.get("enabled", False),
+                secondary_endpoints=hedging_data.get("secondary_endpoints", []) or [],
+                percentile=hedging_data.get("percentile", 0.9),
+                min_samples=hedging_data.get("min_samples", 20),
+                default_delay=hedging_data.get("default_delay", 2.0),
+                min_delay=hedging_data.get("min_delay", 0.2),
+                breaker_window=hedging_data.get("breaker_window", 50),
+                breaker_error_rate=hedging_data.get("breaker_error_rate", 0.5),
+                breaker_min_calls=hedging_data.get("breaker_min_calls", 10),
+                breaker_open_seconds=hedging_data.get("breaker_open_seconds", 30.0)
+            )
+
+            # Behaviour of the mock llm_type used for offline load testing
+            mock_data = data.get("mock", {}) or {}
+            self.llm_mock = LLMMockConfig(
+                latency_distribution=mock_data.get("latency_distribution", "lognormal"),
+                latency_mean=mock_data.get("latency_mean", 0.5),
+                latency_stddev=mock_data.get("latency_stddev", 0.2),
+                latency_min=mock_data.get("latency_min", 0.0),
+                latency_max=mock_data.get("latency_max", 10.0),
+                error_rate=mock_data.get("error_rate", 0.0),
+                throttle_rate=mock_data.get("throttle_rate", 0.0),
+                timeout_rate=mock_data.get("timeout_rate", 0.0),
+                seed=mock_data.get("seed", 0),
+                stream_chunk_chars=mock_data.get("stream_chunk_chars", 16),
+                stream_chunk_delay=mock_data.get("stream_chunk_delay", 0.01)
+            )
+
     def load_embedding_config(self, path: str = "config_embedding.yaml"):
         """Load embedding model configuration."""
         # Build the full path to the config file using the config directory
@@ -329,6 +486,7 @@ class AppConfig:
             api_version = self._get_config_value(cfg.get("api_version_env"))
             model = self._get_config_value(cfg.get("model"))
             config = self._get_config_value(cfg.get("config"))
+            model_path = self._get_config_value(cfg.get("model_path"))
 
             # Create the embedding provider config
             self.embedding_providers[name] = EmbeddingProviderConfig(
@@ -336,9 +494,50 @@ class AppConfig:
                 endpoint=api_endpoint,
                 api_version=api_version,
                 model=model,
-                config=config
+                config=config,
+                max_batch=cfg.get("max_batch"),
+                max_batch_tokens=cfg.get("max_batch_tokens"),
+                max_input_tokens=cfg.get("max_input_tokens"),
+                concurrency=cfg.get("concurrency"),
+                model_path=self._resolve_path(model_path) if model_path else None
             )
 
+        # Cache of query embeddings used by get_embedding
+        cache_data = data.get("cache", {}) or {}
+        self.embedding_cache = EmbeddingCacheConfig(
+            enabled=cache_data.get("enabled", False),
+            max_entries=cache_data.get("max_entries", 10000),
+            ttl=cache_data.get("ttl", 3600)
+        )
+
+        # Chunking and concurrency of batch_get_embeddings
+        bulk_data = data.get("bulk", {}) or {}
+        self.embedding_bulk = EmbeddingBulkConfig(
+            concurrency=bulk_data.get("concurrency", 4),
+            max_batch=bulk_data.get("max_batch", 64),
+            max_batch_tokens=bulk_data.get("max_batch_tokens"),
+            chars_per_token=bulk_data.get("chars_per_token", 3.0),
+            max_retries=bulk_data.get("max_retries", 3),
+            retry_backoff=bulk_data.get("retry_backoff", 1.0)
+        )
+
+        # On-disk store of document embeddings used by the loaders
+        store_data = data.get("store", {}) or {}
+        store_path = self._get_config_value(store_data.get("path"))
+        self.embedding_store = EmbeddingStoreConfig(
+            enabled=store_data.get("enabled", False),
+            path=self._resolve_path(store_path) if store_path else None
+        )
+
+        # Micro-batching of concurrent query embeddings
+        batching_data = data.get("batching", {}) or {}
+        self.embedding_batching = EmbeddingBatchingConfig(
+            enabled=batching_data.get("enabled", False),
+            window_ms=batching_data.get("window_ms", 5.0),
+            max_batch=batching_data.get("max_batch", 64),
+            providers=batching_data.get("providers") or EmbeddingBatchingConfig().providers
+        )
+
     def load_retrieval_config(self, path: str = "config_retrieval.yaml"):
         # Build the full path to the config file using the config directory
         full_path = os.path.join(self.config_directory, path)
@@ -373,8 +572,47 @@ class AppConfig:
                 db_type=self._get_config_value(cfg.get("db_type")),  # Add db_type
                 enabled=cfg.get("enabled", False),  # Add enabled field
                 use_knn=cfg.get("use_knn"),
-                vector_type=cfg.get("vector_type")
+                vector_type=cfg.get("vector_type"),
+                prefer_grpc=cfg.get("prefer_grpc")
             )
+
+        # Cached list of sites in each endpoint, used to skip endpoints without the requested site
+        catalog_data = data.get("site_catalog", {}) or {}
+        self.site_catalog = SiteCatalogConfig(
+            ttl=catalog_data.get("ttl", 300)
+        )
+
+        # Streaming retrieval, ranking items as each endpoint answers
+        streaming_data = data.get("streaming", {}) or {}
+        late_results = streaming_data.get("late_results", "append")
+        if late_results not in ("append", "drop"):
+            raise ValueError(f"streaming.late_results must be 'append' or 'drop', got '{late_results}'")
+        self.retrieval_streaming = RetrievalStreamingConfig(
+            enabled=streaming_data.get("enabled", False),
+            endpoint_deadline=streaming_data.get("endpoint_deadline"),
+            late_results=late_results
+        )
+
+        # Fusion of endpoint results and pruning of the low-similarity tail before ranking
+        scoring_data = data.get("scoring", {}) or {}
+        fusion = scoring_data.get("fusion", "interleave")
+        if fusion not in ("rrf", "interleave"):
+            raise ValueError(f"scoring.fusion must be 'rrf' or 'interleave', got '{fusion}'")
+        self.retrieval_scoring = RetrievalScoringConfig(
+            fusion=fusion,
+            rrf_k=scoring_data.get("rrf_k", 60),
+            prune=scoring_data.get("prune", False),
+            min_results=scoring_data.get("min_results", 10),
+            knee_threshold=scoring_data.get("knee_threshold", 0.02)
+        )
+
+        # Cache of search results, invalidated by writes through the retriever
+        cache_data = data.get("cache", {}) or {}
+        self.retrieval_cache = RetrievalCacheConfig(
+            enabled=cache_data.get("enabled", False),
+            max_entries=cache_data.get("max_entries", 1000),
+            ttl=cache_data.get("ttl", 300)
+        )
     
     def load_webserver_config(self, path: str = "config_webserver.yaml"):
         # Build the full path to the config file using the config directory
@@ -503,6 +741,12 @@ class AppConfig:
         # Load required info enabled flag
         required_info_enabled = self._get_config_value(data.get("required_info_enabled"), True)
         
+        # Load number of items ranked per LLM call
+        ranking_batch_size = self._get_config_value(data.get("ranking_batch_size"), 1)
+        
+        # Load streaming ranking flag
+        ranking_streaming_enabled = self._get_config_value(data.get("ranking_streaming_enabled"), False)
+        
         # Load headers from config
         headers = data.get("headers", {})
         
@@ -537,6 +781,8 @@ class AppConfig:
             analyze_query_enabled=analyze_query_enabled,
             decontextualize_enabled=decontextualize_enabled,
             required_info_enabled=required_info_enabled,
+            ranking_batch_size=ranking_batch_size,
+            ranking_streaming_enabled=ranking_streaming_enabled,
             api_keys=api_keys
         )
     
@@ -646,6 +892,14 @@ class AppConfig:
         """Check if required info checking is enabled."""
         return self.nlweb.required_info_enabled if hasattr(self, 'nlweb') else True
     
+    def get_ranking_batch_size(self) -> int:
+        """Get the number of items ranked per LLM call."""
+        return max(1, int(self.nlweb.ranking_batch_size)) if hasattr(self, 'nlweb') else 1
+    
+    def is_ranking_streaming_enabled(self) -> bool:
+        """Check if single-item ranking streams the LLM response."""
+        return self.nlweb.ranking_streaming_enabled if hasattr(self, 'nlweb') else False
+    
     def load_sites_config(self, path: str = "sites.xml"):
         """Load site configurations from XML file."""
         # Build the full path to the config file using the config directory
@@ -8,11 +8,17 @@ WARNING: This code is under development and may undergo changes in future releas
 Backwards compatibility is not guaranteed at this time.
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 import asyncio
+import sys
 import threading
 
 from core.config import CONFIG
+from core.embedding_batcher import MicroBatcher, embed_in_chunks, plan_chunks
+from core.embedding_cache import EmbeddingCache, normalize_text
+from core.embedding_store import EmbeddingStore
+from core.vectors import Vector, as_vector, copy_vector
+from core.utils.singleflight import SingleFlight
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 
 logger = get_configured_logger("embedding_wrapper")
@@ -26,13 +32,104 @@ _provider_locks = {
     "elasticsearch": threading.Lock()
 }
 
+# Coalesces identical in-flight get_embedding calls
+_inflight_embeddings = SingleFlight()
+
+# Single-text calls in flight at once for providers without a batch API
+SINGLE_TEXT_CONCURRENCY = 8
+
+# Query embedding cache, created lazily from CONFIG.embedding_cache
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def _get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Return the shared embedding cache, or None if caching is disabled."""
+    global _embedding_cache
+    cache_config = getattr(CONFIG, "embedding_cache", None)
+    if not cache_config or not cache_config.enabled:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                max_entries=cache_config.max_entries,
+                ttl=cache_config.ttl
+            )
+    return _embedding_cache
+
+# Micro-batcher for query embeddings, created lazily from CONFIG.embedding_batching
+_embedding_batcher = None
+_embedding_batcher_lock = threading.Lock()
+
+def _get_embedding_batcher(provider: str) -> Optional[MicroBatcher]:
+    """Return the shared micro-batcher, or None if the provider's queries aren't batched."""
+    global _embedding_batcher
+    batching_config = getattr(CONFIG, "embedding_batching", None)
+    if not batching_config or not batching_config.enabled or provider not in batching_config.providers:
+        return None
+    with _embedding_batcher_lock:
+        if _embedding_batcher is None:
+            _embedding_batcher = MicroBatcher(
+                _dispatch_embedding_batch,
+                window=batching_config.window_ms / 1000.0,
+                max_batch=batching_config.max_batch
+            )
+    return _embedding_batcher
+
+async def _dispatch_embedding_batch(group, items):
+    """Send texts batched by the micro-batcher; a group is (provider, model), an item (text, timeout)."""
+    provider, model_id = group
+    timeout = max(item_timeout for _, item_timeout in items)
+    return await _embed_batch([text for text, _ in items], provider, model_id, timeout)
+
+# Document embedding store, opened lazily from CONFIG.embedding_store
+_embedding_store = None
+_embedding_store_lock = threading.Lock()
+
+def _get_embedding_store() -> Optional[EmbeddingStore]:
+    """Return the shared embedding store, or None if it is disabled or can't be opened."""
+    global _embedding_store
+    store_config = getattr(CONFIG, "embedding_store", None)
+    if not store_config or not store_config.enabled or not store_config.path:
+        return None
+    with _embedding_store_lock:
+        if _embedding_store is None:
+            try:
+                _embedding_store = EmbeddingStore(store_config.path)
+            except Exception as e:
+                logger.warning(f"Failed to open embedding store at {store_config.path}: {e}")
+                store_config.enabled = False
+                return None
+    return _embedding_store
+
+def get_embedding_cache_stats() -> Dict[str, Any]:
+    """Return size, hit/miss and eviction counters of the query embedding cache."""
+    cache = _get_embedding_cache()
+    stats = {"enabled": False} if cache is None else {"enabled": True, **cache.get_stats()}
+    stats["in_flight"] = _inflight_embeddings.in_flight()
+    stats["coalesced"] = _inflight_embeddings.coalesced
+    batcher = _embedding_batcher
+    stats["batching"] = {"enabled": False} if batcher is None else {"enabled": True, **batcher.get_stats()}
+    store = _embedding_store
+    stats["store"] = {"enabled": False} if store is None else {"enabled": True, **store.get_stats()}
+    return stats
+
+async def close_embedding_clients():
+    """Close provider clients that are kept open between calls; called on server shutdown."""
+    # Only providers that have been used are loaded, and only those have clients to close
+    elasticsearch_module = sys.modules.get("embedding_providers.elasticsearch_embedding")
+    if elasticsearch_module is not None:
+        await elasticsearch_module.close_shared_embedding_clients()
+    local_module = sys.modules.get("embedding_providers.local_embedding")
+    if local_module is not None:
+        local_module.close_local_embedding()
+
 async def get_embedding(
     text: str,
     provider: Optional[str] = None,
     model: Optional[str] = None,
     timeout: int = 30,
     query_params: Optional[dict] = None
-) -> List[float]:
+) -> Vector:
     """
     Get embedding for the provided text using the specified provider and model.
     
@@ -44,7 +141,7 @@ async def get_embedding(
         query_params: Optional query parameters from HTTP request
         
     Returns:
-        List of floats representing the embedding vector
+        The embedding as a float32 vector (see core.vectors)
     """
     # Allow overriding provider in development mode
     if CONFIG.is_development_mode() and query_params:
@@ -85,6 +182,96 @@ async def get_embedding(
     
     logger.debug(f"Using embedding model: {model_id}")
 
+    # Queries differing only in whitespace get the same vector
+    text = normalize_text(text)
+    key = EmbeddingCache.make_key(provider, model_id, text)
+    cache = _get_embedding_cache()
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.debug("Embedding cache hit")
+            return cached
+
+    batcher = _get_embedding_batcher(provider)
+
+    async def embed():
+        if batcher is not None:
+            # Joins concurrent queries from other requests in one provider call
+            result = await batcher.submit((provider, model_id), (text, timeout))
+        else:
+            result = await _embed_text(text, provider, model_id, timeout)
+        result = as_vector(result)
+        if cache is not None:
+            cache.set(key, result)
+        return result
+
+    # Identical concurrent requests (e.g. the same query from several endpoints or
+    # users) share one upstream call. Each caller gets its own copy of the vector.
+    result = await _inflight_embeddings.do(key, embed)
+    return copy_vector(result)
+
+async def get_embeddings(
+    texts: List[str],
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    timeout: int = 30,
+    query_params: Optional[dict] = None
+) -> List[Vector]:
+    """
+    Get query embeddings for several texts with one provider call.
+
+    Like get_embedding for each text: texts are normalized and looked up in the
+    query embedding cache. The distinct texts that aren't cached are embedded
+    together with batch_get_embeddings and added to the cache.
+
+    Args:
+        texts: The texts to embed
+        provider: Optional provider name, defaults to preferred_embedding_provider
+        model: Optional model name, defaults to the provider's configured model
+        timeout: Maximum time to wait for embedding response in seconds
+        query_params: Optional query parameters from HTTP request
+
+    Returns:
+        One float32 vector per text, in the order of texts
+    """
+    if CONFIG.is_development_mode() and query_params:
+        if 'embedding_provider' in query_params:
+            provider = query_params['embedding_provider']
+            logger.debug(f"Overriding embedding provider to: {provider}")
+
+    provider = provider or CONFIG.preferred_embedding_provider
+    provider_config = CONFIG.get_embedding_provider(provider)
+    if provider not in CONFIG.embedding_providers or not provider_config:
+        error_msg = f"Unknown embedding provider '{provider}'"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+    model_id = model or provider_config.model
+
+    MAX_CHARS = 20000
+    texts = [normalize_text(text[:MAX_CHARS]) for text in texts]
+    keys = [EmbeddingCache.make_key(provider, model_id, text) for text in texts]
+    cache = _get_embedding_cache()
+    found = {}
+    missing = {}
+    for key, text in zip(keys, texts):
+        cached = cache.get(key) if cache is not None and key not in found else None
+        if cached is not None:
+            found[key] = cached
+        elif key not in found:
+            missing[key] = text
+
+    if missing:
+        logger.debug(f"Embedding {len(missing)} of {len(texts)} query texts in one batch")
+        vectors = await batch_get_embeddings(list(missing.values()), provider, model_id, timeout)
+        for key, vector in zip(missing.keys(), vectors):
+            vector = as_vector(vector)
+            if cache is not None:
+                cache.set(key, vector)
+            found[key] = vector
+    return [copy_vector(found[key]) for key in keys]
+
+async def _embed_text(text: str, provider: str, model_id: str, timeout: int) -> List[float]:
+    """Dispatch a single embedding request to the provider implementation."""
     try:
         # Use a timeout wrapper for all embedding calls
         if provider == "openai":
@@ -146,21 +333,30 @@ async def get_embedding(
 
         if provider == "elasticsearch":
             # Use Elasticsearch's embedding API
-            global elasticsearch_embedding
             logger.debug("Getting Elasticsearch embeddings")
-            from embedding_providers.elasticsearch_embedding import ElasticsearchEmbedding
+            from embedding_providers.elasticsearch_embedding import get_shared_embedding_client
 
-            elasticsearch_embedding = ElasticsearchEmbedding()
+            # Shared client; its connections stay open between calls
+            elasticsearch_embedding = get_shared_embedding_client(provider)
 
             result = await elasticsearch_embedding.get_embeddings(
                 text,
                 model=model_id,
                 timeout=timeout
             )
-            await elasticsearch_embedding.close()  # Ensure cleanup
 
             logger.debug(f"Elasticsearch embeddings received, count: {len(result)}")
             return result
+
+        if provider == "local":
+            logger.debug("Getting local embeddings")
+            from embedding_providers.local_embedding import get_local_embedding
+            result = await asyncio.wait_for(
+                get_local_embedding(text, model=model_id),
+                timeout=timeout
+            )
+            logger.debug(f"Local embeddings received, dimension: {len(result)}")
+            return result
         
         error_msg = f"No embedding implementation for provider '{provider}'"
         logger.error(error_msg)
@@ -184,42 +380,132 @@ async def get_embedding(
         )
         raise
 
+async def _embed_batch(texts: List[str], provider: str, model_id: str, timeout: int) -> List[List[float]]:
+    """Dispatch a batch embedding request to the provider implementation."""
+    # Provider-specific batch implementations with timeout handling
+    if provider == "openai":
+        # Use OpenAI's batch embedding API
+        logger.debug("Getting OpenAI batch embeddings")
+        from embedding_providers.openai_embedding import get_openai_batch_embeddings
+        result = await asyncio.wait_for(
+            get_openai_batch_embeddings(texts, model=model_id),
+            timeout=timeout
+        )
+        logger.debug(f"OpenAI batch embeddings received, count: {len(result)}")
+        return result
+        
+    if provider == "azure_openai":
+        # Use Azure's batch embedding API
+        logger.debug("Getting Azure OpenAI batch embeddings")
+        from embedding_providers.azure_oai_embedding import get_azure_batch_embeddings
+        result = await asyncio.wait_for(
+            get_azure_batch_embeddings(texts, model=model_id),
+            timeout=timeout
+        )
+        logger.debug(f"Azure batch embeddings received, count: {len(result)}")
+        return result
+        
+    if provider == "snowflake":
+        # Use Snowflake's batch embedding API
+        logger.debug("Getting Snowflake batch embeddings")
+        from embedding_providers.snowflake_embedding import get_snowflake_batch_embeddings
+        result = await asyncio.wait_for(
+            get_snowflake_batch_embeddings(texts, model=model_id),
+            timeout=timeout
+        )
+        logger.debug(f"Snowflake batch embeddings received, count: {len(result)}")
+        return result
+        
+    if provider == "gemini":
+        # Gemini might not have a native batch API, so process one by one
+        logger.debug("Getting Gemini batch embeddings (sequential)")
+        from embedding_providers.gemini_embedding import get_gemini_batch_embeddings
+        # Process texts one by one with individual timeouts
+        result = await asyncio.wait_for(
+            get_gemini_batch_embeddings(texts, model=model_id),
+            timeout=30  # Individual timeout per text
+        )
+        logger.debug(f"Gemini batch embeddings received, count: {len(result)}")
+        return result
+    
+    if provider == "ollama":
+        logger.debug("Getting Ollama batch embeddings")
+        from embedding_providers.ollama_embedding import get_ollama_batch_embeddings
+        result = await asyncio.wait_for(
+            get_ollama_batch_embeddings(texts, model=model_id),
+            timeout=timeout*5  # Ollama may take longer for batch processing
+        )
+        logger.debug(f"Ollama batch embeddings received, count: {len(result)}")
+        return result
+
+    if provider == "elasticsearch":
+        # Use Elasticsearch's batch embedding API
+        logger.debug("Getting Elasticsearch batch embeddings")
+        from embedding_providers.elasticsearch_embedding import get_shared_embedding_client
+
+        # Shared client; its connections stay open between loader batches
+        elasticsearch_embedding = get_shared_embedding_client(provider)
+
+        result = await elasticsearch_embedding.get_batch_embeddings(
+            texts,
+            model=model_id,
+            timeout=timeout
+        )
+
+        logger.debug(f"Elasticsearch batch embeddings received, count: {len(result)}")
+        return result
+
+    if provider == "local":
+        # Runs the model in this process, on a thread pool
+        logger.debug("Getting local batch embeddings")
+        from embedding_providers.local_embedding import get_local_batch_embeddings
+        result = await asyncio.wait_for(
+            get_local_batch_embeddings(texts, model=model_id),
+            timeout=timeout
+        )
+        logger.debug(f"Local batch embeddings received, count: {len(result)}")
+        return result
+    
+    # Default implementation if provider doesn't match any above: one call per text,
+    # a bounded number at a time. _embed_text rather than get_embedding, so texts the
+    # micro-batcher dispatches here aren't submitted to the batcher again.
+    logger.debug(f"No specific batch implementation for {provider}, embedding texts concurrently")
+    semaphore = asyncio.Semaphore(SINGLE_TEXT_CONCURRENCY)
+
+    async def embed_one(text):
+        async with semaphore:
+            return await _embed_text(text, provider, model_id, timeout)
+
+    return list(await asyncio.gather(*[embed_one(text) for text in texts]))
+
 async def batch_get_embeddings(
     texts: List[str],
     provider: Optional[str] = None,
     model: Optional[str] = None,
-    timeout: int = 60
-) -> List[List[float]]:
+    timeout: int = 60,
+    use_store: bool = False,
+    force_recompute: bool = False
+) -> List[Vector]:
     """
     Get embeddings for a batch of texts.
     
+    The texts are split into chunks within the provider's batch size and token
+    limits, and the chunks are embedded concurrently with retries. Embeddings
+    are returned in the order of texts.
+    
     Args:
         texts: List of texts to embed
         provider: Optional provider name, defaults to preferred_embedding_provider
         model: Optional model name, defaults to the provider's configured model
         timeout: Maximum time to wait for batch embedding response in seconds
+        use_store: Reuse embeddings from the on-disk embedding store and add new ones to it
+        force_recompute: With use_store, embed every text anyway and overwrite the stored vectors
         
     Returns:
-        List of embedding vectors, each a list of floats
+        List of embedding vectors, each float32 (see core.vectors)
     """
     provider = provider or CONFIG.preferred_embedding_provider
     
-    # Truncate texts to 20k characters to avoid token limit issues
-    MAX_CHARS = 20000
-    truncated_texts = []
-    for i, text in enumerate(texts):
-        original_length = len(text)
-        if original_length > MAX_CHARS:
-            truncated_text = text[:MAX_CHARS]
-            truncated_texts.append(truncated_text)
-            logger.warning(f"Truncated text {i} from {original_length} to {MAX_CHARS} characters for embedding generation")
-        else:
-            truncated_texts.append(text)
-    texts = truncated_texts
-    
-    logger.debug(f"Getting batch embeddings with provider: {provider}")
-    logger.debug(f"Batch size: {len(texts)} texts")
-    
     # Get provider config using the helper method
     provider_config = CONFIG.get_embedding_provider(provider)
     if not provider_config:
@@ -233,88 +519,80 @@ async def batch_get_embeddings(
         logger.error(error_msg)
         raise ValueError(error_msg)
     
-    try:
-        # Provider-specific batch implementations with timeout handling
-        if provider == "openai":
-            # Use OpenAI's batch embedding API
-            logger.debug("Getting OpenAI batch embeddings")
-            from embedding_providers.openai_embedding import get_openai_batch_embeddings
-            result = await asyncio.wait_for(
-                get_openai_batch_embeddings(texts, model=model_id),
-                timeout=timeout
-            )
-            logger.debug(f"OpenAI batch embeddings received, count: {len(result)}")
-            return result
-            
-        if provider == "azure_openai":
-            # Use Azure's batch embedding API
-            logger.debug("Getting Azure OpenAI batch embeddings")
-            from embedding_providers.azure_oai_embedding import get_azure_batch_embeddings
-            result = await asyncio.wait_for(
-                get_azure_batch_embeddings(texts, model=model_id),
-                timeout=timeout
-            )
-            logger.debug(f"Azure batch embeddings received, count: {len(result)}")
-            return result
-            
-        if provider == "snowflake":
-            # Use Snowflake's batch embedding API
-            logger.debug("Getting Snowflake batch embeddings")
-            from embedding_providers.snowflake_embedding import get_snowflake_batch_embeddings
-            result = await asyncio.wait_for(
-                get_snowflake_batch_embeddings(texts, model=model_id),
-                timeout=timeout
-            )
-            logger.debug(f"Snowflake batch embeddings received, count: {len(result)}")
-            return result
-            
-        if provider == "gemini":
-            # Gemini might not have a native batch API, so process one by one
-            logger.debug("Getting Gemini batch embeddings (sequential)")
-            from embedding_providers.gemini_embedding import get_gemini_batch_embeddings
-            # Process texts one by one with individual timeouts
-            result = await asyncio.wait_for(
-                get_gemini_batch_embeddings(texts, model=model_id),
-                timeout=30  # Individual timeout per text
-            )
-            logger.debug(f"Gemini batch embeddings received, count: {len(result)}")
-            return result
-        
-        if provider == "ollama":
-            logger.debug("Getting Ollama batch embeddings")
-            from embedding_providers.ollama_embedding import get_ollama_batch_embeddings
-            result = await asyncio.wait_for(
-                get_ollama_batch_embeddings(texts, model=model_id),
-                timeout=timeout*5  # Ollama may take longer for batch processing
-            )
-            logger.debug(f"Ollama batch embeddings received, count: {len(result)}")
-            return result
+    bulk_config = CONFIG.embedding_bulk
     
-        if provider == "elasticsearch":
-            # Use Elasticsearch's batch embedding API
-            logger.debug("Getting Elasticsearch batch embeddings")
-            from embedding_providers.elasticsearch_embedding import ElasticsearchEmbedding
+    # Truncate texts to 20k characters, or the provider's input token limit, to avoid token limit issues
+    MAX_CHARS = 20000
+    max_chars = MAX_CHARS
+    if provider_config.max_input_tokens:
+        max_chars = min(MAX_CHARS, int(provider_config.max_input_tokens * bulk_config.chars_per_token))
+    truncated_texts = []
+    for i, text in enumerate(texts):
+        original_length = len(text)
+        if original_length > max_chars:
+            truncated_text = text[:max_chars]
+            truncated_texts.append(truncated_text)
+            logger.warning(f"Truncated text {i} from {original_length} to {max_chars} characters for embedding generation")
+        else:
+            truncated_texts.append(text)
+    texts = truncated_texts
     
-            elasticsearch_embedding = ElasticsearchEmbedding()
+    # Texts embedded before with the same provider and model are read from the store
+    store = _get_embedding_store() if use_store else None
+    if store is not None:
+        return await _batch_get_embeddings_with_store(
+            store, texts, provider, model_id, timeout, force_recompute
+        )
+    return await _batch_embed(texts, provider, model_id, timeout)
 
-            result = await elasticsearch_embedding.get_batch_embeddings(
-                texts,
-                model=model_id,
-                timeout=timeout
-            )
-            await elasticsearch_embedding.close()  # Ensure cleanup
+async def _batch_get_embeddings_with_store(
+    store: EmbeddingStore,
+    texts: List[str],
+    provider: str,
+    model_id: str,
+    timeout: int,
+    force_recompute: bool
+) -> List[Vector]:
+    """batch_get_embeddings for texts missing from the store; each distinct text is embedded once."""
+    keys = [EmbeddingStore.make_key(provider, model_id, text) for text in texts]
+    found = {} if force_recompute else await asyncio.to_thread(store.get_many, keys)
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+    reused = sum(1 for key in keys if key in found)
+    logger.info(f"Embedding store: reused {reused} of {len(texts)} texts, embedding {len(missing)}")
+    if missing:
+        vectors = await _batch_embed(list(missing.values()), provider, model_id, timeout)
+        computed = dict(zip(missing.keys(), vectors))
+        await asyncio.to_thread(store.put_many, computed.items())
+        found.update(computed)
+    return [copy_vector(found[key]) for key in keys]
 
-            logger.debug(f"Elasticsearch batch embeddings received, count: {len(result)}")
-            return result
-        
-        # Default implementation if provider doesn't match any above
-        logger.debug(f"No specific batch implementation for {provider}, processing sequentially")
-        results = []
-        for text in texts:
-            embedding = await get_embedding(text, provider, model)
-            results.append(embedding)
-        
-        return results
+async def _batch_embed(texts: List[str], provider: str, model_id: str, timeout: int) -> List[Vector]:
+    """Embed texts in concurrent chunks sized to the provider's limits."""
+    # Provider limits override the bulk defaults
+    provider_config = CONFIG.get_embedding_provider(provider)
+    bulk_config = CONFIG.embedding_bulk
+    max_batch = provider_config.max_batch or bulk_config.max_batch
+    max_batch_tokens = provider_config.max_batch_tokens or bulk_config.max_batch_tokens
+    concurrency = provider_config.concurrency or bulk_config.concurrency
+    
+    chunks = plan_chunks(texts, max_batch, max_batch_tokens, bulk_config.chars_per_token)
+    logger.debug(f"Getting batch embeddings with provider: {provider}")
+    logger.debug(f"Batch size: {len(texts)} texts in {len(chunks)} chunks, {concurrency} at a time")
+    
+    async def embed_chunk(chunk_texts: List[str]) -> List[Vector]:
+        vectors = await _embed_batch(chunk_texts, provider, model_id, timeout)
+        return [as_vector(vector) for vector in vectors]
+    
+    try:
+        return await embed_in_chunks(
+            texts, chunks, embed_chunk,
+            concurrency=concurrency,
+            max_retries=bulk_config.max_retries,
+            retry_backoff=bulk_config.retry_backoff
+        )
         
     except asyncio.TimeoutError:
         logger.error(f"Batch embedding request timed out after {timeout}s with provider {provider}")
@@ -0,0 +1,164 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Batching of embedding calls. Concurrent get_embedding calls from different
+requests are held for a few milliseconds and sent to the provider as one batch
+call, then each caller gets its own vector back. Under load this turns many
+small round trips into a few larger ones and eases rate limits.
+
+Bulk embedding (batch_get_embeddings) goes the other way: a long list of texts
+is split into chunks that fit the provider's batch size and token limits, and
+the chunks are sent concurrently, a bounded number at a time.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import math
+import random
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("embedding_batcher")
+
+
+class MicroBatcher:
+    """
+    Collects items submitted under the same group key and hands them to
+    dispatch(group, items) as one list, either window seconds after the first
+    item arrived or as soon as max_batch items are waiting. dispatch must
+    return one result per item, in order; if it raises, every caller in the
+    batch gets the exception.
+    """
+
+    def __init__(self, dispatch: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+                 window: float = 0.005, max_batch: int = 64):
+        self.dispatch = dispatch
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._stats = {"items": 0, "batches": 0, "largest_batch": 0, "failed_batches": 0}
+
+    async def submit(self, group: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(group, [])
+        pending.append((item, future))
+        if len(pending) >= self.max_batch:
+            self._flush(group)
+        elif len(pending) == 1:
+            self._timers[group] = loop.call_later(self.window, self._flush, group)
+        return await future
+
+    def _flush(self, group: Hashable):
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        # Callers that have given up don't need a slot in the batch
+        batch = [(item, future) for item, future in self._pending.pop(group, []) if not future.done()]
+        if batch:
+            asyncio.ensure_future(self._run(group, batch))
+
+    async def _run(self, group: Hashable, batch: List[Tuple[Any, asyncio.Future]]):
+        self._stats["batches"] += 1
+        self._stats["items"] += len(batch)
+        self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+        try:
+            results = await self.dispatch(group, [item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch of {len(batch)} returned {len(results)} results")
+        except Exception as e:
+            self._stats["failed_batches"] += 1
+            logger.warning(f"Batch of {len(batch)} for {group} failed: {type(e).__name__}: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        batches = stats["batches"]
+        return {
+            "window_ms": round(self.window * 1000, 3),
+            "max_batch": self.max_batch,
+            **stats,
+            "average_batch": round(stats["items"] / batches, 2) if batches else 0.0,
+            "waiting": sum(len(pending) for pending in self._pending.values()),
+        }
+
+
+def estimate_tokens(text: str, chars_per_token: float = 3.0) -> int:
+    """Rough token count from the text length; schema.org JSON runs about 3 characters a token."""
+    return max(1, math.ceil(len(text) / chars_per_token))
+
+
+def plan_chunks(texts: Sequence[str], max_batch: int, max_batch_tokens: Optional[int] = None,
+                chars_per_token: float = 3.0) -> List[Tuple[int, int]]:
+    """
+    Split texts into consecutive (start, end) ranges of at most max_batch texts
+    whose estimated tokens stay within max_batch_tokens. A text over the token
+    budget on its own gets a chunk to itself.
+    """
+    max_batch = max(1, max_batch)
+    chunks = []
+    start = 0
+    tokens = 0
+    for index, text in enumerate(texts):
+        text_tokens = estimate_tokens(text, chars_per_token)
+        full = index - start >= max_batch
+        over_budget = max_batch_tokens and index > start and tokens + text_tokens > max_batch_tokens
+        if full or over_budget:
+            chunks.append((start, index))
+            start = index
+            tokens = 0
+        tokens += text_tokens
+    if start < len(texts):
+        chunks.append((start, len(texts)))
+    return chunks
+
+
+async def embed_in_chunks(texts: Sequence[str], chunks: List[Tuple[int, int]],
+                          embed_chunk: Callable[[List[str]], Awaitable[List[Any]]],
+                          concurrency: int = 4, max_retries: int = 3,
+                          retry_backoff: float = 1.0) -> List[Any]:
+    """
+    Run embed_chunk on every chunk, at most `concurrency` at a time, and return
+    the vectors in the order of texts. A failing chunk is retried with
+    exponential backoff; once it runs out of retries the error is raised and
+    the remaining chunks are cancelled.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results: List[Any] = [None] * len(texts)
+
+    async def run(start: int, end: int):
+        chunk = list(texts[start:end])
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                try:
+                    vectors = await embed_chunk(chunk)
+                    if len(vectors) != len(chunk):
+                        raise ValueError(f"Chunk of {len(chunk)} texts returned {len(vectors)} embeddings")
+                    break
+                except Exception as e:
+                    if attempt >= max_retries:
+                        raise
+                    delay = retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                    logger.warning(f"Embedding chunk {start}-{end} failed ({type(e).__name__}: {e}), "
+                                   f"retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        results[start:end] = vectors
+
+    tasks = [asyncio.ensure_future(run(start, end)) for start, end in chunks]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return results
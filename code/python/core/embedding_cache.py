@@ -0,0 +1,91 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Cache of query embeddings. With several retrieval endpoints enabled, and the
+fast-track and regular paths both retrieving, the same query is embedded many
+times per request; popular queries repeat across requests too. Vectors are kept
+in an in-memory LRU keyed by provider, model and normalized text, as float32.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core.vectors import Vector, as_vector, copy_vector, has_values
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("embedding_cache")
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC with runs of whitespace collapsed; case is kept, embeddings are case sensitive."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    LRU of embedding vectors bounded by max_entries. Entries expire ttl seconds
+    after they were stored; a ttl of 0 keeps them until they are evicted.
+    Callers get copies of the stored vectors so they can't modify a cached entry.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: int = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Vector]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str) -> Tuple[str, str, str]:
+        return (provider, model, normalize_text(text))
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Vector]:
+        """Return a copy of the cached vector, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] and entry[0] <= time.time():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return copy_vector(entry[1])
+
+    def set(self, key: Tuple[str, str, str], vector: Vector):
+        if not has_values(vector):
+            return
+        expires = time.time() + self.ttl if self.ttl > 0 else 0.0
+        vector = copy_vector(as_vector(vector))
+        with self._lock:
+            self._entries[key] = (expires, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            **stats,
+            "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
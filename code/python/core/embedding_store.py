@@ -0,0 +1,98 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Content-addressed store of document embeddings for the loaders and crawlers.
+Reloading a site mostly re-embeds documents whose trimmed schema JSON has not
+changed, so vectors are kept in a SQLite file keyed by a hash of the provider,
+model and exact text embedded. A reload only pays for documents that changed.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Tuple
+
+from core.vectors import Vector, from_bytes, to_bytes
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("embedding_store")
+
+# Keys per SELECT, below SQLite's limit on bound parameters
+_LOOKUP_CHUNK = 500
+
+
+class EmbeddingStore:
+    """
+    SQLite table of float32 vectors keyed by sha256(provider, model, text).
+    Entries never expire: the same text embedded by the same model always has
+    the same vector. Safe to share between threads; several processes can use
+    the same file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0}
+        logger.info(f"Embedding store opened at {path}")
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str) -> bytes:
+        return hashlib.sha256(f"{provider}\x00{model}\x00{text}".encode("utf-8")).digest()
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, Vector]:
+        """Vectors for the keys that are stored; missing keys are left out."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[bytes(key)] = from_bytes(blob)
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, Vector]]):
+        # Sparse embeddings (dicts) aren't stored
+        rows = [(key, to_bytes(vector)) for key, vector in items if not isinstance(vector, dict)]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._db.commit()
+            self._stats["stored"] += len(rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "path": self.path,
+            **stats,
+            "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
@@ -11,7 +11,8 @@ WARNING: This code is under development and may undergo changes in future releas
 Backwards compatibility is not guaranteed at this time.
 """
 
-from core.retriever import search
+from core.config import CONFIG
+from core.retriever import search, search_stream
 import core.ranking as ranking
 from misc.logger.logging_config_helper import get_configured_logger
 import asyncio
@@ -49,43 +50,23 @@ class FastTrack:
         
         self.handler.retrieval_done_event.set()  # Use event instead of flag
         
+        if CONFIG.retrieval_streaming.enabled:
+            await self.do_streaming()
+            return
+        
         try:
             logger.debug(f"Retrieving items for query: {self.handler.query}")
             items = await search(
                 self.handler.query, 
                 self.handler.site,
                 query_params=self.handler.query_params,
-                handler=self.handler
+                handler=self.handler,
+                prune=True
             )
             self.handler.final_retrieved_items = items
             logger.info(f"Fast track retrieved {len(items)} items")
             
-            # Wait for decontextualization to complete with timeout
-            decon_done = False
-            try:
-                decon_done = await asyncio.wait_for(
-                    self.handler.state.wait_for_decontextualization(),
-                    timeout=5.0  # 5 second timeout
-                )
-            except asyncio.TimeoutError:
-                logger.warning("Decontextualization timed out in fast track")
-                return
-            
-            if decon_done:
-                logger.debug("Decontextualization is done")
-                
-                # Check all abort conditions using centralized method
-                if self.handler.state.abort_fast_track_if_needed():
-                    logger.info("Fast track aborted: abort conditions met")
-                    return
-                elif (not self.handler.query_done and not self.handler.abort_fast_track_event.is_set()):
-                    logger.info("Fast track proceeding: decontextualization not required")
-                    self.handler.fastTrackRanker = ranking.Ranking(self.handler, items, ranking.Ranking.FAST_TRACK)
-                    await self.handler.fastTrackRanker.do()
-                    logger.info("Fast track ranking completed")
-                    return  
-            elif (not self.handler.query_done and not self.handler.abort_fast_track_event.is_set()):
-                logger.info("Fast track proceeding: decontextualization call pending, query not done")
+            if await self.ready_to_rank():
                 self.handler.fastTrackRanker = ranking.Ranking(self.handler, items, ranking.Ranking.FAST_TRACK)
                 await self.handler.fastTrackRanker.do()
                 logger.info("Fast track ranking completed")
@@ -96,4 +77,67 @@ class FastTrack:
             logger.debug("Fast track error details:", exc_info=True)
             raise
         
-        logger.info("Fast track processing completed")
\ No newline at end of file
+        logger.info("Fast track processing completed")
+
+    async def do_streaming(self):
+        """
+        Fast track with streaming retrieval: endpoints are searched while the
+        checks run, and ranking starts with the first endpoint to answer
+        instead of waiting for the slowest one.
+        """
+        try:
+            logger.debug(f"Streaming retrieval for query: {self.handler.query}")
+            stream = await search_stream(
+                self.handler.query,
+                self.handler.site,
+                query_params=self.handler.query_params,
+                handler=self.handler,
+                prune=True
+            )
+            # Later stages see the items as they arrive
+            self.handler.final_retrieved_items = stream.items
+            try:
+                if await self.ready_to_rank():
+                    self.handler.fastTrackRanker = ranking.Ranking(self.handler, [], ranking.Ranking.FAST_TRACK)
+                    await self.handler.fastTrackRanker.doStream(stream)
+                    logger.info("Fast track streaming ranking completed")
+            finally:
+                # If fast track stopped early, the regular path still needs every item
+                await stream.collect()
+            logger.info(f"Fast track retrieved {len(stream.items)} items")
+        
+        except Exception as e:
+            logger.error(f"Error during fast track processing: {str(e)}")
+            logger.debug("Fast track error details:", exc_info=True)
+            raise
+
+    async def ready_to_rank(self):
+        """
+        Wait for decontextualization and check that fast track may rank: the
+        query must not need decontextualization and nothing may have aborted it.
+        """
+        # Wait for decontextualization to complete with timeout
+        decon_done = False
+        try:
+            decon_done = await asyncio.wait_for(
+                self.handler.state.wait_for_decontextualization(),
+                timeout=5.0  # 5 second timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Decontextualization timed out in fast track")
+            return False
+        
+        if decon_done:
+            logger.debug("Decontextualization is done")
+            
+            # Check all abort conditions using centralized method
+            if self.handler.state.abort_fast_track_if_needed():
+                logger.info("Fast track aborted: abort conditions met")
+                return False
+            elif (not self.handler.query_done and not self.handler.abort_fast_track_event.is_set()):
+                logger.info("Fast track proceeding: decontextualization not required")
+                return True
+        elif (not self.handler.query_done and not self.handler.abort_fast_track_event.is_set()):
+            logger.info("Fast track proceeding: decontextualization call pending, query not done")
+            return True
+        return False
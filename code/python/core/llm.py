@@ -9,9 +9,15 @@ Backwards compatibility is not guaranteed at this time.
 
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
 from core.config import CONFIG
+from core.llm_cache import LLMResponseCache
+from core.llm_hedging import EndpointHedger
+from core.llm_limiter import AdaptiveLimiter, is_throttling_error, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from core.utils.singleflight import SingleFlight
+from core.utils.json_stream import IncrementalJSONParser
 import asyncio
+import copy
 import threading
 import subprocess
 import sys
@@ -23,6 +29,96 @@ logger = get_configured_logger("llm_wrapper")
 # Cache for loaded providers
 _loaded_providers = {}
 
+# Identical concurrent requests share one upstream call
+_inflight_calls = SingleFlight()
+
+# Shared response cache, created lazily from CONFIG.llm_cache
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def _get_response_cache() -> Optional[LLMResponseCache]:
+    """Return the shared response cache, or None if caching is disabled."""
+    global _response_cache
+    cache_config = getattr(CONFIG, "llm_cache", None)
+    if not cache_config or not cache_config.enabled:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = LLMResponseCache(
+                max_entries=cache_config.max_entries,
+                default_ttl=cache_config.default_ttl,
+                prompt_ttls=cache_config.prompt_ttls,
+                disk_path=cache_config.disk_path
+            )
+    return _response_cache
+
+# Adaptive concurrency limiters, one per (endpoint, model)
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+def _get_limiter(provider_name: str, model_id: str) -> Optional[AdaptiveLimiter]:
+    """Return the concurrency limiter for an endpoint and model, or None if limiting is disabled."""
+    concurrency_config = getattr(CONFIG, "llm_concurrency", None)
+    if not concurrency_config or not concurrency_config.enabled:
+        return None
+    name = f"{provider_name}/{model_id}"
+    if name not in _limiters:
+        _limiters[name] = AdaptiveLimiter(
+            name,
+            initial_limit=concurrency_config.initial_limit,
+            min_limit=concurrency_config.min_limit,
+            max_limit=concurrency_config.max_limit,
+            decrease_factor=concurrency_config.decrease_factor,
+            cooldown=concurrency_config.cooldown
+        )
+    return _limiters[name]
+
+# Hedging across endpoints, created lazily from CONFIG.llm_hedging
+_hedger = None
+
+def _get_hedger() -> Optional[EndpointHedger]:
+    """Return the shared endpoint hedger, or None if hedging is disabled."""
+    global _hedger
+    hedging_config = getattr(CONFIG, "llm_hedging", None)
+    if not hedging_config or not hedging_config.enabled:
+        return None
+    if _hedger is None:
+        secondaries = []
+        for name in hedging_config.secondary_endpoints:
+            endpoint_config = CONFIG.llm_endpoints.get(name)
+            if endpoint_config and endpoint_config.models:
+                secondaries.append(name)
+            else:
+                logger.warning(f"Ignoring hedging endpoint '{name}': not configured")
+        _hedger = EndpointHedger(
+            secondaries,
+            percentile=hedging_config.percentile,
+            min_samples=hedging_config.min_samples,
+            default_delay=hedging_config.default_delay,
+            min_delay=hedging_config.min_delay,
+            breaker_window=hedging_config.breaker_window,
+            breaker_error_rate=hedging_config.breaker_error_rate,
+            breaker_min_calls=hedging_config.breaker_min_calls,
+            breaker_open_seconds=hedging_config.breaker_open_seconds
+        )
+    return _hedger
+
+def get_hedging_stats() -> Dict[str, Any]:
+    """Return hedge counts, observed latencies and circuit states per endpoint."""
+    hedger = _get_hedger()
+    return {"enabled": False} if hedger is None else {"enabled": True, **hedger.get_stats()}
+
+def get_concurrency_stats() -> Dict[str, Any]:
+    """Return limit, in-flight count, queue depth and wait times per endpoint and model."""
+    return {name: limiter.get_stats() for name, limiter in _limiters.items()}
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters of the response cache, per prompt name."""
+    cache = _get_response_cache()
+    stats = {"enabled": False} if cache is None else {"enabled": True, **cache.get_stats()}
+    stats["in_flight"] = _inflight_calls.in_flight()
+    stats["coalesced"] = _inflight_calls.coalesced
+    return stats
+
 def init():
     """Initialize LLM providers based on configuration."""
     # Get all configured LLM endpoints
@@ -146,6 +242,9 @@ def _get_provider(llm_type: str):
         elif llm_type == "ollama":
             from llm_providers.ollama import provider as ollama_provider
             _loaded_providers[llm_type] = ollama_provider
+        elif llm_type == "mock":
+            from llm_providers.mock import provider as mock_provider
+            _loaded_providers[llm_type] = mock_provider
         else:
             raise ValueError(f"Unknown LLM type: {llm_type}")
             
@@ -154,33 +253,12 @@ def _get_provider(llm_type: str):
         logger.error(f"Failed to import provider for {llm_type}: {e}")
         raise ValueError(f"Failed to load provider for {llm_type}: {e}")
 
-async def ask_llm(
-    prompt: str,
-    schema: Dict[str, Any],
-    provider: Optional[str] = None,
-    level: str = "low",
-    timeout: int = 8,
-    query_params: Optional[Dict[str, Any]] = None,
-    max_length: int = 512
-) -> Dict[str, Any]:
+def _resolve_endpoint(provider: Optional[str], level: str,
+                      query_params: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str, str, str]]:
     """
-    Route an LLM request to the specified endpoint, with dispatch based on llm_type.
-    
-    Args:
-        prompt: The text prompt to send to the LLM
-        schema: JSON schema that the response should conform to
-        provider: The LLM endpoint to use (if None, use preferred endpoint from config)
-        level: The model tier to use ('low' or 'high')
-        timeout: Request timeout in seconds
-        query_params: Optional query parameters for development mode provider override
-        max_length: Maximum length of the response in tokens (default: 512)
-        
-    Returns:
-        Parsed JSON response from the LLM
-        
-    Raises:
-        ValueError: If the endpoint is unknown or response cannot be parsed
-        TimeoutError: If the request times out
+    Pick the endpoint, llm_type, level and model for a request, honouring the
+    development mode overrides in query_params. Returns None if the endpoint
+    is unknown or has no models configured.
     """
     # Determine provider, with development mode override support
     provider_name = provider or CONFIG.preferred_llm_endpoint
@@ -199,20 +277,18 @@ async def ask_llm(
             level = override_level
             logger.debug(f"Development mode: LLM level overridden to {level}")
     logger.debug(f"Initiating LLM request with provider: {provider_name}, level: {level}")
-    logger.debug(f"Prompt preview: {prompt[:100]}...")
-    logger.debug(f"Schema: {schema}")
     
     if provider_name not in CONFIG.llm_endpoints:
         error_msg = f"Unknown provider '{provider_name}'"
         logger.error(error_msg)
-        return {}
+        return None
 
     # Get provider config using the helper method
     provider_config = CONFIG.get_llm_provider(provider_name)
     if not provider_config or not provider_config.models:
         error_msg = f"Missing model configuration for provider '{provider_name}'"
         logger.error(error_msg)
-        return {}
+        return None
 
     # Get llm_type for dispatch
     llm_type = provider_config.llm_type
@@ -220,29 +296,146 @@ async def ask_llm(
 
     model_id = getattr(provider_config.models, level)
     logger.debug(f"Using model: {model_id}")
+
+    return provider_name, llm_type, level, model_id
+
+def _prompt_kwargs(provider_instance, prompt: str, prompt_suffix: Optional[str]) -> Tuple[str, Dict[str, Any]]:
+    """
+    The prompt and extra arguments for a provider call. Providers that lay out
+    prompts for prefix caching get the suffix separately; others get one prompt.
+    """
+    if not prompt_suffix:
+        return prompt, {}
+    if getattr(provider_instance, "supports_prompt_suffix", False):
+        return prompt, {"prompt_suffix": prompt_suffix}
+    return prompt + prompt_suffix, {}
+
+async def _complete_on(provider_name: str, llm_type: str, model_id: str, prompt: str,
+                       schema: Dict[str, Any], timeout: int, max_length: int, priority: int,
+                       prompt_suffix: Optional[str] = None) -> Dict[str, Any]:
+    """Call one endpoint, holding a slot of its concurrency limiter for the duration of the call."""
+    # Providers handle thread-safety internally, no locking here
+    provider_instance = _get_provider(llm_type)
+    prompt, extra_kwargs = _prompt_kwargs(provider_instance, prompt, prompt_suffix)
+    limiter = _get_limiter(provider_name, model_id)
+    # Time spent queueing for a slot comes out of the caller's timeout
+    remaining = timeout
+    if limiter is not None:
+        waited = await asyncio.wait_for(limiter.acquire(priority), timeout=timeout)
+        if waited > 0:
+            logger.debug(f"Waited {waited:.3f}s for a {provider_name}/{model_id} slot")
+        remaining = timeout - waited
+        if remaining <= 0:
+            limiter.release("cancelled")
+            raise asyncio.TimeoutError()
+    logger.debug(f"Calling {llm_type} provider completion for endpoint {provider_name} with max_tokens={max_length}")
+    try:
+        result = await asyncio.wait_for(
+            provider_instance.get_completion(prompt, schema, model=model_id, timeout=remaining,
+                                             max_tokens=max_length, **extra_kwargs),
+            timeout=remaining
+        )
+    except asyncio.CancelledError:
+        if limiter is not None:
+            limiter.release("cancelled")
+        raise
+    except Exception as e:
+        if limiter is not None:
+            limiter.release("throttled" if is_throttling_error(e) else "error")
+        raise
+    if limiter is not None:
+        limiter.release("success")
+    logger.debug(f"{provider_name} response received, size: {len(str(result))} chars")
+    return result
+
+async def ask_llm(
+    prompt: str,
+    schema: Dict[str, Any],
+    provider: Optional[str] = None,
+    level: str = "low",
+    timeout: int = 8,
+    query_params: Optional[Dict[str, Any]] = None,
+    max_length: int = 512,
+    prompt_name: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    prompt_suffix: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Route an LLM request to the specified endpoint, with dispatch based on llm_type.
+    
+    Args:
+        prompt: The text prompt to send to the LLM
+        schema: JSON schema that the response should conform to
+        provider: The LLM endpoint to use (if None, use preferred endpoint from config)
+        level: The model tier to use ('low' or 'high')
+        timeout: Request timeout in seconds
+        query_params: Optional query parameters for development mode provider override
+        max_length: Maximum length of the response in tokens (default: 512)
+        prompt_name: Optional name of the prompt, used for cache TTLs and statistics
+        priority: Queue lane when the endpoint is at its concurrency limit
+            (PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW)
+        prompt_suffix: Optional variable part of the prompt, sent after prompt.
+            prompt is then treated as a stable prefix that providers may cache
+            (see fill_prompt_parts)
+        
+    Returns:
+        Parsed JSON response from the LLM
+        
+    Raises:
+        ValueError: If the endpoint is unknown or response cannot be parsed
+        TimeoutError: If the request times out
+    """
+    endpoint = _resolve_endpoint(provider, level, query_params)
+    if endpoint is None:
+        return {}
+    provider_name, llm_type, level, model_id = endpoint
+    logger.debug(f"Prompt preview: {prompt[:100]}...")
+    logger.debug(f"Schema: {schema}")
+
+    cache = _get_response_cache()
+    cache_key = LLMResponseCache.make_key(provider_name, level, model_id, prompt + (prompt_suffix or ""), schema)
+    if cache is not None:
+        cached = await cache.get(cache_key, prompt_name)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for prompt {prompt_name or 'unnamed'}")
+            return cached
     
     # Initialize variables for exception handling
     llm_type_for_error = llm_type
 
     try:
 
-        # Get the provider instance based on llm_type
+        # Make sure the provider for llm_type can be loaded before going further
         try:
-            provider_instance = _get_provider(llm_type)
+            _get_provider(llm_type)
         except ValueError as e:
             error_msg = str(e)
             logger.error(error_msg)
             return {}
         
-        # Simply call the provider's get_completion method without locking
-        # Each provider should handle thread-safety internally
-        logger.debug(f"Calling {llm_type} provider completion for endpoint {provider_name} with max_tokens={max_length}")
-        result = await asyncio.wait_for(
-            provider_instance.get_completion(prompt, schema, model=model_id, timeout=timeout, max_tokens=max_length),
-            timeout=timeout
-        )
-        logger.debug(f"{provider_name} response received, size: {len(str(result))} chars")
-        return result
+        hedger = _get_hedger()
+
+        async def call_endpoint(name, call_timeout=timeout):
+            if name == provider_name:
+                return await _complete_on(name, llm_type, model_id, prompt, schema, call_timeout, max_length,
+                                          priority, prompt_suffix)
+            endpoint_config = CONFIG.get_llm_provider(name)
+            return await _complete_on(name, endpoint_config.llm_type, getattr(endpoint_config.models, level),
+                                      prompt, schema, call_timeout, max_length, priority, prompt_suffix)
+
+        async def complete():
+            if hedger is not None:
+                result = await hedger.run(provider_name, call_endpoint, lambda name: f"{name}/{level}", timeout)
+            else:
+                result = await call_endpoint(provider_name)
+            if cache is not None:
+                await cache.set(cache_key, result, prompt_name)
+            return result
+
+        # Concurrent callers with the same prompt wait for the call already in flight.
+        # Each caller gets its own copy since callers modify the returned dict.
+        result = await _inflight_calls.do((cache_key, max_length), complete)
+        return copy.deepcopy(result)
         
     except asyncio.TimeoutError:
         logger.error(f"LLM call timed out after {timeout}s with provider {provider_name}")
@@ -267,6 +460,114 @@ async def ask_llm(
         return {}
 
 
+async def ask_llm_stream(
+    prompt: str,
+    schema: Dict[str, Any],
+    provider: Optional[str] = None,
+    level: str = "low",
+    timeout: int = 8,
+    query_params: Optional[Dict[str, Any]] = None,
+    max_length: int = 512,
+    prompt_name: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    prompt_suffix: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of ask_llm. Yields the top-level fields parsed so far each
+    time a new field is complete, then the full parsed response as the last item.
+
+    The caller may stop iterating (and should then aclose() the iterator) as soon
+    as it has what it needs; this cancels the rest of the generation. Only complete
+    responses are cached. Streamed calls are not coalesced with other callers.
+
+    Args:
+        Same as ask_llm
+
+    Yields:
+        Dicts of the fields received so far, ending with the complete response
+        ({} or the fields received before a failure if the call fails)
+    """
+    endpoint = _resolve_endpoint(provider, level, query_params)
+    if endpoint is None:
+        yield {}
+        return
+    provider_name, llm_type, level, model_id = endpoint
+
+    cache = _get_response_cache()
+    cache_key = LLMResponseCache.make_key(provider_name, level, model_id, prompt + (prompt_suffix or ""), schema)
+    if cache is not None:
+        cached = await cache.get(cache_key, prompt_name)
+        if cached is not None:
+            logger.debug(f"LLM cache hit for prompt {prompt_name or 'unnamed'}")
+            yield cached
+            return
+
+    try:
+        provider_instance = _get_provider(llm_type)
+    except ValueError as e:
+        logger.error(str(e))
+        yield {}
+        return
+    prompt, extra_kwargs = _prompt_kwargs(provider_instance, prompt, prompt_suffix)
+
+    limiter = _get_limiter(provider_name, model_id)
+    parser = IncrementalJSONParser()
+    chunks = []
+    acquired = False
+    outcome = "cancelled"
+    stream = None
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        if limiter is not None:
+            await asyncio.wait_for(limiter.acquire(priority), timeout=timeout)
+            acquired = True
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        logger.debug(f"Streaming {llm_type} completion for endpoint {provider_name} with max_tokens={max_length}")
+        stream = provider_instance.get_completion_stream(prompt, schema, model=model_id, timeout=remaining,
+                                                         max_tokens=max_length, **extra_kwargs)
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+                chunks.append(chunk)
+                if parser.feed(chunk):
+                    yield dict(parser.fields)
+        finally:
+            await stream.aclose()
+        outcome = "success"
+    except asyncio.TimeoutError:
+        # Running out of time in the queue says nothing about the endpoint itself
+        outcome = "throttled" if stream is not None else "cancelled"
+        logger.error(f"LLM stream timed out after {timeout}s with provider {provider_name}")
+    except Exception as e:
+        outcome = "throttled" if is_throttling_error(e) else "error"
+        logger.error(f"Error with provider {provider_name}: LLM stream failed: {type(e).__name__}: {str(e)}")
+    finally:
+        if acquired:
+            limiter.release(outcome)
+
+    if outcome != "success":
+        yield dict(parser.fields)
+        return
+
+    try:
+        result = provider_instance.clean_response("".join(chunks))
+    except Exception as e:
+        logger.error(f"Failed to parse streamed response from {provider_name}: {e}")
+        result = dict(parser.fields)
+    if cache is not None and result:
+        await cache.set(cache_key, result, prompt_name)
+    yield result
+
+
 def get_available_providers() -> list:
     """
     Get a list of LLM providers that have their required API keys available.
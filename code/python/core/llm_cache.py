@@ -0,0 +1,195 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Response cache for ask_llm. Filled prompts repeat a lot (pre-checks, ranking of
+popular items, tool evaluations), so completions are cached in an in-memory LRU
+with per-prompt TTLs and, optionally, in a SQLite file that survives restarts.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("llm_cache")
+
+UNNAMED_PROMPT = "unnamed"
+
+# Expired disk entries are deleted at most this often, in seconds
+DISK_PURGE_INTERVAL = 300
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of parsed LLM responses.
+
+    The memory tier is an LRU bounded by max_entries. The disk tier is a SQLite
+    table and is only used when a disk_path is configured. Entries expire after
+    the TTL configured for their prompt name; a TTL of 0 disables caching for
+    that prompt. Prompts without a TTL of their own, unnamed ones included, use
+    default_ttl, so with the default of 0 only prompts that opt in are cached.
+    """
+
+    def __init__(self, max_entries: int = 10000, default_ttl: int = 0,
+                 prompt_ttls: Optional[Dict[str, int]] = None, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.prompt_ttls = prompt_ttls or {}
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        self._last_purge = 0.0
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, disk_path: str):
+        try:
+            directory = os.path.dirname(disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, prompt_name TEXT, expires REAL, value TEXT)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires ON llm_cache (expires)")
+            self._disk.commit()
+            logger.info(f"LLM response cache disk tier opened at {disk_path}")
+        except Exception as e:
+            logger.warning(f"Failed to open LLM cache disk tier at {disk_path}: {e}")
+            self._disk = None
+
+    @staticmethod
+    def make_key(endpoint: str, level: str, model: str, prompt: str, schema: Any) -> str:
+        """Build the cache key from the endpoint, model level, prompt hash and schema hash."""
+        schema_str = json.dumps(schema, sort_keys=True, default=str)
+        return _hash(f"{endpoint}|{level}|{model}|{_hash(prompt)}|{_hash(schema_str)}")
+
+    def ttl_for(self, prompt_name: Optional[str]) -> int:
+        return self.prompt_ttls.get(prompt_name or UNNAMED_PROMPT, self.default_ttl)
+
+    def _count(self, prompt_name: Optional[str], field: str):
+        with self._lock:
+            stats = self._stats.setdefault(prompt_name or UNNAMED_PROMPT,
+                                           {"hits": 0, "disk_hits": 0, "misses": 0})
+            stats[field] += 1
+
+    async def get(self, key: str, prompt_name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response, or None on a miss."""
+        if self.ttl_for(prompt_name) <= 0:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    entry = None
+        if entry is not None:
+            self._count(prompt_name, "hits")
+            return copy.deepcopy(value)
+
+        if self._disk is not None:
+            try:
+                row = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache disk tier read failed: {e}")
+                row = None
+            if row is not None and row[0] > now:
+                value = json.loads(row[1])
+                self._store_memory(key, row[0], value)
+                self._count(prompt_name, "disk_hits")
+                return copy.deepcopy(value)
+
+        self._count(prompt_name, "misses")
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any], prompt_name: Optional[str] = None):
+        """Store a response. Empty responses (timeouts, failures) are never cached."""
+        ttl = self.ttl_for(prompt_name)
+        if ttl <= 0 or not value:
+            return
+        expires = time.time() + ttl
+        value = copy.deepcopy(value)
+        self._store_memory(key, expires, value)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk_set, key, prompt_name, expires, json.dumps(value))
+            except (TypeError, ValueError) as e:
+                logger.debug(f"Response not serializable for disk cache: {e}")
+            except sqlite3.Error as e:
+                # A locked or read-only file must not fail a request that already has its answer
+                logger.warning(f"LLM cache disk tier write failed: {e}")
+
+    def _store_memory(self, key: str, expires: float, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str):
+        with self._disk_lock:
+            return self._disk.execute(
+                "SELECT expires, value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _disk_set(self, key: str, prompt_name: Optional[str], expires: float, value: str):
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, prompt_name, expires, value) VALUES (?, ?, ?, ?)",
+                (key, prompt_name or UNNAMED_PROMPT, expires, value)
+            )
+            now = time.time()
+            if now - self._last_purge >= DISK_PURGE_INTERVAL:
+                self._last_purge = now
+                self._disk.execute("DELETE FROM llm_cache WHERE expires < ?", (now,))
+            self._disk.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM llm_cache")
+                self._disk.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per prompt name plus overall totals."""
+        with self._lock:
+            per_prompt = {name: dict(stats) for name, stats in self._stats.items()}
+            size = len(self._entries)
+        totals = {"hits": 0, "disk_hits": 0, "misses": 0}
+        for stats in per_prompt.values():
+            for field in totals:
+                totals[field] += stats[field]
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "disk_enabled": self._disk is not None,
+            "totals": totals,
+            "prompts": per_prompt,
+        }
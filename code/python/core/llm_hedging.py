@@ -0,0 +1,276 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Latency tracking, circuit breaking and hedging across LLM endpoints. When a
+call has not returned by the endpoint's observed p90 latency, the same prompt
+is sent to a secondary endpoint and the first valid answer wins. Endpoints
+whose recent error rate is too high are skipped until they recover.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("llm_hedging")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful calls, for percentile estimates."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Opens when the error rate over the last `window` calls reaches error_rate
+    (once at least min_calls have been seen). After open_seconds a single trial
+    call is let through; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, name: str, window: int = 50, error_rate: float = 0.5,
+                 min_calls: int = 10, open_seconds: float = 30.0):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+
+    def available(self) -> bool:
+        """True if a call may be sent: the circuit is closed or a trial call is due."""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self._trial_in_flight = False
+        return self.state == CLOSED or (self.state == HALF_OPEN and not self._trial_in_flight)
+
+    def claim(self) -> bool:
+        """
+        Reserve the right to send a call. In the half-open state this makes the
+        caller the single trial call, so check and reservation happen together.
+        """
+        if not self.available():
+            return False
+        if self.state == HALF_OPEN:
+            self._trial_in_flight = True
+        return True
+
+    def abandon_call(self):
+        """The call was cancelled before it had an outcome."""
+        if self.state == HALF_OPEN:
+            self._trial_in_flight = False
+
+    def record(self, success: bool):
+        if self.state == HALF_OPEN:
+            if success:
+                logger.info(f"Circuit for LLM endpoint {self.name} closed")
+                self.state = CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.error_rate):
+            self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self.times_opened += 1
+        logger.warning(f"Circuit for LLM endpoint {self.name} opened, routing to other endpoints")
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = len(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": total,
+            "recent_error_rate": round(self._outcomes.count(False) / total, 3) if total else 0.0,
+            "times_opened": self.times_opened,
+        }
+
+
+class EndpointHedger:
+    """
+    Chooses which endpoints to call for a request and races them. Latency is
+    tracked per endpoint and model, health per endpoint.
+    """
+
+    def __init__(self, secondary_endpoints: List[str], percentile: float = 0.9,
+                 min_samples: int = 20, default_delay: float = 2.0, min_delay: float = 0.2,
+                 breaker_window: int = 50, breaker_error_rate: float = 0.5,
+                 breaker_min_calls: int = 10, breaker_open_seconds: float = 30.0):
+        self.secondary_endpoints = list(secondary_endpoints)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self._breaker_args = dict(window=breaker_window, error_rate=breaker_error_rate,
+                                  min_calls=breaker_min_calls, open_seconds=breaker_open_seconds)
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats = {"hedged": 0, "hedge_wins": 0, "rerouted": 0}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self._breakers:
+            self._breakers[endpoint] = CircuitBreaker(endpoint, **self._breaker_args)
+        return self._breakers[endpoint]
+
+    def latency(self, key: str) -> LatencyTracker:
+        if key not in self._latency:
+            self._latency[key] = LatencyTracker()
+        return self._latency[key]
+
+    def hedge_delay(self, latency_key: str, timeout: float) -> float:
+        """Seconds to wait for an endpoint before hedging: its observed percentile latency."""
+        tracker = self.latency(latency_key)
+        delay = self.default_delay
+        if len(tracker) >= self.min_samples:
+            delay = tracker.percentile(self.percentile)
+        return min(max(delay, self.min_delay), timeout)
+
+    def candidates(self, primary: str) -> List[str]:
+        """The primary followed by the secondaries, skipping endpoints whose circuit is open."""
+        ordered = [primary] + [name for name in self.secondary_endpoints if name != primary]
+        allowed = [name for name in ordered if self.breaker(name).available()]
+        if not allowed:
+            # Everything is failing, keep trying the primary rather than giving up
+            return [primary]
+        if allowed[0] != primary:
+            self._stats["rerouted"] += 1
+        return allowed
+
+    async def _attempt(self, endpoint: str, call: Callable[[str, float], Awaitable[Dict[str, Any]]],
+                       latency_key: str, timeout: float) -> Dict[str, Any]:
+        breaker = self.breaker(endpoint)
+        start = time.monotonic()
+        try:
+            result = await call(endpoint, timeout)
+        except asyncio.CancelledError:
+            breaker.abandon_call()
+            raise
+        except Exception:
+            breaker.record(False)
+            raise
+        # Providers answer {} on their own timeouts and unusable output
+        breaker.record(bool(result))
+        if result:
+            self.latency(latency_key).record(time.monotonic() - start)
+        return result
+
+    async def run(self, primary: str, call: Callable[[str, float], Awaitable[Dict[str, Any]]],
+                  latency_key: Callable[[str], str], timeout: float) -> Dict[str, Any]:
+        """
+        Call the first candidate endpoint. If it has not answered within its
+        hedge delay, or fails or answers with nothing, call the next candidate
+        as well. Returns the first non-empty answer; the other calls are cancelled.
+
+        All calls share one deadline, timeout seconds from now: each is called
+        as call(endpoint, seconds_left), and asyncio.TimeoutError is raised if
+        nothing has answered by the deadline.
+        """
+        deadline = time.monotonic() + timeout
+        backups = self.candidates(primary)
+        first = backups[0]
+        # Nothing is available, keep trying the primary rather than giving up
+        forced = len(backups) == 1 and not self.breaker(first).available()
+        tasks = {}
+
+        def launch() -> Optional[float]:
+            """Start the next candidate that may still be called, returning its hedge delay."""
+            while backups:
+                name = backups.pop(0)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                # The circuit may have opened, or another request taken its trial, since candidates()
+                if not self.breaker(name).claim() and not forced:
+                    continue
+                key = latency_key(name)
+                tasks[asyncio.ensure_future(self._attempt(name, call, key, remaining))] = name
+                return self.hedge_delay(key, remaining)
+            return None
+
+        delay = launch()
+        last_error = None
+        try:
+            while tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                wait = min(delay, remaining) if backups and delay is not None else remaining
+                done, _ = await asyncio.wait(list(tasks), timeout=wait,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if backups and time.monotonic() < deadline:
+                        logger.debug(f"No answer from {', '.join(tasks.values())} after {wait:.2f}s, hedging to {backups[0]}")
+                        self._stats["hedged"] += 1
+                        delay = launch()
+                    continue
+                for task in done:
+                    name = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.warning(f"LLM endpoint {name} failed: {type(e).__name__}: {e}")
+                        last_error = e
+                        result = None
+                    if result:
+                        if name != first:
+                            self._stats["hedge_wins"] += 1
+                        return result
+                if backups:
+                    # A failed call is not worth waiting on, fall back right away
+                    delay = launch()
+            if last_error is not None:
+                raise last_error
+            return {}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        latency = {}
+        for key, tracker in self._latency.items():
+            p50 = tracker.percentile(0.5)
+            p90 = tracker.percentile(0.9)
+            latency[key] = {
+                "samples": len(tracker),
+                "p50_seconds": round(p50, 3) if p50 is not None else None,
+                "p90_seconds": round(p90, 3) if p90 is not None else None,
+            }
+        return {
+            **self._stats,
+            "secondary_endpoints": self.secondary_endpoints,
+            "latency": latency,
+            "circuits": {name: breaker.get_stats() for name, breaker in self._breakers.items()},
+        }
@@ -0,0 +1,154 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Adaptive concurrency limiting for LLM calls. One limiter is kept per endpoint
+and model; it grows its limit while calls succeed and halves it when the
+provider throttles or times out (AIMD). Callers queue in priority lanes so
+pre-checks and early ranking are served before low-value work.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Dict
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("llm_limiter")
+
+# Priority lanes, lower values are served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+_LANE_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """
+    True for rate-limit (HTTP 429) errors from any provider SDK and for calls
+    that ran past their deadline. Other errors, including a provider's own
+    timeout exceptions for a single slow prompt, don't say the endpoint is
+    overloaded and leave the limit alone.
+    """
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    for attribute in ("status_code", "status", "code"):
+        if getattr(error, attribute, None) == 429:
+            return True
+    # openai.RateLimitError, anthropic.RateLimitError and the like
+    return "ratelimit" in type(error).__name__.lower()
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter with priority lanes.
+
+    The limit grows by one for every `limit` successful calls (roughly one per
+    round of calls) and is multiplied by decrease_factor on throttling, at most
+    once per cooldown period so that a burst of failures from one overloaded
+    moment only counts once.
+    """
+
+    def __init__(self, name: str, initial_limit: int = 32, min_limit: int = 4, max_limit: int = 256,
+                 decrease_factor: float = 0.5, cooldown: float = 1.0):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._waiters = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        self._stats = {"acquired": 0, "queued": 0, "successes": 0, "throttled": 0, "errors": 0,
+                       "total_wait": 0.0, "max_wait": 0.0}
+        self._lane_depth = {lane: 0 for lane in _LANE_NAMES}
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> float:
+        """Wait for a slot. Returns the time spent waiting in seconds."""
+        start = time.monotonic()
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self._stats["acquired"] += 1
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        self._lane_depth[priority] = self._lane_depth.get(priority, 0) + 1
+        self._stats["queued"] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as we were cancelled, hand it on
+                self.in_flight -= 1
+                self._wake_waiters()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._lane_depth[priority] -= 1
+            raise
+
+        waited = time.monotonic() - start
+        self._stats["acquired"] += 1
+        self._stats["total_wait"] += waited
+        self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+        return waited
+
+    def release(self, outcome: str = "success"):
+        """
+        Free a slot and adjust the limit based on the outcome of the call:
+        "success", "throttled", "error" or "cancelled".
+        """
+        self.in_flight -= 1
+        if outcome == "throttled":
+            self._stats["throttled"] += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                old_limit = self.limit
+                self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+                logger.info(f"LLM limiter {self.name}: throttled, limit {old_limit:.1f} -> {self.limit:.1f}")
+        elif outcome == "success":
+            self._stats["successes"] += 1
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        elif outcome == "error":
+            self._stats["errors"] += 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        while self._waiters and self._has_capacity():
+            priority, _, future = heapq.heappop(self._waiters)
+            self._lane_depth[priority] -= 1
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        acquired_after_wait = self._stats["queued"] or 1
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "queue_depth_by_lane": {_LANE_NAMES.get(lane, str(lane)): depth
+                                    for lane, depth in self._lane_depth.items()},
+            "acquired": self._stats["acquired"],
+            "queued": self._stats["queued"],
+            "successes": self._stats["successes"],
+            "throttled": self._stats["throttled"],
+            "errors": self._stats["errors"],
+            "avg_wait_seconds": round(self._stats["total_wait"] / acquired_after_wait, 4),
+            "max_wait_seconds": round(self._stats["max_wait"], 4),
+        }
@@ -5,6 +5,14 @@
 This file is used to get the right prompt for a given type, site and prompt-name.
 Also deals with filling in the prompt and running prompts.
 
+The prompt files are compiled once into a registry indexed by (site, item type,
+prompt name). Each template is split into literal and variable segments when it
+is first used, so filling it is a single join.
+
+A prompt can declare suffixVariables (comma separated) in the prompt file. It is
+then filled as a stable prefix, which ends just before the first of those
+variables, and a variable suffix, so providers can cache the prefix across calls.
+
 WARNING: This code is under development and may undergo changes in future releases.
 Backwards compatibility is not guaranteed at this time.
 """
@@ -12,8 +20,10 @@ Backwards compatibility is not guaranteed at this time.
 from xml.etree import ElementTree as ET
 import json 
 import os  # Add this import
+import weakref
+from functools import lru_cache
 from misc.logger.logging_config_helper import get_configured_logger
-from core.llm import ask_llm
+from core.llm import ask_llm, PRIORITY_HIGH
 from core.config import CONFIG
 
 logger = get_configured_logger("prompts")
@@ -21,13 +31,133 @@ prompt_runner_logger = get_configured_logger("prompt_runner")
 
 
 BASE_NS = "http://nlweb.ai/base"
+ITEM_TAG = "{" + BASE_NS + "}Item"
+SITE_TAG = "{" + BASE_NS + "}Site"
+PROMPT_TAG = "{" + BASE_NS + "}Prompt"
+PROMPT_STRING_TAG = "{" + BASE_NS + "}promptString"
+RETURN_STRUC_TAG = "{" + BASE_NS + "}returnStruc"
 
 # This file deals with getting the right prompt for a given
 # type, site and prompt-name. 
 # Also deals with filling in the prompt.
-# #Yet to do the subclass check.
+
+
+class CompiledPrompt:
+    """A prompt from the prompt files with its parsed return structure."""
+
+    __slots__ = ("name", "text", "return_struc", "suffix_variables")
+
+    def __init__(self, name, text, return_struc, suffix_variables=()):
+        self.name = name
+        self.text = text
+        self.return_struc = return_struc
+        self.suffix_variables = suffix_variables
+
+
+def _parse_suffix_variables(value):
+    if not value:
+        return ()
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+# Template text -> variables that start its variable suffix
+_prompt_layouts = {}
+
+def register_prompt_layout(prompt_str, suffix_variables):
+    """
+    Send prompt_str as a stable prefix and a variable suffix starting at the
+    first of suffix_variables. Used for prompts kept outside the prompt files.
+    """
+    if prompt_str and suffix_variables:
+        _prompt_layouts[prompt_str] = tuple(suffix_variables)
+
+
+def _parse_return_struc(prompt_element):
+    return_struc_element = prompt_element.find(RETURN_STRUC_TAG)
+    if return_struc_element is None or not return_struc_element.text:
+        return None
+    return_struc_text = return_struc_element.text.strip()
+    if return_struc_text == "":
+        return None
+    try:
+        return json.loads(return_struc_text)
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse return structure JSON: {e}")
+        return None
+
+
+def type_chain(item_type):
+    """
+    The item type followed by the types it inherits prompts from, most specific
+    first. Every type inherits from Item.
+    """
+    if item_type == ITEM_TAG:
+        return (ITEM_TAG,)
+    return (item_type, ITEM_TAG)
+
+
+class PromptRegistry:
+    """
+    Prompts indexed by (site, item type, prompt name). Prompts outside a Site
+    element are stored with site None and apply to every site. When the same
+    key appears more than once, the last definition wins.
+    """
+
+    def __init__(self):
+        self._prompts = {}
+        self._lookups = {}
+        self.loaded = False
+
+    def add_root(self, root):
+        for element in root:
+            if element.tag == SITE_TAG:
+                for type_element in element:
+                    self._add_type(element.get("ref"), type_element)
+            else:
+                self._add_type(None, element)
+        self._lookups.clear()
+        self.loaded = True
+
+    def _add_type(self, site, type_element):
+        for prompt_element in type_element.findall(PROMPT_TAG):
+            name = prompt_element.get("ref")
+            string_element = prompt_element.find(PROMPT_STRING_TAG)
+            text = string_element.text if string_element is not None else None
+            suffix_variables = _parse_suffix_variables(prompt_element.get("suffixVariables"))
+            self._prompts[(site, type_element.tag, name)] = CompiledPrompt(
+                name, text, _parse_return_struc(prompt_element), suffix_variables)
+            register_prompt_layout(text, suffix_variables)
+
+    def lookup(self, site, item_type, prompt_name):
+        """
+        Find the prompt for a site and item type: site-specific prompts first,
+        then shared ones, each time trying the item type before the types it
+        inherits from. Returns None if there is no such prompt.
+        """
+        key = (site, item_type, prompt_name)
+        if key in self._lookups:
+            return self._lookups[key]
+        found = None
+        sites = (site, None) if site is not None else (None,)
+        for candidate_site in sites:
+            for candidate_type in type_chain(item_type):
+                found = self._prompts.get((candidate_site, candidate_type, prompt_name))
+                if found is not None:
+                    break
+            if found is not None:
+                break
+        if found is None:
+            logger.warning(f"Prompt '{prompt_name}' not found for site='{site}', item_type='{item_type}'")
+        self._lookups[key] = found
+        return found
+
+    def __len__(self):
+        return len(self._prompts)
+
 
 prompt_roots = []
+_registry = PromptRegistry()
+
 def init_prompts(files=["prompts.xml"]):
     global prompt_roots
     logger.info(f"Initializing prompts from files: {files}")
@@ -37,19 +167,22 @@ def init_prompts(files=["prompts.xml"]):
         file_path = os.path.join(CONFIG.config_directory, file)
         try:
             logger.debug(f"Loading prompt file: {file_path}")
-            prompt_roots.append(ET.parse(file_path).getroot())
+            root = ET.parse(file_path).getroot()
+            prompt_roots.append(root)
+            _registry.add_root(root)
             logger.debug(f"Successfully loaded prompt file: {file}")
         except Exception as e:
             logger.error(f"Failed to load prompt file '{file}': {str(e)}")
             raise
+    logger.info(f"Compiled {len(_registry)} prompts")
 
 
 def super_class_of(child_class, parent_class):
     if parent_class == child_class:
         logger.debug(f"Class match: {child_class} == {parent_class}")
         return True
-    if parent_class == "{" + BASE_NS + "}Item" :
-        logger.debug(f"Universal parent class matched: {parent_class}")
+    if parent_class in type_chain(child_class):
+        logger.debug(f"Parent class matched: {parent_class}")
         return True
     logger.debug(f"No class relationship: {child_class} is not a subclass of {parent_class}")
     return False
@@ -91,166 +224,188 @@ def extract_variables_from_prompt(prompt):
     logger.debug(f"Extracted variables: {variables}")
     return variables
 
+
+def _request_site(handler):
+    site = handler.site
+    return site if isinstance(site, list) else ""
+
+def _request_query(handler):
+    if (handler.state.is_decontextualization_done()):
+        return handler.decontextualized_query
+    elif (len(handler.prev_queries) > 0):
+        return handler.query + " previous queries: " + str(handler.prev_queries)
+    return handler.query
+
+def _request_prev_answers(handler):
+    # The attribute on the handler is named 'last_answers'
+    last_answers = getattr(handler, 'last_answers', [])
+    return str(last_answers) if last_answers else ""
+
+_VARIABLE_RESOLVERS = {
+    "request.site": _request_site,
+    "site.itemType": lambda handler: handler.item_type.split("}")[1],
+    "request.query": _request_query,
+    "request.previousQueries": lambda handler: str(handler.prev_queries),
+    "request.contextUrl": lambda handler: handler.context_url,
+    "request.itemType": lambda handler: handler.item_type,
+    "request.contextDescription": lambda handler: handler.context_description,
+    "request.rawQuery": lambda handler: handler.query,
+    "request.prevAnswers": _request_prev_answers,
+    "request.answers": lambda handler: str(handler.final_ranked_answers),
+    "tool.description": lambda handler: getattr(handler.tool, 'description', ''),
+    "tools.description": lambda handler: getattr(handler.tools, 'description', ''),
+    "request.top_k": lambda handler: str(getattr(handler, 'top_k', 3)),
+    "request.item_name": lambda handler: getattr(handler, 'item_name', ''),
+    "request.details_requested": lambda handler: getattr(handler, 'details_requested', ''),
+}
+
+# Variables set once when the handler is built and never reassigned or mutated.
+# Their string values are memoized per handler. The others can change during a
+# request: pre-checks update the handler, tools such as accompaniment rewrite
+# handler.query, and multi-turn callers append to the previous queries and answers.
+_STABLE_VARIABLES = frozenset([
+    "request.site", "request.contextUrl",
+])
+_handler_values = weakref.WeakKeyDictionary()
+
 def get_prompt_variable_value(variable, handler):
     logger.debug(f"Getting value for variable: {variable}")
-    
-    site = handler.site
-    query = handler.query
-    prev_queries = handler.prev_queries
-    value = ""
-
-    if variable == "request.site":
-        if (isinstance(site, list)):
-            value = site
-    elif variable == "site.itemType":
-        item_type = handler.item_type
-        value = item_type.split("}")[1]
-    elif variable == "request.query":
-        if (handler.state.is_decontextualization_done()):
-            value = handler.decontextualized_query
-        elif (len(prev_queries) > 0):
-            value = query + " previous queries: " + str(prev_queries)
-        else:
-            value = query
-    elif variable == "request.previousQueries":
-        value = str(prev_queries)
-    elif variable == "request.contextUrl":
-        value = handler.context_url
-    elif variable == "request.itemType":
-        value = handler.item_type
-    elif variable == "request.contextDescription":
-        value = handler.context_description
-    elif variable == "request.rawQuery":
-        value = query
-    elif variable == "request.prevAnswers":
-        # Get previous answers from handler - the attribute is named 'last_answers'
-        last_answers = getattr(handler, 'last_answers', [])
-        if last_answers:
-            value = str(last_answers)
-        else:
-            value = ""
-    elif variable == "request.answers":
-        value = str(handler.final_ranked_answers)
-    elif variable == "tool.description":
-        value = getattr(handler.tool, 'description', '')
-    elif variable == "tools.description":
-        value = getattr(handler.tools, 'description', '')
-    elif variable == "request.top_k":
-        value = str(getattr(handler, 'top_k', 3))
-    elif variable == "request.item_name":
-        value = getattr(handler, 'item_name', '')
-    elif variable == "request.details_requested":
-        value = getattr(handler, 'details_requested', '')
-    else:
+    resolver = _VARIABLE_RESOLVERS.get(variable)
+    if resolver is None:
         logger.warning(f"Unknown variable: {variable}")
-        value = ""
-    
+        return ""
+    value = resolver(handler)
     logger.debug(f"Variable '{variable}' = '{str(value)[:100]}{'...' if len(str(value)) > 100 else ''}'")
-    
-    
     return value
 
-def fill_prompt(prompt_str, handler, pr_dict={}):
-    logger.debug(f"Filling prompt template (length: {len(prompt_str)})")
-    try:
-        variables = get_prompt_variables_from_prompt(prompt_str)
-        logger.debug(f"Found {len(variables)} variables to fill")
-        for variable in variables:
-            if (variable in pr_dict):
+def _variable_string(variable, handler):
+    # Called for every variable of every fill, so no per-variable logging here
+    if variable in _STABLE_VARIABLES:
+        try:
+            memo = _handler_values.setdefault(handler, {})
+        except TypeError:
+            memo = {}  # Handler can't be weakly referenced, don't memoize
+        if variable not in memo:
+            memo[variable] = _variable_string_uncached(variable, handler)
+        return memo[variable]
+    return _variable_string_uncached(variable, handler)
+
+def _variable_string_uncached(variable, handler):
+    resolver = _VARIABLE_RESOLVERS.get(variable)
+    if resolver is None:
+        logger.warning(f"Unknown variable: {variable}")
+        return ""
+    value = resolver(handler)
+    return value if isinstance(value, str) else str(value)
+
+
+class CompiledTemplate:
+    """
+    A prompt template split into literal text and variable slots. literals has
+    one more element than slots; the filled prompt interleaves them.
+    """
+
+    __slots__ = ("literals", "slots", "variables")
+
+    def __init__(self, text):
+        literals = []
+        slots = []
+        pos = 0
+        search = 0
+        while True:
+            start = text.find('{', search)
+            if start == -1:
+                break
+            end = text.find('}', start)
+            if end == -1:
+                break
+            name = text[start+1:end]
+            if name == name.strip():
+                literals.append(text[pos:start])
+                slots.append(name)
+                pos = end + 1
+            search = end + 1
+        literals.append(text[pos:])
+        self.literals = tuple(literals)
+        self.slots = tuple(slots)
+        self.variables = frozenset(slots)
+
+    def _parts(self, handler, pr_dict):
+        values = {}
+        for variable in self.variables:
+            if variable in pr_dict:
                 value = pr_dict[variable]
+                values[variable] = value if isinstance(value, str) else str(value)
             else:
-                value = get_prompt_variable_value(variable, handler)
-            # Ensure value is a string
-            if not isinstance(value, str):
-                value = str(value)
-                
-            prompt_str = prompt_str.replace("{" + variable + "}", value)
-        
-        logger.debug(f"Prompt filled successfully (final length: {len(prompt_str)})")
-        return prompt_str
+                values[variable] = _variable_string(variable, handler)
+        literals = self.literals
+        parts = [literals[0]]
+        for i, variable in enumerate(self.slots, 1):
+            parts.append(values[variable])
+            parts.append(literals[i])
+        return parts
+
+    def fill(self, handler, pr_dict):
+        return "".join(self._parts(handler, pr_dict))
+
+    def fill_parts(self, handler, pr_dict, suffix_variables):
+        """
+        Fill the template as (prefix, suffix), splitting just before the first
+        slot holding one of suffix_variables. The suffix is "" if there is none.
+        """
+        parts = self._parts(handler, pr_dict)
+        for i, variable in enumerate(self.slots):
+            if variable in suffix_variables:
+                # parts interleaves literals[0], value 0, literals[1], ...
+                return "".join(parts[:2 * i + 1]), "".join(parts[2 * i + 1:])
+        return "".join(parts), ""
+
+
+@lru_cache(maxsize=512)
+def compile_template(prompt_str):
+    return CompiledTemplate(prompt_str)
+
+def fill_prompt(prompt_str, handler, pr_dict={}):
+    try:
+        prompt = compile_template(prompt_str).fill(handler, pr_dict)
+        logger.debug(f"Prompt filled successfully (final length: {len(prompt)})")
+        return prompt
     except Exception as e:
         logger.error(f"Error filling prompt: {str(e)}")
         logger.debug("Error details:", exc_info=True)
         raise
 
+def fill_prompt_parts(prompt_str, handler, pr_dict={}):
+    """
+    Fill a prompt as (prefix, suffix) for ask_llm's prompt_suffix. Prompts
+    without a suffixVariables layout are returned whole as the prefix.
+    """
+    try:
+        suffix_variables = _prompt_layouts.get(prompt_str)
+        template = compile_template(prompt_str)
+        if not suffix_variables:
+            return template.fill(handler, pr_dict), ""
+        return template.fill_parts(handler, pr_dict, suffix_variables)
+    except Exception as e:
+        logger.error(f"Error filling prompt: {str(e)}")
+        logger.debug("Error details:", exc_info=True)
+        raise
 
-cached_prompts = {}
-def get_cached_values(site, item_type, prompt_name):
-    cache_key = (site, item_type, prompt_name)
-    if cache_key in cached_prompts:
-        logger.debug(f"Cache hit for prompt: {cache_key}")
-        return cached_prompts[cache_key]
-    logger.debug(f"Cache miss for prompt: {cache_key}")
-    return None
 
-def find_prompt(site, item_type, prompt_name):  
+def find_compiled_prompt(site, item_type, prompt_name):
+    """Return the CompiledPrompt for a site, item type and prompt name, or None."""
     if (site):
         site = site[0]
-    if (prompt_roots == []):
-        logger.debug("Prompt roots not initialized, initializing now")
+    if not _registry.loaded:
+        logger.debug("Prompt registry not initialized, initializing now")
         init_prompts()
-    
-    cached_values = get_cached_values(site, item_type, prompt_name)
-    if cached_values is not None:
-        logger.debug(f"Returning cached prompt for '{prompt_name}'")
-        return cached_values
-
-    BASE_NS = "http://nlweb.ai/base"
-    SITE_TAG = "{" + BASE_NS + "}Site"
-    PROMPT_TAG = "{" + BASE_NS + "}Prompt"
-    PROMPT_STRING_TAG = "{" + BASE_NS + "}promptString"
-    RETURN_STRUC_TAG = "{" + BASE_NS + "}returnStruc"
-    
-    # First, try to find a Site element matching the site parameter
-    site_element = None
-    prompt_element = None
-    
-    logger.debug(f"Searching for site element with ref='{site}'")
-    for root_element in prompt_roots:
-        for site_element in root_element.findall(SITE_TAG):
-            if site_element.get("ref") == site:
-                break
-    
-    candidate_roots = []
-    if site_element is not None:
-        candidate_roots.append(site_element)
-    else:
-        candidate_roots = prompt_roots
-    
-    # If site element found, search for matching Type element within it
-    for candidate_root in candidate_roots:
-        for child in candidate_root:
-            if (super_class_of(item_type, child.tag)):
-                children = child.findall(PROMPT_TAG)
-                
-                for pe in children:
-                    if pe.get("ref") == prompt_name:
-                        prompt_element = pe
-                        break
-    
-    if prompt_element is not None:
-        prompt_text = prompt_element.find(PROMPT_STRING_TAG).text
-        return_struc_element = prompt_element.find(RETURN_STRUC_TAG)
-        
-        if return_struc_element is not None and return_struc_element.text:
-            return_struc_text = return_struc_element.text.strip()
-            if return_struc_text == "":
-                return_struc = None
-            else:
-                try:
-                    return_struc = json.loads(return_struc_text)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse return structure JSON: {e}")
-                    return_struc = None
-        else:
-            return_struc = None
-        
-        cached_prompts[(site, item_type, prompt_name)] = (prompt_text, return_struc)
-        return prompt_text, return_struc
-    else:
-        logger.warning(f"Prompt '{prompt_name}' not found for site='{site}', item_type='{item_type}'")
-        cached_prompts[(site, item_type, prompt_name)] = (None, None)
+    return _registry.lookup(site, item_type, prompt_name)
+
+def find_prompt(site, item_type, prompt_name):  
+    prompt = find_compiled_prompt(site, item_type, prompt_name)
+    if prompt is None:
         return None, None
+    return prompt.text, prompt.return_struc
 
 
 def get_prompt_variables_from_file(xml_file_path):
@@ -321,7 +476,7 @@ class PromptRunner:
     def __init__(self, handler):
         self.handler = handler
 
-    async def run_prompt(self, prompt_name, level="low", verbose=False, timeout=8):
+    async def run_prompt(self, prompt_name, level="low", verbose=False, timeout=8, priority=PRIORITY_HIGH):
         prompt_runner_logger.info(f"Running prompt: {prompt_name} with level={level}, timeout={timeout}s")
         
         try:
@@ -333,13 +488,13 @@ class PromptRunner:
                 return None
         
             prompt_runner_logger.debug(f"Filling prompt template with handler data")
-            prompt = fill_prompt(prompt_str, self.handler)
+            prompt, prompt_suffix = fill_prompt_parts(prompt_str, self.handler)
             if (verbose):
-                print(f"Prompt: {prompt}")
-            prompt_runner_logger.debug(f"Filled prompt length: {len(prompt)} chars")
+                print(f"Prompt: {prompt}{prompt_suffix}")
+            prompt_runner_logger.debug(f"Filled prompt length: {len(prompt) + len(prompt_suffix)} chars")
             
             prompt_runner_logger.info(f"Calling LLM with level={level}")
-            response = await ask_llm(prompt, ans_struc, level=level, timeout=timeout, query_params=self.handler.query_params)
+            response = await ask_llm(prompt, ans_struc, level=level, timeout=timeout, query_params=self.handler.query_params, prompt_name=prompt_name, priority=priority, prompt_suffix=prompt_suffix)
             
             if response is None:
                 prompt_runner_logger.warning(f"LLM returned None for prompt '{prompt_name}'")
@@ -9,11 +9,13 @@ Backwards compatibility is not guaranteed at this time.
 """
 
 from core.utils.utils import log
-from core.llm import ask_llm
+from core.llm import ask_llm, ask_llm_stream, PRIORITY_NORMAL, PRIORITY_LOW
 import asyncio
 import json
-from core.utils.json_utils import trim_json
-from core.prompts import find_prompt, fill_prompt
+from core.retrieved_item import RetrievedItem
+from core.prompts import find_prompt, fill_prompt_parts
+from core.config import CONFIG
+from core.utils.task_group import FAST_TRACK_LANE, REGULAR_TRACK_LANE
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("ranking_engine")
@@ -38,6 +40,24 @@ The user's question is: {request.query}. The item's description is {item.descrip
  "description" : "short description of the item"}]
  
     RANKING_PROMPT_NAME = "RankingPrompt"
+
+    # Used when several items are ranked with one call, see CONFIG.get_ranking_batch_size()
+    BATCH_RANKING_PROMPT = ["""  Assign a score between 0 and 100 to each of the following {site.itemType}s
+based on how relevant it is to the user's question. Use your knowledge from other sources, about the item, to make a judgement. 
+For each item with a score above 50, provide a short description of the item highlighting the relevance to the user's question, without mentioning the user's question.
+Return one entry per item, identified by the item's url exactly as given.
+The user's question is: {request.query}. The items are:
+{items.description}""",
+    {"items" : [{"url" : "the url of the item, exactly as given",
+                 "score" : "integer between 0 and 100",
+                 "description" : "short description of the item"}]}]
+
+    BATCH_RANKING_PROMPT_NAME = "BatchRankingPrompt"
+    BATCH_TOKENS_PER_ITEM = 150
+
+    # With streaming ranking, items at or below this score are dropped as soon as the
+    # score arrives; they would be filtered out of the results anyway
+    STREAM_DISCARD_THRESHOLD = 51
      
     def get_ranking_prompt(self):
         site = self.handler.site
@@ -56,75 +76,187 @@ The user's question is: {request.query}. The item's description is {item.descrip
         logger.info(f"Initializing Ranking with {ll} items, type: {self.ranking_type_str}")
         logger.info(f"Ranking {ll} items of type {self.ranking_type_str}")
         self.handler = handler
-        self.items = items
+        # Items parse their JSON once, for the prompt and the answer alike
+        self.items = [RetrievedItem.wrap(item) for item in items]
         self.num_results_sent = 0
         self.rankedAnswers = []
         self.ranking_type = ranking_type
+        self.lane = FAST_TRACK_LANE if ranking_type == self.FAST_TRACK else REGULAR_TRACK_LANE
+        self.batch_size = CONFIG.get_ranking_batch_size()
+        self.streaming = CONFIG.is_ranking_streaming_enabled()
         self._results_lock = asyncio.Lock()  # Add lock for thread-safe operations
 
-    async def rankItem(self, url, json_str, name, site):
+    def get_batch_ranking_prompt(self):
+        site = self.handler.site
+        item_type = self.handler.item_type
+        prompt_str, ans_struc = find_prompt(site, item_type, self.BATCH_RANKING_PROMPT_NAME)
+        if prompt_str is None:
+            logger.debug("Using default batch ranking prompt")
+            return self.BATCH_RANKING_PROMPT[0], self.BATCH_RANKING_PROMPT[1]
+        return prompt_str, ans_struc
+
+    def priority_for(self, position):
+        """
+        Items near the top of the retrieval results are the likeliest to be sent,
+        so they are ranked ahead of the tail when the LLM endpoint is saturated.
+        """
+        return PRIORITY_NORMAL if position < self.NUM_RESULTS_TO_SEND else PRIORITY_LOW
+
+    def should_skip_ranking(self):
         if not self.handler.connection_alive_event.is_set():
             logger.warning("Connection lost, skipping item ranking")
-            return
+            return True
         if (self.ranking_type == Ranking.FAST_TRACK and self.handler.state.should_abort_fast_track()):
             logger.info("Fast track aborted, skipping item ranking")
-            logger.info("Aborting fast track")
+            return True
+        return False
+
+    def build_answer(self, item, ranking):
+        schema_object = item.schema_object
+        
+        # If schema_object is an array, set it to the first item
+        if isinstance(schema_object, list) and len(schema_object) > 0:
+            schema_object = schema_object[0]
+        
+        ansr = {
+            'url': item.url,
+            'site': item.site,
+            'name': item.name,
+            'ranking': ranking,
+            'schema_object': schema_object,
+            'sent': False,
+        }
+        
+        # Check if required_item_type is specified and filter based on @type
+        if self.handler.required_item_type is not None:
+            item_type = schema_object.get('@type', None)
+            if item_type != self.handler.required_item_type:
+                logger.debug(f"Item type mismatch: expected {self.handler.required_item_type}, got {item_type} - setting score to 0")
+                ranking["score"] = 0
+        return ansr
+
+    async def addRankedAnswers(self, answers):
+        """Send high scoring answers early, then record all answers."""
+        early = [a for a in answers if a["ranking"]["score"] > self.EARLY_SEND_THRESHOLD]
+        if early:
+            logger.info(f"High score items: {[(a['name'], a['ranking']['score']) for a in early]} - sending early {self.ranking_type_str}")
+            try:
+                await self.sendAnswers(early)
+            except (BrokenPipeError, ConnectionResetError):
+                logger.warning("Client disconnected while sending early answers")
+                self.handler.connection_alive_event.clear()
+                return
+        
+        async with self._results_lock:  # Use lock when modifying shared state
+            self.rankedAnswers.extend(answers)
+        logger.debug(f"{len(answers)} items added to ranked answers")
+
+    async def rankItem(self, item, priority=PRIORITY_NORMAL):
+        if self.should_skip_ranking():
             return
+        name = item.name
         try:
-            logger.debug(f"Ranking item: {name} from {site}")
+            logger.debug(f"Ranking item: {name} from {item.site}")
             prompt_str, ans_struc = self.get_ranking_prompt()
-            description = trim_json(json_str)
-            prompt = fill_prompt(prompt_str, self.handler, {"item.description": description})
+            prompt, prompt_suffix = fill_prompt_parts(prompt_str, self.handler, {"item.description": item.description})
             
             logger.debug(f"Sending ranking request to LLM for item: {name}")
-            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params)
+            if self.streaming:
+                ranking = await self.streamRanking(prompt, ans_struc, priority, prompt_suffix)
+            else:
+                ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params, prompt_name=self.RANKING_PROMPT_NAME, priority=priority, prompt_suffix=prompt_suffix)
             logger.debug(f"Received ranking score: {ranking.get('score', 'N/A')} for item: {name}")
             
-            
-            # Handle both string and dictionary inputs for json_str
-            schema_object = json_str if isinstance(json_str, dict) else json.loads(json_str)
-            
-            # If schema_object is an array, set it to the first item
-            if isinstance(schema_object, list) and len(schema_object) > 0:
-                schema_object = schema_object[0]
-            
-            ansr = {
-                'url': url,
-                'site': site,
-                'name': name,
-                'ranking': ranking,
-                'schema_object': schema_object,
-                'sent': False,
-            }
-            
-            # Check if required_item_type is specified and filter based on @type
-            if self.handler.required_item_type is not None:
-                item_type = schema_object.get('@type', None)
-                if item_type != self.handler.required_item_type:
-                    logger.debug(f"Item type mismatch: expected {self.handler.required_item_type}, got {item_type} - setting score to 0")
-                    ranking["score"] = 0
-            
-            if (ranking["score"] > self.EARLY_SEND_THRESHOLD):
-                logger.info(f"High score item: {name} (score: {ranking['score']}) - sending early {self.ranking_type_str}")
-                try:
-                    await self.sendAnswers([ansr])
-                except (BrokenPipeError, ConnectionResetError):
-                    logger.warning(f"Client disconnected while sending early answer for {name}")
-                    self.handler.connection_alive_event.clear()
-                    return
-            
-            async with self._results_lock:  # Use lock when modifying shared state
-                self.rankedAnswers.append(ansr)
-            logger.debug(f"Item {name} added to ranked answers")
+            ansr = self.build_answer(item, ranking)
+            await self.addRankedAnswers([ansr])
         
         except Exception as e:
             logger.error(f"Error in rankItem for {name}: {str(e)}")
             logger.debug(f"Full error trace: ", exc_info=True)
-            # Import here to avoid circular import
-            from config.config import CONFIG
             if CONFIG.should_raise_exceptions():
                 raise  # Re-raise in testing/development mode
 
+    async def streamRanking(self, prompt, ans_struc, priority=PRIORITY_NORMAL, prompt_suffix=None):
+        """
+        Stream the ranking response and stop as soon as the outcome is known:
+        a low score drops the item without waiting for its description, and
+        otherwise generation stops once every field of the answer has arrived.
+        """
+        ranking = {}
+        stream = ask_llm_stream(prompt, ans_struc, level="low", query_params=self.handler.query_params,
+                                prompt_name=self.RANKING_PROMPT_NAME, priority=priority, prompt_suffix=prompt_suffix)
+        try:
+            async for partial in stream:
+                ranking = partial
+                if "score" not in partial:
+                    continue
+                try:
+                    score = int(partial["score"])
+                except (TypeError, ValueError):
+                    continue
+                if score <= self.STREAM_DISCARD_THRESHOLD:
+                    logger.debug(f"Score {score} at or below {self.STREAM_DISCARD_THRESHOLD}, stopping generation")
+                    ranking = {**partial, "score": score}
+                    ranking.setdefault("description", "")
+                    break
+                if all(key in partial for key in ans_struc):
+                    break
+        finally:
+            await stream.aclose()
+        return ranking
+
+    async def rankBatch(self, batch, priority=PRIORITY_NORMAL):
+        """
+        Rank several items with one LLM call. Items the model skipped or scored
+        with an unusable answer are ranked individually with rankItem.
+        """
+        if self.should_skip_ranking():
+            return
+        skipped = list(batch)
+        try:
+            logger.debug(f"Ranking batch of {len(batch)} items")
+            prompt_str, ans_struc = self.get_batch_ranking_prompt()
+            entries = "\n".join(
+                f"url: {item.url}\ndescription: {json.dumps(item.description, default=str)}"
+                for item in batch
+            )
+            prompt, prompt_suffix = fill_prompt_parts(prompt_str, self.handler, {"items.description": entries})
+            response = await ask_llm(prompt, ans_struc, level="low", query_params=self.handler.query_params,
+                                     max_length=self.BATCH_TOKENS_PER_ITEM * len(batch),
+                                     prompt_name=self.BATCH_RANKING_PROMPT_NAME, priority=priority,
+                                     prompt_suffix=prompt_suffix)
+            
+            rankings = {}
+            for entry in response.get("items", []) if isinstance(response, dict) else []:
+                if not isinstance(entry, dict) or "url" not in entry:
+                    continue
+                try:
+                    rankings[entry["url"]] = {
+                        "score": int(entry["score"]),
+                        "description": entry.get("description", "")
+                    }
+                except (KeyError, TypeError, ValueError):
+                    continue
+            
+            answers = []
+            skipped = []
+            for item in batch:
+                if item.url in rankings:
+                    answers.append(self.build_answer(item, rankings[item.url]))
+                else:
+                    skipped.append(item)
+            logger.debug(f"Batch ranked {len(answers)} of {len(batch)} items")
+            await self.addRankedAnswers(answers)
+        except Exception as e:
+            logger.error(f"Error in rankBatch: {str(e)}")
+            logger.debug("Full error trace: ", exc_info=True)
+            if CONFIG.should_raise_exceptions():
+                raise
+
+        if skipped:
+            logger.info(f"Falling back to single-item ranking for {len(skipped)} items")
+            await asyncio.gather(*[self.rankItem(item, priority=priority) for item in skipped], return_exceptions=True)
+
     def shouldSend(self, result):
         # Don't send if we've already reached the limit
         if self.num_results_sent >= self.NUM_RESULTS_TO_SEND:
@@ -202,6 +334,10 @@ The user's question is: {request.query}. The item's description is {item.descrip
                 await self.handler.send_message(to_send)
                 self.num_results_sent += len(json_results)
                 logger.info(f"Sent {len(json_results)} results, total sent: {self.num_results_sent}/{self.NUM_RESULTS_TO_SEND}")
+                if self.num_results_sent >= self.NUM_RESULTS_TO_SEND:
+                    # Nothing more will be sent, stop paying for the rest of the ranking calls
+                    self.handler.task_group.cancel(self.lane, reason="result limit reached",
+                                                   exclude=asyncio.current_task())
             except (BrokenPipeError, ConnectionResetError) as e:
                 logger.error(f"Client disconnected while sending answers: {str(e)}")
                 log(f"Client disconnected while sending answers: {str(e)}")
@@ -230,17 +366,57 @@ The user's question is: {request.query}. The item's description is {item.descrip
                 logger.warning("Client disconnected when sending sites message")
                 self.handler.connection_alive_event.clear()
     
+    def startRankingTasks(self, items, start=0):
+        """Create the ranking tasks for items; start is the position of the first item in the results."""
+        tasks = []
+        if self.batch_size > 1:
+            batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+            logger.info(f"Ranking in {len(batches)} batches of up to {self.batch_size} items")
+            for i, batch in enumerate(batches):
+                if self.handler.connection_alive_event.is_set():
+                    priority = self.priority_for(start + i * self.batch_size)
+                    tasks.append(self.handler.task_group.create_task(self.rankBatch(batch, priority), self.lane))
+                else:
+                    logger.warning("Connection lost, not creating new ranking tasks")
+        else:
+            for i, item in enumerate(items):
+                if self.handler.connection_alive_event.is_set():  # Only add new tasks if connection is still alive
+                    tasks.append(self.handler.task_group.create_task(
+                        self.rankItem(item, self.priority_for(start + i)), self.lane))
+                else:
+                    logger.warning("Connection lost, not creating new ranking tasks")
+        return tasks
+
     async def do(self):
         logger.info(f"Starting ranking process with {len(self.items)} items")
-        tasks = []
-        for url, json_str, name, site in self.items:
-            if self.handler.connection_alive_event.is_set():  # Only add new tasks if connection is still alive
-                tasks.append(asyncio.create_task(self.rankItem(url, json_str, name, site)))
-            else:
-                logger.warning("Connection lost, not creating new ranking tasks")
+        tasks = self.startRankingTasks(self.items)
        
         await self.sendMessageOnSitesBeingAsked(self.items)
+        await self.finishRanking(tasks)
+
+    async def doStream(self, stream):
+        """
+        Rank items as retrieval yields them (see core.retriever.RetrievalStream):
+        each endpoint's items are ranked as soon as it answers, and the final
+        selection runs once the stream ends.
+        """
+        logger.info(f"Starting streaming ranking process, type: {self.ranking_type_str}")
+        tasks = []
+        async for batch in stream:
+            if not self.handler.connection_alive_event.is_set():
+                logger.warning("Connection lost, not ranking further retrieved items")
+                stream.close()
+                break
+            logger.info(f"Ranking {len(batch)} newly retrieved items ({len(self.items)} before)")
+            tasks.extend(self.startRankingTasks(batch, len(self.items)))
+            first_batch = not self.items
+            self.items.extend(batch)
+            if first_batch:
+                await self.sendMessageOnSitesBeingAsked(batch)
+        await self.finishRanking(tasks)
 
+    async def finishRanking(self, tasks):
+        """Wait for the ranking tasks, then send the best answers not sent early."""
         try:
             logger.debug(f"Running {len(tasks)} ranking tasks concurrently")
             await asyncio.gather(*tasks, return_exceptions=True)
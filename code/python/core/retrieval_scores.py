@@ -0,0 +1,97 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Similarity scores of retrieval results. Asked with with_scores=True, vector
+backends append a similarity in [0, 1] to each [url, json, name, site] item,
+converting their own metric with the helpers below. VectorDBClient fuses the
+ranked lists of several endpoints with reciprocal rank fusion, and cuts the
+merged list where similarity drops off so distant results aren't sent to LLM
+ranking. Items leave the retriever as RetrievedItems, with the score as an
+attribute rather than an element.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+from typing import Dict, List, Optional
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("retrieval_scores")
+
+
+def clamp_unit(score: float) -> float:
+    return min(1.0, max(0.0, float(score)))
+
+
+def cosine_to_unit(similarity: float) -> float:
+    """Cosine similarity in [-1, 1] to [0, 1]."""
+    return clamp_unit((1.0 + float(similarity)) / 2.0)
+
+
+def distance_to_unit(distance: float) -> float:
+    """A distance in [0, inf), e.g. Euclidean, to a similarity in (0, 1]."""
+    return 1.0 / (1.0 + max(0.0, float(distance)))
+
+
+def item_score(item: List) -> Optional[float]:
+    """The similarity of a scored item, or None for items from backends without scores."""
+    if len(item) > 4 and isinstance(item[4], (int, float)):
+        return item[4]
+    return None
+
+
+def reciprocal_rank_fusion(endpoint_results: Dict[str, List[List]], k: int = 60) -> Dict[str, float]:
+    """
+    Fused score of each URL: the sum over endpoints of 1 / (k + rank). Only
+    ranks are used, so endpoints whose scores aren't comparable (or that have
+    none) are fused fairly, and items found by several endpoints move up.
+    """
+    fused: Dict[str, float] = {}
+    for results in endpoint_results.values():
+        seen = set()
+        for rank, item in enumerate(results or [], start=1):
+            if len(item) < 4 or not item[0] or item[0] in seen:
+                continue
+            seen.add(item[0])
+            fused[item[0]] = fused.get(item[0], 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+def find_knee(scores: List[float], min_results: int, threshold: float) -> Optional[int]:
+    """
+    Index at which descending scores drop off: the point furthest below the
+    straight line from the first to the last score (the Kneedle method), which
+    also finds a single large gap. Returns None if no point is at least
+    threshold below the line, or the knee would leave fewer than min_results.
+    """
+    n = len(scores)
+    if n < 3 or n <= min_results:
+        return None
+    first, last = scores[0], scores[-1]
+    best_index, best_distance = None, threshold
+    for i in range(max(min_results, 1), n - 1):
+        distance = first + (last - first) * i / (n - 1) - scores[i]
+        if distance >= best_distance:
+            best_index, best_distance = i, distance
+    return best_index
+
+
+def prune_results(items: List[List], min_results: int = 10, threshold: float = 0.02) -> List[List]:
+    """
+    Drop the scored items at or below the knee of the similarity curve,
+    keeping the order of items. Unscored items are kept, since there is
+    nothing to judge them by.
+    """
+    scores = sorted((s for s in map(item_score, items) if s is not None), reverse=True)
+    knee = find_knee(scores, min_results, threshold)
+    if knee is None:
+        return items
+    cutoff = scores[knee]
+    kept = [item for item in items if item_score(item) is None or item_score(item) > cutoff]
+    if len(kept) < min_results:
+        # Ties at the cutoff; keep the first min_results instead
+        return items[:min_results]
+    logger.info(f"Pruned {len(items) - len(kept)} of {len(items)} results below similarity {cutoff:.3f}")
+    return kept
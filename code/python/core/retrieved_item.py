@@ -0,0 +1,94 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Retrieval results as RetrievedItem objects. Each result used to be a plain
+[url, json_str, name, site] list whose schema JSON was parsed again by every
+stage that looked at it: trimming for the ranking prompt, building the answer,
+generating or comparing. A RetrievedItem parses its JSON the first time it's
+needed and keeps the object and the trimmed description for later stages.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import json
+from typing import Any, List, Optional
+
+from core.retrieval_scores import item_score
+from core.utils.json_utils import trim_json
+
+_UNSET = object()
+
+
+class RetrievedItem(list):
+    """
+    A [url, json_str, name, site] list, so code that indexes, unpacks or
+    checks isinstance(item, list) keeps working, with the similarity score
+    from retrieval and lazily computed views of the schema JSON. The JSON is
+    parsed at most once per item; create items per request (the retriever
+    does) so callers never share parsed objects.
+    """
+
+    __slots__ = ("score", "_schema_object", "_description")
+
+    def __init__(self, url: str, raw: Any, name: str, site: str, score: Optional[float] = None):
+        super().__init__((url, raw, name, site))
+        self.score = score
+        self._schema_object = _UNSET
+        self._description = _UNSET
+
+    @classmethod
+    def from_result(cls, result: List) -> "RetrievedItem":
+        """Item from a backend result, [url, json, name, site] with an optional fifth score element."""
+        return cls(result[0], result[1], result[2], result[3], item_score(result))
+
+    @classmethod
+    def wrap(cls, item: List) -> "RetrievedItem":
+        """The item itself if it already is a RetrievedItem, else a new one from the list."""
+        return item if isinstance(item, cls) else cls.from_result(item)
+
+    @property
+    def url(self) -> str:
+        return self[0]
+
+    @property
+    def raw(self) -> Any:
+        """The schema JSON as the backend returned it, a string or an already parsed object."""
+        return self[1]
+
+    @property
+    def name(self) -> str:
+        return self[2]
+
+    @property
+    def site(self) -> str:
+        return self[3]
+
+    @property
+    def json_str(self) -> str:
+        raw = self[1]
+        return raw if isinstance(raw, str) else json.dumps(raw)
+
+    @property
+    def schema_object(self) -> Any:
+        """The parsed schema JSON; a string that isn't valid JSON is returned unchanged."""
+        if self._schema_object is _UNSET:
+            raw = self[1]
+            if isinstance(raw, (str, bytes)):
+                try:
+                    raw = json.loads(raw)
+                except json.JSONDecodeError:
+                    pass
+            self._schema_object = raw
+        return self._schema_object
+
+    @property
+    def description(self) -> Any:
+        """trim_json of the schema, as used in ranking prompts."""
+        if self._description is _UNSET:
+            self._description = trim_json(self.schema_object)
+        return self._description
+
+    def __reduce_ex__(self, protocol):
+        return (type(self), (self[0], self[1], self[2], self[3], self.score))
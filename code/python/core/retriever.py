@@ -11,8 +11,11 @@ import time
 import asyncio
 import subprocess
 import sys
+import math
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Union, Tuple, Type
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Union, Tuple, Type
 import json
 
 from core.config import CONFIG
@@ -20,6 +23,11 @@ from core.utils.utils import get_param
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 from core.utils.json_utils import merge_json_array
+from core.retrieval_scores import item_score, prune_results, reciprocal_rank_fusion
+from core.retrieved_item import RetrievedItem
+from core.embedding import get_embedding, get_embeddings
+from core.embedding_cache import normalize_text
+from core.utils.singleflight import SingleFlight
 
 logger = get_configured_logger("retriever")
 
@@ -136,6 +144,13 @@ class VectorDBClientInterface(ABC):
     """
     Abstract base class defining the interface for vector database clients.
     All vector database implementations should implement these methods.
+
+    Backends that embed queries with core.embedding may also define
+    search_by_vector(vector, site, num_results, **kwargs), so that
+    VectorDBClient can embed a query once and share the vector across
+    endpoints, and search_many_by_vector(vectors, site, num_results, **kwargs)
+    to search for several vectors in one round-trip. They are not declared
+    here: VectorDBClient takes the vector path only for clients that have them.
     """
     
     @abstractmethod
@@ -229,6 +244,404 @@ class VectorDBClientInterface(ABC):
         return None
 
 
+class SiteCatalog:
+    """
+    Sites available in each retrieval endpoint, shared by every VectorDBClient
+    in the process. The first lookup for an endpoint fetches its list; after
+    ttl seconds lookups keep getting that list while a fresh one is fetched in
+    the background. Writes through VectorDBClient invalidate the endpoint, and
+    a fetch that started before the write is discarded.
+    """
+    
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Optional[List[str]]]] = {}
+        self._fetches: Dict[str, asyncio.Task] = {}
+        self._generations: Dict[str, int] = {}
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "invalidations": 0}
+    
+    async def get(self, endpoint_name: str, fetch) -> Optional[List[str]]:
+        """Sites of the endpoint; fetch() returns them, or None if the backend can't list sites."""
+        entry = self._entries.get(endpoint_name)
+        if entry is not None:
+            fetched_at, sites = entry
+            self._stats["hits"] += 1
+            if self.ttl > 0 and time.time() - fetched_at > self.ttl:
+                self._start_fetch(endpoint_name, fetch)
+            return sites
+        self._stats["misses"] += 1
+        # Concurrent first lookups share one fetch
+        return await asyncio.shield(self._start_fetch(endpoint_name, fetch))
+    
+    def _start_fetch(self, endpoint_name: str, fetch) -> asyncio.Task:
+        task = self._fetches.get(endpoint_name)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            if endpoint_name in self._entries:
+                self._stats["refreshes"] += 1
+            generation = self._generations.get(endpoint_name, 0)
+            task = asyncio.ensure_future(self._fetch(endpoint_name, fetch, generation))
+            self._fetches[endpoint_name] = task
+        return task
+    
+    async def _fetch(self, endpoint_name: str, fetch, generation: int) -> Optional[List[str]]:
+        try:
+            sites = await fetch()
+        finally:
+            if self._fetches.get(endpoint_name) is asyncio.current_task():
+                del self._fetches[endpoint_name]
+        if self._generations.get(endpoint_name, 0) == generation:
+            self._entries[endpoint_name] = (time.time(), sites)
+        return sites
+    
+    def invalidate(self, endpoint_name: str):
+        """Forget the endpoint's sites; the next lookup fetches them again."""
+        self._entries.pop(endpoint_name, None)
+        self._fetches.pop(endpoint_name, None)
+        self._generations[endpoint_name] = self._generations.get(endpoint_name, 0) + 1
+        self._stats["invalidations"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "ttl": self.ttl,
+            **self._stats,
+            "endpoints": {
+                name: {
+                    "sites": None if sites is None else len(sites),
+                    "age_seconds": round(now - fetched_at, 1)
+                }
+                for name, (fetched_at, sites) in self._entries.items()
+            },
+        }
+
+
+class RetrievalCache:
+    """
+    LRU of VectorDBClient.search results keyed on the normalized query, the
+    sites, num_results and the endpoints queried. Entries expire after ttl
+    seconds; a ttl of 0 keeps them until they are evicted. A write to an
+    endpoint drops the entries for the written sites and for searches over all
+    sites, and stops searches that were running during the write from
+    storing their results.
+    """
+    
+    def __init__(self, max_entries: int = 1000, ttl: int = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, Tuple[float, tuple, List[List[str]]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}  # Writes per site
+        self._writes = 0  # Writes to any site, for searches over all sites
+        self._unscoped_writes = 0  # Writes of unknown sites, which affect every search
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidated": 0, "stale": 0}
+    
+    @staticmethod
+    def _sites_key(site: Union[str, List[str]]) -> tuple:
+        if isinstance(site, str):
+            return (site,)
+        return tuple(sorted(set(site)))
+    
+    @classmethod
+    def make_key(cls, query: str, site: Union[str, List[str]], num_results: int,
+                 endpoint_names: List[str], query_params: Optional[Dict[str, Any]] = None) -> tuple:
+        # The embedding provider can be switched per request in development mode
+        embedding_provider = None
+        if CONFIG.is_development_mode() and query_params:
+            embedding_provider = str(query_params.get('embedding_provider'))
+        return (normalize_text(query), cls._sites_key(site), num_results,
+                tuple(sorted(endpoint_names)), embedding_provider)
+    
+    def get(self, key: tuple) -> Optional[List[List[str]]]:
+        """Return a copy of the cached results, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] and entry[0] <= time.time():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return [list(item) for item in entry[2]]
+    
+    def snapshot(self, site: Union[str, List[str]]) -> tuple:
+        """Write counters for the sites, taken before a search and checked by put."""
+        with self._lock:
+            return self._snapshot_locked(site)
+    
+    def _snapshot_locked(self, site: Union[str, List[str]]) -> tuple:
+        sites = self._sites_key(site)
+        if sites == ("all",):
+            return (self._writes,)
+        return (self._unscoped_writes,) + tuple(self._generations.get(s, 0) for s in sites)
+    
+    def put(self, key: tuple, site: Union[str, List[str]], endpoint_names: List[str],
+            results: List[List[str]], token: tuple):
+        expires = time.time() + self.ttl if self.ttl > 0 else 0.0
+        results = [list(item) for item in results]
+        with self._lock:
+            if self._snapshot_locked(site) != token:
+                self._stats["stale"] += 1
+                return
+            self._entries[key] = (expires, tuple(endpoint_names), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+    
+    def invalidate(self, endpoint_name: str, sites: Optional[List[str]] = None):
+        """
+        Drop the results that may include documents of these sites from the
+        endpoint; sites=None drops every result that includes the endpoint.
+        """
+        with self._lock:
+            self._writes += 1
+            if sites is None:
+                self._unscoped_writes += 1
+            else:
+                for s in sites:
+                    self._generations[s] = self._generations.get(s, 0) + 1
+            stale = [
+                key for key, (_, endpoints, _) in self._entries.items()
+                if endpoint_name in endpoints
+                and (sites is None or key[1] == ("all",) or any(s in key[1] for s in sites))
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidated"] += len(stale)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            **stats,
+            "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+class RetrievalStream:
+    """
+    Async iterator over the results of a search, yielding each endpoint's new
+    items as soon as that endpoint answers, so ranking can start with the
+    fastest backend. Iterate with `async for batch in stream`; `items` holds
+    everything yielded so far.
+    
+    Items are deduplicated by URL as they arrive; unlike VectorDBClient.search,
+    an item found by several endpoints keeps the JSON of the first. Each
+    endpoint gets an equal share of num_results up front, and slots left
+    unused are filled from the endpoints' remaining items at the end, which
+    approximates the interleaving of the non-streaming search.
+    
+    With a deadline, iteration ends that many seconds after the search started.
+    Endpoints that haven't answered are cancelled if late_results is "drop";
+    with "append" their items are still added to `items` when they arrive, for
+    the stages after ranking, but aren't yielded.
+    
+    With prune, each endpoint's results are cut where their similarity drops
+    off, since the merged list isn't known until the last endpoint answers.
+    """
+    
+    def __init__(self, tasks: Dict[asyncio.Task, str], num_results: int,
+                 deadline: Optional[float] = None, late_results: str = "append",
+                 on_complete: Optional[Callable[[List[List[str]], Dict[str, List[List[str]]]], None]] = None,
+                 prune: bool = False):
+        self.items: List[List[str]] = []
+        self.num_results = num_results
+        self.late_results = late_results
+        self._pending = dict(tasks)
+        self._deadline = time.time() + deadline if deadline else None
+        self._quota = math.ceil(num_results / len(tasks)) if tasks else num_results
+        self._prune = prune
+        self._seen_urls = set()
+        self._held: Dict[str, List[List[str]]] = {}  # Items past each endpoint's share
+        self._endpoint_results: Dict[str, List[List[str]]] = {}
+        self._failures = 0
+        self._late_endpoints: List[str] = []
+        self._on_complete = on_complete
+        self._finished = False
+        # Called with the items once iteration ends, e.g. to report the retrieval count
+        self.on_finished: Optional[Callable[[List[List[str]]], Any]] = None
+    
+    @classmethod
+    def from_results(cls, results: List[List[str]]) -> "RetrievalStream":
+        """A stream that yields results that are already known, e.g. from the retrieval cache."""
+        stream = cls({}, len(results))
+        stream._held["cache"] = list(results)
+        return stream
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> List[List[str]]:
+        while self._pending:
+            timeout = None
+            if self._deadline is not None:
+                timeout = self._deadline - time.time()
+                if timeout <= 0:
+                    self._stop_at_deadline()
+                    break
+            done, _ = await asyncio.wait(self._pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            batch = []
+            for task in done:
+                batch.extend(self._take(self._pending.pop(task), task))
+            if batch:
+                return batch
+        if not self._finished:
+            self._finished = True
+            batch = self._fill_remaining()
+            self._complete()
+            if self.on_finished is not None:
+                self.on_finished(self.items)
+            if batch:
+                return batch
+        raise StopAsyncIteration
+    
+    def _take(self, endpoint_name: str, task: asyncio.Task) -> List[List[str]]:
+        """New items from a finished endpoint, up to its share; the rest are held back."""
+        if task.cancelled():
+            return []
+        if task.exception() is not None:
+            logger.warning(f"Search failed for endpoint {endpoint_name}: {task.exception()}")
+            self._failures += 1
+            return []
+        results = task.result() or []
+        self._endpoint_results[endpoint_name] = results
+        batch = []
+        results = self._prune_endpoint_results(results)
+        held = self._held.setdefault(endpoint_name, [])
+        for item in results:
+            if len(item) < 4 or not item[0] or item[0] in self._seen_urls:
+                continue
+            if len(batch) < self._quota and len(self.items) + len(batch) < self.num_results:
+                self._seen_urls.add(item[0])
+                batch.append(RetrievedItem.from_result(item))
+            else:
+                held.append(RetrievedItem.from_result(item))
+        self.items.extend(batch)
+        return batch
+    
+    def _fill_remaining(self) -> List[List[str]]:
+        """Fill slots left under num_results from the held items, one endpoint at a time."""
+        batch = []
+        queues = [list(held) for held in self._held.values() if held]
+        while queues and len(self.items) + len(batch) < self.num_results:
+            for queue in list(queues):
+                while queue and queue[0][0] in self._seen_urls:
+                    queue.pop(0)
+                if not queue:
+                    queues.remove(queue)
+                    continue
+                item = queue.pop(0)
+                self._seen_urls.add(item[0])
+                batch.append(item)
+                if len(self.items) + len(batch) >= self.num_results:
+                    break
+        self._held.clear()
+        self.items.extend(batch)
+        return batch
+    
+    def _prune_endpoint_results(self, results: List[List]) -> List[List]:
+        if not self._prune:
+            return results
+        scoring_config = CONFIG.retrieval_scoring
+        min_results = math.ceil(scoring_config.min_results * self._quota / max(self.num_results, 1))
+        return prune_results(results, min_results, scoring_config.knee_threshold)
+    
+    def _stop_at_deadline(self):
+        self._late_endpoints = list(self._pending.values())
+        logger.info(f"Retrieval deadline passed, {self.late_results} results of {self._late_endpoints}")
+        for task, endpoint_name in self._pending.items():
+            if self.late_results == "drop":
+                task.cancel()
+            else:
+                task.add_done_callback(lambda t, name=endpoint_name: self._append_late(name, t))
+        self._pending.clear()
+    
+    def _append_late(self, endpoint_name: str, task: asyncio.Task):
+        if task.cancelled() or task.exception() is not None:
+            return
+        for item in self._prune_endpoint_results(task.result() or []):
+            if len(self.items) >= self.num_results:
+                break
+            if len(item) >= 4 and item[0] and item[0] not in self._seen_urls:
+                self._seen_urls.add(item[0])
+                self.items.append(RetrievedItem.from_result(item))
+        logger.debug(f"Appended late results of endpoint {endpoint_name}, {len(self.items)} items")
+    
+    def _complete(self):
+        if self._endpoint_results or not self._failures:
+            logger.info(f"Streamed {len(self.items)} items from {len(self._endpoint_results)} endpoints")
+        else:
+            raise ValueError("All endpoint searches failed")
+        # Only a search where every endpoint answered in time may be cached
+        if self._on_complete is not None and not self._failures and not self._late_endpoints:
+            self._on_complete(self.items, self._endpoint_results)
+    
+    async def collect(self) -> List[List[str]]:
+        """Consume the rest of the stream and return every item."""
+        async for _ in self:
+            pass
+        return self.items
+    
+    def close(self):
+        """Cancel the endpoints that are still being searched."""
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+        self._finished = True
+
+
+_site_catalog: Optional[SiteCatalog] = None
+
+# Cache of search results, created from CONFIG.retrieval_cache on first use
+_retrieval_cache: Optional[RetrievalCache] = None
+_retrieval_cache_lock = threading.Lock()
+
+# Identical concurrent searches share one round of endpoint queries
+_inflight_searches = SingleFlight()
+
+# Shared VectorDBClients by (endpoint_name, endpoint after query param overrides)
+_vector_db_clients: Dict[Tuple[Optional[str], Optional[str]], "VectorDBClient"] = {}
+_vector_db_clients_lock = threading.Lock()
+
+def _get_site_catalog() -> SiteCatalog:
+    global _site_catalog
+    if _site_catalog is None:
+        catalog_config = getattr(CONFIG, "site_catalog", None)
+        _site_catalog = SiteCatalog(ttl=catalog_config.ttl if catalog_config else 300)
+    return _site_catalog
+
+def _invalidate_retrieval_cache(endpoint_name: str, sites: Optional[List[str]]):
+    cache = _get_retrieval_cache()
+    if cache is not None:
+        cache.invalidate(endpoint_name, sites)
+
+def _get_retrieval_cache() -> Optional[RetrievalCache]:
+    """Return the shared retrieval cache, or None if caching is disabled."""
+    global _retrieval_cache
+    cache_config = getattr(CONFIG, "retrieval_cache", None)
+    if not cache_config or not cache_config.enabled:
+        return None
+    with _retrieval_cache_lock:
+        if _retrieval_cache is None:
+            _retrieval_cache = RetrievalCache(
+                max_entries=cache_config.max_entries,
+                ttl=cache_config.ttl
+            )
+    return _retrieval_cache
+
+
 class VectorDBClient:
     """
     Unified client for vector database operations. This class routes operations to the appropriate
@@ -327,15 +740,20 @@ class VectorDBClient:
         else:
             logger.warning("No write endpoint configured - write operations will fail")
         
-        self._retrieval_lock = asyncio.Lock()
-        
-        # Cache for endpoint sites - will be populated lazily
-        self._endpoint_sites_cache: Dict[str, Optional[List[str]]] = {}
-        
+    @staticmethod
+    def _resolve_endpoint_name(endpoint_name: Optional[str], query_params: Optional[Dict[str, Any]]) -> Optional[str]:
+        """The endpoint a client for these arguments uses; in development mode 'db' in query_params overrides it."""
+        if CONFIG.is_development_mode() and query_params:
+            param_endpoint = query_params.get('db') or query_params.get('retrieval_backend')
+            if isinstance(param_endpoint, list):
+                param_endpoint = param_endpoint[0] if param_endpoint else None
+            if param_endpoint:
+                return param_endpoint
+        return endpoint_name
     
     async def _get_endpoint_sites(self, endpoint_name: str) -> Optional[List[str]]:
         """
-        Get the list of sites available in an endpoint, with caching.
+        Get the list of sites available in an endpoint from the process-wide site catalog.
         
         Args:
             endpoint_name: Name of the endpoint
@@ -343,14 +761,13 @@ class VectorDBClient:
         Returns:
             List of site names if supported, None if not supported by this backend.
         """
-        # Return cached value if available
-        if endpoint_name in self._endpoint_sites_cache:
-            return self._endpoint_sites_cache[endpoint_name]
-        
+        return await _get_site_catalog().get(endpoint_name, lambda: self._load_endpoint_sites(endpoint_name))
+    
+    async def _load_endpoint_sites(self, endpoint_name: str) -> Optional[List[str]]:
+        """Fetch the endpoint's sites from the backend; None if it doesn't support get_sites or failed."""
         try:
             client = await self.get_client(endpoint_name)
             sites = await client.get_sites()
-            self._endpoint_sites_cache[endpoint_name] = sites
             if sites:
                 logger.info(f"Endpoint {endpoint_name} has {len(sites)} sites: {sites[:5]}{'...' if len(sites) > 5 else ''}")
             else:
@@ -360,9 +777,15 @@ class VectorDBClient:
             # Any error means the backend doesn't support get_sites or it failed
             logger.error(f"Backend for endpoint {endpoint_name} does not support get_sites() or it failed: {e}", exc_info=True)
             # Cache None to indicate unsupported
-            self._endpoint_sites_cache[endpoint_name] = None
             return None
     
+    async def _list_endpoint_sites(self, endpoint_name: str, **kwargs) -> Optional[List[str]]:
+        """Sites for get_sites; backend-specific arguments bypass the site catalog."""
+        if kwargs:
+            client = await self.get_client(endpoint_name)
+            return await client.get_sites(**kwargs)
+        return await self._get_endpoint_sites(endpoint_name)
+    
     async def _endpoint_has_site(self, endpoint_name: str, site: Union[str, List[str]]) -> bool:
         """
         Check if an endpoint has data for the requested site(s).
@@ -545,7 +968,8 @@ class VectorDBClient:
             endpoint_results: Dictionary mapping endpoint names to their results
             
         Returns:
-            Aggregated results with merged JSON for duplicate URLs
+            Aggregated results with merged JSON for duplicate URLs, and the best
+            similarity as a fifth element for items from backends that report one
         """
         # Dictionary to store aggregated data by URL
         # Format: {url: {"result": [url, json_array, name, site], "sources": [json1, json2...]}}
@@ -562,6 +986,7 @@ class VectorDBClient:
                         json_data = result[1]
                         name = result[2]
                         site = result[3]
+                        score = item_score(result)
                         
                         if url not in url_to_data:
                             # First occurrence of this URL
@@ -570,16 +995,65 @@ class VectorDBClient:
                                 "json_list": [json_data] if json_data else [],
                                 "name": name,
                                 "site": site,
+                                "score": score,
                                 "first_endpoint": endpoint_name
                             }
                         else:
-                            # URL already seen, append JSON data
+                            # URL already seen, append JSON data and keep the best similarity
                             if json_data:
                                 url_to_data[url]["json_list"].append(json_data)
+                            if score is not None:
+                                best = url_to_data[url]["score"]
+                                url_to_data[url]["score"] = score if best is None else max(best, score)
+        
+        # Second pass: order the URLs, fusing the endpoints' rankings or
+        # interleaving them to preserve relevance ordering
+        scoring_config = CONFIG.retrieval_scoring
+        if scoring_config.fusion == "rrf" and len(endpoint_results) > 1:
+            fused = reciprocal_rank_fusion(endpoint_results, scoring_config.rrf_k)
+            # sorted is stable, so ties keep the order of the first endpoint
+            ordered_urls = sorted(fused, key=fused.get, reverse=True)
+        else:
+            ordered_urls = self._interleave_urls(endpoint_results)
         
-        # Second pass: build final results maintaining order from first endpoint
-        # We'll interleave to preserve relevance ordering
+        # Build final results with merged JSON
         final_results = []
+        for url in ordered_urls:
+            # Get the aggregated data for this URL
+            data = url_to_data.get(url)
+            if data:
+                # Merge JSON data if multiple sources
+                json_list = data["json_list"]
+                if len(json_list) > 1:
+                    # Multiple sources - merge them
+                    merged_json = merge_json_array(json_list)
+                    # Convert back to JSON string
+                    merged_json_str = json.dumps(merged_json)
+                else:
+                    # Single source - use as is
+                    merged_json_str = json_list[0] if json_list else "{}"
+                
+                # Create result with merged JSON
+                merged_result = [
+                    data["url"],
+                    merged_json_str,  # Single merged JSON string
+                    data["name"],
+                    data["site"]
+                ]
+                if data["score"] is not None:
+                    merged_result.append(data["score"])
+                final_results.append(merged_result)
+        
+        # Calculate total results safely
+        total_results = sum(len(r) for r in endpoint_results.values() if r is not None)
+        logger.info(f"Aggregated {total_results} total results into {len(final_results)} unique URLs")
+        
+        return final_results
+    
+    @staticmethod
+    def _interleave_urls(endpoint_results: Dict[str, List[List[str]]]) -> List[str]:
+        """Unique URLs taking one result from each endpoint in turn."""
+        ordered_urls = []
         seen_urls = set()
         
         # Create iterators for each endpoint's results
@@ -599,28 +1073,7 @@ class VectorDBClient:
                         url = result[0]
                         if url and url not in seen_urls:
                             seen_urls.add(url)
-                            # Get the aggregated data for this URL
-                            data = url_to_data.get(url)
-                            if data:
-                                # Merge JSON data if multiple sources
-                                json_list = data["json_list"]
-                                if len(json_list) > 1:
-                                    # Multiple sources - merge them
-                                    merged_json = merge_json_array(json_list)
-                                    # Convert back to JSON string
-                                    merged_json_str = json.dumps(merged_json)
-                                else:
-                                    # Single source - use as is
-                                    merged_json_str = json_list[0] if json_list else "{}"
-                                
-                                # Create result with merged JSON
-                                merged_result = [
-                                    data["url"],
-                                    merged_json_str,  # Single merged JSON string
-                                    data["name"],
-                                    data["site"]
-                                ]
-                                final_results.append(merged_result)
+                            ordered_urls.append(url)
                 except StopIteration:
                     endpoints_to_remove.append(endpoint_name)
             
@@ -628,11 +1081,7 @@ class VectorDBClient:
             for endpoint in endpoints_to_remove:
                 del iterators[endpoint]
         
-        # Calculate total results safely
-        total_results = sum(len(r) for r in endpoint_results.values() if r is not None)
-        logger.info(f"Aggregated {total_results} total results into {len(final_results)} unique URLs")
-        
-        return final_results
+        return ordered_urls
     
     async def delete_documents_by_site(self, site: str, **kwargs) -> int:
         """
@@ -648,27 +1097,30 @@ class VectorDBClient:
         if not self.write_endpoint:
             raise ValueError("No write endpoint configured for delete operations")
             
-        async with self._retrieval_lock:
-            logger.info(f"Deleting documents for site: {site} using write endpoint: {self.write_endpoint}")
+        logger.info(f"Deleting documents for site: {site} using write endpoint: {self.write_endpoint}")
             
-            try:
-                client = await self.get_client(self.write_endpoint)
-                count = await client.delete_documents_by_site(site, **kwargs)
-                logger.info(f"Successfully deleted {count} documents for site: {site}")
-                return count
-            except Exception as e:
-                logger.exception(f"Error deleting documents for site {site}: {e}")
-                logger.log_with_context(
-                    LogLevel.ERROR,
-                    "Document deletion failed",
-                    {
-                        "error_type": type(e).__name__,
-                        "error_message": str(e),
-                        "site": site,
-                        "endpoint": self.write_endpoint
-                    }
-                )
-                raise
+        try:
+            client = await self.get_client(self.write_endpoint)
+            count = await client.delete_documents_by_site(site, **kwargs)
+            logger.info(f"Successfully deleted {count} documents for site: {site}")
+            return count
+        except Exception as e:
+            logger.exception(f"Error deleting documents for site {site}: {e}")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Document deletion failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "site": site,
+                    "endpoint": self.write_endpoint
+                }
+            )
+            raise
+        finally:
+            # Even a failed delete may have removed some documents
+            _get_site_catalog().invalidate(self.write_endpoint)
+            _invalidate_retrieval_cache(self.write_endpoint, [site])
     
     async def upload_documents(self, documents: List[Dict[str, Any]], **kwargs) -> int:
         """
@@ -684,27 +1136,31 @@ class VectorDBClient:
         if not self.write_endpoint:
             raise ValueError("No write endpoint configured for upload operations")
             
-        async with self._retrieval_lock:
-            logger.info(f"Uploading {len(documents)} documents to write endpoint: {self.write_endpoint}")
+        logger.info(f"Uploading {len(documents)} documents to write endpoint: {self.write_endpoint}")
             
-            try:
-                client = await self.get_client(self.write_endpoint)
-                count = await client.upload_documents(documents, **kwargs)
-                logger.info(f"Successfully uploaded {count} documents")
-                return count
-            except Exception as e:
-                logger.exception(f"Error uploading documents: {e}")
-                logger.log_with_context(
-                    LogLevel.ERROR,
-                    "Document upload failed",
-                    {
-                        "error_type": type(e).__name__,
-                        "error_message": str(e),
-                        "document_count": len(documents),
-                        "endpoint": self.write_endpoint
-                    }
-                )
-                raise
+        try:
+            client = await self.get_client(self.write_endpoint)
+            count = await client.upload_documents(documents, **kwargs)
+            logger.info(f"Successfully uploaded {count} documents")
+            return count
+        except Exception as e:
+            logger.exception(f"Error uploading documents: {e}")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Document upload failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "document_count": len(documents),
+                    "endpoint": self.write_endpoint
+                }
+            )
+            raise
+        finally:
+            # New documents may add sites; a failed upload may have written some
+            _get_site_catalog().invalidate(self.write_endpoint)
+            sites = {doc.get("site") for doc in documents}
+            _invalidate_retrieval_cache(self.write_endpoint, None if None in sites else list(sites))
     
     async def search(self, query: str, site: Union[str, List[str]], 
                     num_results: int = 50, endpoint_name: Optional[str] = None, **kwargs) -> List[List[str]]:
@@ -716,7 +1172,9 @@ class VectorDBClient:
             site: Site identifier or list of sites
             num_results: Maximum number of results to return
             endpoint_name: Optional endpoint name override
-            **kwargs: Additional parameters
+            **kwargs: Additional parameters (vector: precomputed query embedding;
+                prune: the results go to ranking, so leave out the low-similarity tail
+                if scoring.prune is enabled)
             
         Returns:
             List of search results
@@ -732,107 +1190,423 @@ class VectorDBClient:
         if endpoint_name:
             if endpoint_name not in CONFIG.retrieval_endpoints:
                 raise ValueError(f"Invalid endpoint: {endpoint_name}")
-            temp_client = VectorDBClient(endpoint_name=endpoint_name)
+            temp_client = get_vector_db_client(endpoint_name=endpoint_name)
             return await temp_client.search(query, site, num_results, **kwargs)
         
-        # Process site parameter for consistency
+        site = self._normalize_site(site)
+        vector = kwargs.pop('vector', None)
+        prune = kwargs.pop('prune', False)
+
+        logger.info(f"Searching for '{query[:50]}...' in site: {site}, num_results: {num_results}")
+        endpoints_to_query = await self._endpoints_for_site(site)
+        
+        cache = _get_retrieval_cache()
+        if cache is None or not endpoints_to_query:
+            results, _ = await self._search_endpoints(query, site, num_results, endpoints_to_query, vector, **kwargs)
+            return self._finish_results(results, prune)
+        
+        key = cache.make_key(query, site, num_results, endpoints_to_query, kwargs.get('query_params'))
+        results = cache.get(key)
+        if results is not None:
+            logger.info(f"Retrieval cache hit for '{query[:50]}' in site: {site}, {len(results)} results")
+            return self._finish_results(results, prune)
+        
+        async def search_and_cache():
+            # Writes that finish while the search runs make its results stale
+            token = cache.snapshot(site)
+            results, complete = await self._search_endpoints(
+                query, site, num_results, endpoints_to_query, vector, **kwargs)
+            if complete:
+                cache.put(key, site, endpoints_to_query, results, token)
+            return results
+        
+        # The fast-track and regular paths often ask for the same search at the same time
+        results = await _inflight_searches.do(key, search_and_cache)
+        return self._finish_results(results, prune)
+    
+    @staticmethod
+    def _finish_results(results: List[List], prune: bool) -> List[RetrievedItem]:
+        """New RetrievedItems for the results, pruned first if asked and configured."""
+        scoring_config = CONFIG.retrieval_scoring
+        if prune and scoring_config.prune:
+            results = prune_results(results, scoring_config.min_results, scoring_config.knee_threshold)
+        return [RetrievedItem.from_result(item) for item in results]
+    
+    async def search_stream(self, query: str, site: Union[str, List[str]], num_results: int = 50,
+                            deadline: Optional[float] = None, late_results: Optional[str] = None,
+                            **kwargs) -> RetrievalStream:
+        """
+        Start a search and return a RetrievalStream that yields items as each
+        endpoint answers, instead of waiting for the slowest one.
+        
+        Args:
+            query: Search query string
+            site: Site identifier or list of sites
+            num_results: Maximum number of results to yield
+            deadline: Seconds after which endpoints that haven't answered are left out;
+                defaults to the streaming section of the retrieval config
+            late_results: "drop" to cancel late endpoints, "append" to add their items
+                to the stream's items without yielding them
+            **kwargs: Additional parameters, as for search
+            
+        Returns:
+            RetrievalStream over lists of new items
+        """
+        streaming_config = CONFIG.retrieval_streaming
+        deadline = streaming_config.endpoint_deadline if deadline is None else deadline
+        late_results = late_results or streaming_config.late_results
+        
+        if site == "all":
+            sites = CONFIG.nlweb.sites
+            if sites and sites != "all":
+                site = sites
+        site = self._normalize_site(site)
+        vector = kwargs.pop('vector', None)
+        prune = kwargs.pop('prune', False) and CONFIG.retrieval_scoring.prune
+        
+        logger.info(f"Streaming search for '{query[:50]}...' in site: {site}, num_results: {num_results}")
+        endpoints_to_query = await self._endpoints_for_site(site)
+        
+        cache = _get_retrieval_cache()
+        on_complete = None
+        if cache is not None and endpoints_to_query:
+            key = cache.make_key(query, site, num_results, endpoints_to_query, kwargs.get('query_params'))
+            results = cache.get(key)
+            if results is not None:
+                logger.info(f"Retrieval cache hit for '{query[:50]}' in site: {site}, {len(results)} results")
+                return RetrievalStream.from_results(self._finish_results(results, prune))
+            token = cache.snapshot(site)
+            
+            def on_complete(items, endpoint_results):
+                # Cache what search() would have returned for the same endpoint results
+                results = self._aggregate_results(endpoint_results)[:num_results]
+                cache.put(key, site, endpoints_to_query, results, token)
+        
+        tasks, task_endpoints = await self._create_search_tasks(
+            query, site, num_results, endpoints_to_query, vector, **kwargs)
+        return RetrievalStream(dict(zip(tasks, task_endpoints)), num_results,
+                               deadline=deadline, late_results=late_results, on_complete=on_complete,
+                               prune=prune)
+
+    async def search_many(self, queries: List[str], site: Union[str, List[str]], num_results: int = 50,
+                          endpoint_name: Optional[str] = None, **kwargs) -> List[List[RetrievedItem]]:
+        """
+        Search for several queries at once. The queries that aren't cached are
+        embedded in one call, and each endpoint gets all of them in one
+        round-trip if its backend has search_many_by_vector, or as concurrent
+        searches if it doesn't.
+
+        Args:
+            queries: Search query strings
+            site: Site identifier or list of sites
+            num_results: Maximum number of results to return per query
+            endpoint_name: Optional endpoint name override
+            **kwargs: Additional parameters, as for search
+
+        Returns:
+            One list of search results per query, as search would return it
+        """
+        if site == "all":
+            sites = CONFIG.nlweb.sites
+            if sites and sites != "all":
+                site = sites
+
+        if endpoint_name:
+            if endpoint_name not in CONFIG.retrieval_endpoints:
+                raise ValueError(f"Invalid endpoint: {endpoint_name}")
+            temp_client = get_vector_db_client(endpoint_name=endpoint_name)
+            return await temp_client.search_many(queries, site, num_results, **kwargs)
+
+        if not queries:
+            return []
+        site = self._normalize_site(site)
+        kwargs.pop('vector', None)
+        prune = kwargs.pop('prune', False)
+
+        distinct_queries = list(dict.fromkeys(queries))
+        logger.info(f"Searching for {len(distinct_queries)} queries in site: {site}, num_results: {num_results}")
+        endpoints_to_query = await self._endpoints_for_site(site)
+
+        found = {}
+        keys = {}
+        cache = _get_retrieval_cache()
+        if cache is not None and endpoints_to_query:
+            for query in distinct_queries:
+                key = cache.make_key(query, site, num_results, endpoints_to_query, kwargs.get('query_params'))
+                results = cache.get(key)
+                if results is not None:
+                    found[query] = results
+                else:
+                    keys[query] = key
+            if found:
+                logger.info(f"Retrieval cache hit for {len(found)} of {len(distinct_queries)} queries")
+            # Writes that finish while the search runs make its results stale
+            token = cache.snapshot(site)
+
+        pending = [query for query in distinct_queries if query not in found]
+        if pending:
+            searched, complete = await self._search_endpoints_many(
+                pending, site, num_results, endpoints_to_query, **kwargs)
+            for query, results in zip(pending, searched):
+                found[query] = results
+                if complete and query in keys:
+                    cache.put(keys[query], site, endpoints_to_query, results, token)
+
+        return [self._finish_results(found[query], prune) for query in queries]
+
+    async def _search_endpoints_many(self, queries: List[str], site: Union[str, List[str]], num_results: int,
+                                     endpoint_names: List[str], **kwargs) -> Tuple[List[List[List[str]]], bool]:
+        """
+        _search_endpoints for several queries: one task per endpoint searches
+        all queries, and each query's results are merged across endpoints.
+        """
+        logger.info(f"Querying {len(endpoint_names)} endpoints in parallel for {len(queries)} queries")
+        start_time = time.time()
+        embedding_task = None
+
+        tasks = []
+        task_endpoints = []
+        for endpoint_name in endpoint_names:
+            try:
+                client = await self.get_client(endpoint_name)
+                if hasattr(client, 'search_by_vector') and embedding_task is None:
+                    # All queries are embedded in one call, shared by the vector backends
+                    embedding_task = asyncio.create_task(
+                        get_embeddings(queries, query_params=kwargs.get('query_params'))
+                    )
+                tasks.append(asyncio.create_task(self._search_endpoint_many(
+                    client, queries, site, num_results, embedding_task, **kwargs)))
+                task_endpoints.append(endpoint_name)
+            except Exception as e:
+                logger.warning(f"Failed to create search task for endpoint {endpoint_name}: {e}")
+
+        if not tasks:
+            if embedding_task is not None:
+                embedding_task.cancel()
+            raise ValueError("No valid endpoints available for search")
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        query_endpoint_results = [{} for _ in queries]
+        successful_endpoints = 0
+        for endpoint_name, result in zip(task_endpoints, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Search failed for endpoint {endpoint_name}: {result}")
+                continue
+            successful_endpoints += 1
+            for endpoint_results, query_results in zip(query_endpoint_results, result):
+                endpoint_results[endpoint_name] = query_results or []
+
+        if successful_endpoints == 0:
+            raise ValueError("All endpoint searches failed")
+
+        final_results = [
+            self._aggregate_results(endpoint_results)[:num_results]
+            for endpoint_results in query_endpoint_results
+        ]
+
+        logger.log_with_context(
+            LogLevel.INFO,
+            "Parallel multi-query search completed",
+            {
+                "duration": f"{time.time() - start_time:.2f}s",
+                "queries": len(queries),
+                "endpoints_queried": len(tasks),
+                "endpoints_succeeded": successful_endpoints,
+                "total_results": sum(len(results) for results in final_results),
+                "site": site
+            }
+        )
+
+        return final_results, successful_endpoints == len(endpoint_names)
+
+    async def _search_endpoint_many(self, client, queries: List[str], site: Union[str, List[str]],
+                                    num_results: int, embedding_task: Optional[asyncio.Task],
+                                    **kwargs) -> List[List[List[str]]]:
+        """
+        Search one endpoint for all queries: with the backend's multi-search,
+        concurrent vector searches, or concurrent searches of the backend's
+        own if it doesn't take vectors or embedding failed.
+        """
+        search_kwargs = kwargs.copy()
+        # Queries are not rewritten here: a rewrite stores its queries on the handler,
+        # which concurrent rewrites for the other queries would overwrite
+        search_kwargs.pop('handler', None)
+        if embedding_task is not None and hasattr(client, 'search_by_vector'):
+            try:
+                vectors = await asyncio.shield(embedding_task)
+            except Exception as e:
+                logger.warning(f"Shared query embedding failed ({e}), falling back to per-query search")
+            else:
+                vector_kwargs = dict(search_kwargs, with_scores=True)
+                if hasattr(client, 'search_many_by_vector'):
+                    return await client.search_many_by_vector(vectors, site, num_results, **vector_kwargs)
+                return await asyncio.gather(*(
+                    client.search_by_vector(vector, site, num_results, **vector_kwargs) for vector in vectors
+                ))
+
+        if site == "all":
+            searches = [client.search_all_sites(query, num_results, **search_kwargs) for query in queries]
+        else:
+            searches = [client.search(query, site, num_results, **search_kwargs) for query in queries]
+        return await asyncio.gather(*searches)
+
+    @staticmethod
+    def _normalize_site(site: Union[str, List[str]]) -> Union[str, List[str]]:
+        """Split comma separated sites into a list, and use underscores in a single site name."""
         if isinstance(site, str) and ',' in site:
             site = site.replace('[', '').replace(']', '')
             site = [s.strip() for s in site.split(',')]
         elif isinstance(site, str):
             site = site.replace(" ", "_")
-
-        async with self._retrieval_lock:
-            logger.info(f"Searching for '{query[:50]}...' in site: {site}, num_results: {num_results}")
-            logger.info(f"Querying {len(self.enabled_endpoints)} enabled endpoints in parallel")
-            start_time = time.time()
-            
-            # Create tasks for parallel queries to endpoints that have the requested site
-            tasks = []
-            endpoint_names = []
-            skipped_endpoints = []
-            
-            for endpoint_name in self.enabled_endpoints:
-                try:
-                    # Check if endpoint has data for the requested site
-                    if not await self._endpoint_has_site(endpoint_name, site):
-                        skipped_endpoints.append(endpoint_name)
-                        continue
-                    
-                    client = await self.get_client(endpoint_name)
-                    
-                    # Use search_all_sites if site is "all"
-                    if site == "all":
-                        task = asyncio.create_task(client.search_all_sites(query, num_results, **kwargs))
-                    else:
-                        # For Shopify MCP, always go through the rewrite wrapper
-                        if type(client).__name__ == 'ShopifyMCPClient':
-                            # Extract handler from kwargs for rewriting
-                            handler_for_rewrite = kwargs.pop('handler', None)  # Remove handler from kwargs
-                            # Use the rewrite wrapper for Shopify MCP
-                            task = asyncio.create_task(
-                                search_with_rewrite(client, query, site, num_results, handler_for_rewrite, **kwargs)
-                            )
-                        else:
-                            # Regular search for other backends
-                            # Remove handler from kwargs if present (some backends don't accept it)
-                            search_kwargs = kwargs.copy()
-                            search_kwargs.pop('handler', None)
-                            task = asyncio.create_task(client.search(query, site, num_results, **search_kwargs))
-                    tasks.append(task)
-                    endpoint_names.append(endpoint_name)
-                except Exception as e:
-                    logger.warning(f"Failed to create search task for endpoint {endpoint_name}: {e}")
-            
-            if skipped_endpoints:
-                logger.debug(f"Skipped endpoints without site '{site}': {skipped_endpoints}")
-            
-            if not tasks:
-                raise ValueError("No valid endpoints available for search")
-            
-            # Execute all searches in parallel and collect results
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Process results and handle failures gracefully
-            endpoint_results = {}
-            successful_endpoints = 0
-            
-            for endpoint_name, result in zip(endpoint_names, results):
-                if isinstance(result, Exception):
-                    logger.warning(f"Search failed for endpoint {endpoint_name}: {result}")
-                elif result is None:
-                    logger.warning(f"Endpoint {endpoint_name} returned None, treating as empty results")
-                    endpoint_results[endpoint_name] = []
+        return site
+    
+    async def _endpoints_for_site(self, site: Union[str, List[str]]) -> List[str]:
+        """The enabled endpoints that have data for the requested site."""
+        endpoints_to_query = []
+        skipped_endpoints = []
+        for endpoint_name in self.enabled_endpoints:
+            if await self._endpoint_has_site(endpoint_name, site):
+                endpoints_to_query.append(endpoint_name)
+            else:
+                skipped_endpoints.append(endpoint_name)
+        
+        if skipped_endpoints:
+            logger.debug(f"Skipped endpoints without site '{site}': {skipped_endpoints}")
+        return endpoints_to_query
+    
+    async def _search_endpoints(self, query: str, site: Union[str, List[str]], num_results: int,
+                                endpoint_names: List[str], vector: Optional[List[float]],
+                                **kwargs) -> Tuple[List[List[str]], bool]:
+        """
+        Query the endpoints in parallel and merge their results. Also returns
+        whether every endpoint answered, i.e. whether the results may be cached.
+        """
+        logger.info(f"Querying {len(endpoint_names)} endpoints in parallel")
+        start_time = time.time()
+        
+        tasks, task_endpoints = await self._create_search_tasks(
+            query, site, num_results, endpoint_names, vector, **kwargs)
+        
+        # Execute all searches in parallel and collect results
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Process results and handle failures gracefully
+        endpoint_results = {}
+        successful_endpoints = 0
+        
+        for endpoint_name, result in zip(task_endpoints, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Search failed for endpoint {endpoint_name}: {result}")
+            elif result is None:
+                logger.warning(f"Endpoint {endpoint_name} returned None, treating as empty results")
+                endpoint_results[endpoint_name] = []
+            else:
+                endpoint_results[endpoint_name] = result
+                successful_endpoints += 1
+        
+        if successful_endpoints == 0:
+            raise ValueError("All endpoint searches failed")
+        
+        # Aggregate and deduplicate results
+        final_results = self._aggregate_results(endpoint_results)
+        
+        # Limit to requested number of results
+        # Results are already in relevance order from aggregation
+        final_results = final_results[:num_results]
+        
+        end_time = time.time()
+        search_duration = end_time - start_time
+        
+        logger.log_with_context(
+            LogLevel.INFO,
+            "Parallel search completed",
+            {
+                "duration": f"{search_duration:.2f}s",
+                "endpoints_queried": len(tasks),
+                "endpoints_succeeded": successful_endpoints,
+                "total_results": len(final_results),
+                "site": site
+            }
+        )
+        
+        return final_results, successful_endpoints == len(endpoint_names)
+    
+    async def _create_search_tasks(self, query: str, site: Union[str, List[str]], num_results: int,
+                                   endpoint_names: List[str], vector: Optional[List[float]],
+                                   **kwargs) -> Tuple[List[asyncio.Task], List[str]]:
+        """Start a search task per endpoint; returns the tasks and their endpoint names."""
+        embedding_task = None
+        
+        # Create tasks for parallel queries to the endpoints
+        tasks = []
+        task_endpoints = []
+        
+        for endpoint_name in endpoint_names:
+            try:
+                client = await self.get_client(endpoint_name)
+                
+                if hasattr(client, 'search_by_vector'):
+                    if vector is None and embedding_task is None:
+                        # Embed the query once for all vector backends, overlapping the
+                        # client setup of the remaining endpoints
+                        embedding_task = asyncio.create_task(
+                            get_embedding(query, query_params=kwargs.get('query_params'))
+                        )
+                    search_kwargs = kwargs.copy()
+                    search_kwargs.pop('handler', None)
+                    search_kwargs['with_scores'] = True
+                    task = asyncio.create_task(self._search_by_vector(
+                        client, query, site, num_results, vector, embedding_task, **search_kwargs))
+                # Use search_all_sites if site is "all"
+                elif site == "all":
+                    task = asyncio.create_task(client.search_all_sites(query, num_results, **kwargs))
                 else:
-                    endpoint_results[endpoint_name] = result
-                    successful_endpoints += 1
-            
-            if successful_endpoints == 0:
-                raise ValueError("All endpoint searches failed")
-            
-            # Aggregate and deduplicate results
-            final_results = self._aggregate_results(endpoint_results)
-            
-            # Limit to requested number of results
-            # Results are already in relevance order from aggregation
-            final_results = final_results[:num_results]
-            
-            end_time = time.time()
-            search_duration = end_time - start_time
-            
-            logger.log_with_context(
-                LogLevel.INFO,
-                "Parallel search completed",
-                {
-                    "duration": f"{search_duration:.2f}s",
-                    "endpoints_queried": len(tasks),
-                    "endpoints_succeeded": successful_endpoints,
-                    "total_results": len(final_results),
-                    "site": site
-                }
-            )
-            
-            return final_results
+                    # For Shopify MCP, always go through the rewrite wrapper
+                    if type(client).__name__ == 'ShopifyMCPClient':
+                        # Extract handler from kwargs for rewriting
+                        handler_for_rewrite = kwargs.pop('handler', None)  # Remove handler from kwargs
+                        # Use the rewrite wrapper for Shopify MCP
+                        task = asyncio.create_task(
+                            search_with_rewrite(client, query, site, num_results, handler_for_rewrite, **kwargs)
+                        )
+                    else:
+                        # Regular search for other backends
+                        # Remove handler from kwargs if present (some backends don't accept it)
+                        search_kwargs = kwargs.copy()
+                        search_kwargs.pop('handler', None)
+                        task = asyncio.create_task(client.search(query, site, num_results, **search_kwargs))
+                tasks.append(task)
+                task_endpoints.append(endpoint_name)
+            except Exception as e:
+                logger.warning(f"Failed to create search task for endpoint {endpoint_name}: {e}")
+        
+        if not tasks:
+            if embedding_task is not None:
+                embedding_task.cancel()
+            raise ValueError("No valid endpoints available for search")
+        
+        return tasks, task_endpoints
+    
+    async def _search_by_vector(self, client, query: str, site: Union[str, List[str]], num_results: int,
+                                vector: Optional[List[float]], embedding_task: Optional[asyncio.Task],
+                                **kwargs) -> List[List[str]]:
+        """
+        Search a vector backend with the shared query embedding. If embedding
+        failed, fall back to the backend's own search so the error is reported
+        per endpoint as before.
+        """
+        if vector is None:
+            try:
+                # Every endpoint awaits the same task, so the query is embedded once
+                vector = await asyncio.shield(embedding_task)
+            except Exception as e:
+                logger.warning(f"Shared query embedding failed ({e}), falling back to per-endpoint search")
+                kwargs.pop('with_scores', None)
+                if site == "all":
+                    return await client.search_all_sites(query, num_results, **kwargs)
+                return await client.search(query, site, num_results, **kwargs)
+        return await client.search_by_vector(vector, site, num_results, **kwargs)
     
     async def search_by_url(self, url: str, endpoint_name: Optional[str] = None, **kwargs) -> Optional[List[str]]:
         """
@@ -848,50 +1622,49 @@ class VectorDBClient:
         """
         # If endpoint is specified and different from current, create a new client for that endpoint
         if endpoint_name and endpoint_name != self.endpoint_name:
-            temp_client = VectorDBClient(endpoint_name=endpoint_name)
+            temp_client = get_vector_db_client(endpoint_name=endpoint_name)
             return await temp_client.search_by_url(url, **kwargs)
         
-        async with self._retrieval_lock:
-            logger.info(f"Retrieving item with URL: {url}")
+        logger.info(f"Retrieving item with URL: {url}")
             
-            try:
-                # For single endpoint mode, use the first (and only) endpoint
-                if self.endpoint_name:
-                    client = await self.get_client(self.endpoint_name)
-                else:
-                    # Multiple endpoints - need to search all of them
-                    for endpoint_name in self.enabled_endpoints:
-                        try:
-                            client = await self.get_client(endpoint_name)
-                            result = await client.search_by_url(url, **kwargs)
-                            if result:
-                                return result
-                        except Exception as e:
-                            logger.warning(f"Failed to search by URL in endpoint {endpoint_name}: {e}")
-                    return None
+        try:
+            # For single endpoint mode, use the first (and only) endpoint
+            if self.endpoint_name:
+                client = await self.get_client(self.endpoint_name)
+            else:
+                # Multiple endpoints - need to search all of them
+                for endpoint_name in self.enabled_endpoints:
+                    try:
+                        client = await self.get_client(endpoint_name)
+                        result = await client.search_by_url(url, **kwargs)
+                        if result:
+                            return result
+                    except Exception as e:
+                        logger.warning(f"Failed to search by URL in endpoint {endpoint_name}: {e}")
+                return None
                 
-                result = await client.search_by_url(url, **kwargs)
+            result = await client.search_by_url(url, **kwargs)
                 
-                if result:
-                    logger.debug(f"Successfully retrieved item for URL: {url}")
-                else:
-                    logger.warning(f"No item found for URL: {url}")
+            if result:
+                logger.debug(f"Successfully retrieved item for URL: {url}")
+            else:
+                logger.warning(f"No item found for URL: {url}")
                 
-                return result
-            except Exception as e:
-                logger.exception(f"Error retrieving item with URL: {url}")
-                logger.log_with_context(
-                    LogLevel.ERROR,
-                    "Item retrieval failed",
-                    {
-                        "error_type": type(e).__name__,
-                        "error_message": str(e),
-                        "url": url,
-                        "db_type": self.db_type,
-                        "endpoint": self.endpoint_name
-                    }
-                )
-                raise
+            return result
+        except Exception as e:
+            logger.exception(f"Error retrieving item with URL: {url}")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Item retrieval failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "url": url,
+                    "db_type": self.db_type,
+                    "endpoint": self.endpoint_name
+                }
+            )
+            raise
     
     async def search_all_sites(self, query: str, num_results: int = 50, 
                              endpoint_name: Optional[str] = None, **kwargs) -> List[List[str]]:
@@ -927,68 +1700,67 @@ class VectorDBClient:
         """
         # If endpoint is specified and different from current, create a new client for that endpoint
         if endpoint_name and endpoint_name != self.endpoint_name:
-            temp_client = VectorDBClient(endpoint_name=endpoint_name)
+            temp_client = get_vector_db_client(endpoint_name=endpoint_name)
             return await temp_client.get_sites(**kwargs)
         
-        async with self._retrieval_lock:
-            logger.info("Retrieving list of sites from database")
+        logger.info("Retrieving list of sites from database")
             
-            try:
-                # For single endpoint mode, use the first (and only) endpoint
-                if self.endpoint_name:
-                    client = await self.get_client(self.endpoint_name)
-                    sites = await client.get_sites(**kwargs)
-                else:
-                    # Multiple endpoints - aggregate sites from all
-                    all_sites = set()
-                    for endpoint_name in self.enabled_endpoints:
-                        try:
-                            client = await self.get_client(endpoint_name)
-                            endpoint_sites = await client.get_sites(**kwargs)
-                            if endpoint_sites:  # Not None and not empty
-                                all_sites.update(endpoint_sites)
-                        except Exception as e:
-                            logger.warning(f"Failed to get sites from endpoint {endpoint_name}: {e}")
-                    sites = list(all_sites)
+        try:
+            # For single endpoint mode, use the first (and only) endpoint
+            if self.endpoint_name:
+                sites = await self._list_endpoint_sites(self.endpoint_name, **kwargs)
+            else:
+                # Multiple endpoints - aggregate sites from all
+                all_sites = set()
+                for endpoint_name in self.enabled_endpoints:
+                    try:
+                        endpoint_sites = await self._list_endpoint_sites(endpoint_name, **kwargs)
+                        if endpoint_sites:  # Not None and not empty
+                            all_sites.update(endpoint_sites)
+                    except Exception as e:
+                        logger.warning(f"Failed to get sites from endpoint {endpoint_name}: {e}")
+                sites = list(all_sites)
                 
-                # If backend doesn't support get_sites, it should return None
-                if sites is None:
-                    # Return empty list to indicate unknown sites
-                    logger.info(f"Backend doesn't support get_sites, will query for all sites")
-                    return []
+            # If backend doesn't support get_sites, it should return None
+            if sites is None:
+                # Return empty list to indicate unknown sites
+                logger.info(f"Backend doesn't support get_sites, will query for all sites")
+                return []
                 
-                logger.log_with_context(
-                    LogLevel.INFO,
-                    "Sites retrieved",
-                    {
-                        "sites_count": len(sites),
-                        "db_type": self.db_type,
-                        "endpoint": self.endpoint_name
-                    }
-                )
-                return sites
-            except Exception as e:
-                # Backend doesn't support get_sites or error occurred
-                logger.info(f"Backend doesn't support get_sites or error occurred: {e}")
+            logger.log_with_context(
+                LogLevel.INFO,
+                "Sites retrieved",
+                {
+                    "sites_count": len(sites),
+                    "db_type": self.db_type,
+                    "endpoint": self.endpoint_name
+                }
+            )
+            return sites
+        except Exception as e:
+            # Backend doesn't support get_sites or error occurred
+            logger.info(f"Backend doesn't support get_sites or error occurred: {e}")
                 
-                # Return empty list to indicate unknown sites (will be queried for all)
-                logger.log_with_context(
-                    LogLevel.INFO,
-                    "Backend doesn't support get_sites, will query for all sites",
-                    {
-                        "db_type": self.db_type,
-                        "endpoint": self.endpoint_name,
-                        "error": str(e)
-                    }
-                )
-                return []
+            # Return empty list to indicate unknown sites (will be queried for all)
+            logger.log_with_context(
+                LogLevel.INFO,
+                "Backend doesn't support get_sites, will query for all sites",
+                {
+                    "db_type": self.db_type,
+                    "endpoint": self.endpoint_name,
+                    "error": str(e)
+                }
+            )
+            return []
 
 
 # Factory function to make it easier to get a client with the right type
 def get_vector_db_client(endpoint_name: Optional[str] = None, 
                         query_params: Optional[Dict[str, Any]] = None) -> VectorDBClient:
     """
-    Factory function to create a vector database client with the appropriate configuration.
+    Factory function to get a vector database client with the appropriate configuration.
+    Clients are shared: every call with the same endpoint (after any development-mode
+    override from query_params) returns the same instance.
     
     Args:
         endpoint_name: Optional name of the endpoint to use
@@ -997,7 +1769,34 @@ def get_vector_db_client(endpoint_name: Optional[str] = None,
     Returns:
         Configured VectorDBClient instance
     """
-    return VectorDBClient(endpoint_name=endpoint_name, query_params=query_params)
+    resolved_endpoint = VectorDBClient._resolve_endpoint_name(endpoint_name, query_params)
+    if not isinstance(resolved_endpoint, (str, type(None))) or not isinstance(endpoint_name, (str, type(None))):
+        # Let the constructor report the invalid endpoint
+        return VectorDBClient(endpoint_name=endpoint_name, query_params=query_params)
+    key = (endpoint_name, resolved_endpoint)
+    with _vector_db_clients_lock:
+        client = _vector_db_clients.get(key)
+        if client is None:
+            client = VectorDBClient(endpoint_name=endpoint_name, query_params=query_params)
+            _vector_db_clients[key] = client
+        return client
+
+
+def get_retrieval_stats() -> Dict[str, Any]:
+    """Return the shared VectorDBClients, the site catalog of each endpoint and result cache counters."""
+    with _vector_db_clients_lock:
+        clients = [
+            {"endpoint": endpoint_name, "endpoints": list(client.enabled_endpoints)}
+            for (endpoint_name, _), client in _vector_db_clients.items()
+        ]
+    cache = _get_retrieval_cache()
+    return {
+        "clients": clients,
+        "site_catalog": _get_site_catalog().get_stats(),
+        "cache": {"enabled": False} if cache is None else {"enabled": True, **cache.get_stats()},
+        "in_flight": _inflight_searches.in_flight(),
+        "coalesced": _inflight_searches.coalesced,
+    }
 
 
 async def search_with_rewrite(client: VectorDBClientInterface, query: str, site: Union[str, List[str]], 
@@ -1115,22 +1914,99 @@ async def search(query: str,
     results = await client.search(query, site, num_results, **kwargs)
     
     # Send retrieval count message if handler is provided
+    await _send_retrieval_count(handler, query, site, len(results), num_results)
+    
+    return results
+
+
+async def search_many(queries: List[str],
+                      site: str = "all",
+                      num_results: int = 50,
+                      endpoint_name: Optional[str] = None,
+                      query_params: Optional[Dict[str, Any]] = None,
+                      handler: Optional[Any] = None,
+                      **kwargs) -> List[List[RetrievedItem]]:
+    """
+    Multi-query counterpart of search: embeds the queries in one call and
+    searches each backend for all of them in one round-trip where it can.
+    
+    Args:
+        queries: The search queries
+        site: Site to search in (default: "all")
+        num_results: Number of results to return per query (default: 50)
+        endpoint_name: Optional name of the endpoint to use
+        query_params: Optional query parameters for overriding endpoint
+        handler: Optional handler with http_handler for sending messages
+        **kwargs: Additional parameters passed to VectorDBClient.search_many
+        
+    Returns:
+        One list of search results per query
+        
+    Example:
+        results = await search_many(["pasta", "risotto"], site="seriouseats", num_results=10)
+    """
+    client = get_vector_db_client(endpoint_name=endpoint_name, query_params=query_params)
+    if handler:
+        kwargs['handler'] = handler
+    results = await client.search_many(queries, site, num_results, **kwargs)
+    
+    for query, query_results in zip(queries, results):
+        await _send_retrieval_count(handler, query, site, len(query_results), num_results)
+    
+    return results
+
+
+async def _send_retrieval_count(handler: Optional[Any], query: str, site: str, count: int, requested_count: int):
     if handler and hasattr(handler, 'http_handler') and hasattr(handler.http_handler, 'write_stream'):
         retrieval_message = {
             "message_type": "retrieval_count",
             "query": query,
             "site": site,
-            "count": len(results),
-            "requested_count": num_results,
+            "count": count,
+            "requested_count": requested_count,
             "query_id": getattr(handler, 'query_id', None)
         }
         try:
             await handler.http_handler.write_stream(retrieval_message)
-            logger.info(f"Sent retrieval count message: {len(results)} results for query '{query}' on site '{site}'")
+            logger.info(f"Sent retrieval count message: {count} results for query '{query}' on site '{site}'")
         except Exception as e:
             logger.warning(f"Failed to send retrieval count message: {e}")
+
+
+async def search_stream(query: str,
+                        site: str = "all",
+                        num_results: int = 50,
+                        query_params: Optional[Dict[str, Any]] = None,
+                        handler: Optional[Any] = None,
+                        **kwargs) -> RetrievalStream:
+    """
+    Streaming counterpart of search: starts the search and returns a
+    RetrievalStream that yields items as each endpoint answers.
     
-    return results
+    Args:
+        query: The search query
+        site: Site to search in (default: "all")
+        num_results: Number of results to return (default: 50)
+        query_params: Optional query parameters for overriding endpoint
+        handler: Optional handler with http_handler for sending messages
+        **kwargs: Additional parameters passed to VectorDBClient.search_stream
+        
+    Returns:
+        RetrievalStream over lists of new items
+        
+    Example:
+        stream = await search_stream("climate change", site="example.com")
+        async for items in stream:
+            ...
+    """
+    client = get_vector_db_client(query_params=query_params)
+    if handler:
+        kwargs['handler'] = handler
+    stream = await client.search_stream(query, site, num_results, **kwargs)
+    if handler:
+        stream.on_finished = lambda items: asyncio.ensure_future(
+            _send_retrieval_count(handler, query, site, len(items), num_results))
+    return stream
 
 
 async def search_all_sites(query: str,
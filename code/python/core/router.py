@@ -16,9 +16,9 @@ import os
 import json
 import time
 from misc.logger.logging_config_helper import get_configured_logger
-from core.llm import ask_llm
+from core.llm import ask_llm, PRIORITY_HIGH
 from core.config import CONFIG
-from core.prompts import fill_prompt
+from core.prompts import fill_prompt_parts, register_prompt_layout
 logger = get_configured_logger("tool_selector")
 
 @dataclass
@@ -83,6 +83,9 @@ def _load_tools_from_file(tools_xml_path: str) -> List[Tool]:
                 # Parse prompt
                 prompt_elem = tool_elem.find('prompt')
                 prompt = prompt_elem.text.strip() if prompt_elem is not None and prompt_elem.text else ""
+                if prompt_elem is not None and prompt_elem.get('suffixVariables'):
+                    # Send the tool's instructions as a cacheable prefix, the query last
+                    register_prompt_layout(prompt, [v.strip() for v in prompt_elem.get('suffixVariables').split(',')])
                 
                 # Parse return structure
                 return_struc_elem = tool_elem.find('returnStruc')
@@ -401,13 +404,13 @@ class ToolSelector:
             return {"tool": tool, "score": 0, "justification": "No prompt defined"}
         
         # Fill prompt using the proper mechanism that includes all context
-        filled_prompt = fill_prompt(tool.prompt, self.handler)
+        filled_prompt, prompt_suffix = fill_prompt_parts(tool.prompt, self.handler)
         
         try:
             # Use high level for all tools to ensure fair evaluation timing
             level = "high"
             start_time = time.time()
-            response = await ask_llm(filled_prompt, tool.return_structure, level=level, query_params=self.handler.query_params)
+            response = await ask_llm(filled_prompt, tool.return_structure, level=level, query_params=self.handler.query_params, prompt_name=f"Tool:{tool.name}", priority=PRIORITY_HIGH, prompt_suffix=prompt_suffix)
             end_time = time.time()
             elapsed_time = end_time - start_time
             
@@ -1,5 +1,6 @@
 # state.py
 import asyncio
+from core.utils.task_group import FAST_TRACK_LANE
 
 class NLWebHandlerState:
 
@@ -24,6 +25,8 @@ class NLWebHandlerState:
                 self._decon_event.set()
             elif step_name == "ToolSelector":
                 self._tool_router_event.set()
+            # A finished step may have set an abort condition, stop fast track ranking right away
+            self.abort_fast_track_if_needed()
             # Check if all steps are done
             if all(state == self.__class__.DONE for state in self.precheck_step_state.values()):
                 self.handler.pre_checks_done_event.set()
@@ -104,10 +107,12 @@ class NLWebHandlerState:
     
     def abort_fast_track_if_needed(self):
         """
-        Check all abort conditions and set the abort event if needed.
+        Check all abort conditions and set the abort event if needed. Fast track
+        ranking calls still in flight are cancelled.
         Returns True if fast track was aborted, False otherwise.
         """
         if self.should_abort_fast_track():
             self.handler.abort_fast_track_event.set()
+            self.handler.task_group.cancel(FAST_TRACK_LANE, reason="fast track aborted")
             return True
         return False
\ No newline at end of file
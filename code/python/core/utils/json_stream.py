@@ -0,0 +1,141 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Incremental parsing of a JSON object that arrives in chunks, as it does when an
+LLM completion is streamed. Each top-level field is reported as soon as its value
+is complete, so a caller can act on e.g. "score" before the description that
+follows it has been generated.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import json
+from typing import Any, Dict
+
+# Parser states
+_BEFORE_OBJECT = 0
+_EXPECT_KEY = 1
+_IN_KEY = 2
+_EXPECT_COLON = 3
+_EXPECT_VALUE = 4
+_IN_VALUE = 5
+_AFTER_VALUE = 6
+_DONE = 7
+
+
+class IncrementalJSONParser:
+    """
+    Extracts the top-level fields of the first JSON object in a stream of text.
+
+    Anything before the opening brace (markdown fences, preambles) is skipped.
+    Nested objects and arrays are reported as a whole once they close. Values
+    that fail to parse are dropped; the final, complete text should still be
+    parsed with the provider's clean_response.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self._state = _BEFORE_OBJECT
+        self._token = []
+        self._key = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> Dict[str, Any]:
+        """Consume the next chunk and return the fields completed by it."""
+        completed = {}
+        for ch in text:
+            if self._state == _DONE:
+                break
+            self._consume(ch, completed)
+        return completed
+
+    def _consume(self, ch: str, completed: Dict[str, Any]):
+        state = self._state
+        if state == _BEFORE_OBJECT:
+            if ch == "{":
+                self._state = _EXPECT_KEY
+        elif state == _EXPECT_KEY:
+            if ch == '"':
+                self._token = [ch]
+                self._escape = False
+                self._state = _IN_KEY
+            elif ch == "}":
+                self._state = _DONE
+        elif state == _IN_KEY:
+            self._token.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                try:
+                    self._key = json.loads("".join(self._token))
+                except ValueError:
+                    self._key = None
+                self._state = _EXPECT_COLON
+        elif state == _EXPECT_COLON:
+            if ch == ":":
+                self._state = _EXPECT_VALUE
+        elif state == _EXPECT_VALUE:
+            if not ch.isspace():
+                self._token = []
+                self._depth = 0
+                self._in_string = False
+                self._escape = False
+                self._state = _IN_VALUE
+                self._consume_value(ch, completed)
+        elif state == _IN_VALUE:
+            self._consume_value(ch, completed)
+        elif state == _AFTER_VALUE:
+            if ch == ",":
+                self._state = _EXPECT_KEY
+            elif ch == "}":
+                self._state = _DONE
+
+    def _consume_value(self, ch: str, completed: Dict[str, Any]):
+        if self._in_string:
+            self._token.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._depth == 0:
+                    self._finish_value(completed)
+            return
+
+        if self._depth == 0 and self._token and (ch in ",}" or ch.isspace()):
+            # End of a number, true, false or null; the delimiter belongs to the object
+            self._finish_value(completed)
+            self._consume(ch, completed)
+            return
+
+        self._token.append(ch)
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._finish_value(completed)
+
+    def _finish_value(self, completed: Dict[str, Any]):
+        self._state = _AFTER_VALUE
+        if self._key is None:
+            return
+        try:
+            value = json.loads("".join(self._token))
+        except ValueError:
+            return
+        self.fields[self._key] = value
+        completed[self._key] = value
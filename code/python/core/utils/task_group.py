@@ -0,0 +1,104 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Per-request ownership of background LLM work. Every ranking task a handler
+spawns is registered with its task group under a lane, so that a client
+disconnect, a fast track abort or reaching the result limit can cancel the
+outstanding work (and the provider HTTP requests behind it) instead of letting
+it run to completion for answers nobody will read.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+from typing import Callable, Coroutine, Dict, Optional, Set
+
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("task_group")
+
+# Lanes used by the ranking stage
+FAST_TRACK_LANE = "fast_track"
+REGULAR_TRACK_LANE = "regular_track"
+DEFAULT_LANE = "default"
+
+# How often the connection watchdog checks whether the client is still there
+WATCH_INTERVAL = 0.25
+
+
+class RequestTaskGroup:
+    """
+    Tasks owned by one request, grouped in lanes that can be cancelled
+    independently. Unlike asyncio.TaskGroup, a failing task does not cancel
+    its siblings; cancellation is always an explicit decision of the handler.
+    """
+
+    def __init__(self, name: str = "request"):
+        self.name = name
+        self._lanes: Dict[str, Set[asyncio.Task]] = {}
+        self._watchdog: Optional[asyncio.Task] = None
+        self.cancelled = 0
+
+    def create_task(self, coro: Coroutine, lane: str = DEFAULT_LANE) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        tasks = self._lanes.setdefault(lane, set())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return task
+
+    def pending(self, lane: Optional[str] = None) -> int:
+        lanes = [lane] if lane is not None else list(self._lanes)
+        return sum(1 for name in lanes for task in self._lanes.get(name, ()) if not task.done())
+
+    def cancel(self, lane: Optional[str] = None, reason: str = "",
+               exclude: Optional[asyncio.Task] = None) -> int:
+        """
+        Cancel the unfinished tasks of one lane, or of every lane when lane is None.
+        The exclude task (usually the caller's own task) is left running.
+        Returns the number of tasks cancelled.
+        """
+        lanes = [lane] if lane is not None else list(self._lanes)
+        count = 0
+        for name in lanes:
+            for task in list(self._lanes.get(name, ())):
+                if task is exclude or task.done():
+                    continue
+                task.cancel()
+                count += 1
+        if count:
+            self.cancelled += count
+            logger.info(f"{self.name}: cancelled {count} tasks in {lane or 'all lanes'}"
+                        + (f" ({reason})" if reason else ""))
+        return count
+
+    def watch(self, is_alive: Callable[[], bool], on_lost: Callable[[], None],
+              interval: float = WATCH_INTERVAL):
+        """
+        Poll is_alive in the background and call on_lost once when it turns False.
+        Disconnects are usually only noticed on the next write, which can be many
+        seconds away while ranking is in flight.
+        """
+        if self._watchdog is not None and not self._watchdog.done():
+            return
+
+        async def watchdog():
+            while is_alive():
+                await asyncio.sleep(interval)
+            on_lost()
+
+        self._watchdog = asyncio.create_task(watchdog())
+
+    async def close(self):
+        """Stop the watchdog and cancel whatever is still running."""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            try:
+                await self._watchdog
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.debug(f"{self.name}: watchdog error: {e}")
+            self._watchdog = None
+        self.cancel(reason="request finished")
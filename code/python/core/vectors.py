@@ -0,0 +1,96 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Compact representation of embedding vectors. A list of Python floats costs
+about 32 bytes per dimension; embeddings are kept as float32 numpy arrays, or
+as array('f') buffers when numpy isn't installed, at 4 bytes per dimension.
+Helpers convert to lists for JSON-based clients and to little-endian float32
+bytes for binary transfer. Sparse embeddings (dicts of token weights, from some
+Elasticsearch models) pass through unchanged.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, List, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Vector = Union["np.ndarray", array, List[float], Dict[str, float]]
+
+
+def as_vector(values: Any) -> Vector:
+    """Float32 copy of values, or values itself if it already is one."""
+    if isinstance(values, dict):
+        return values
+    if np is not None:
+        return np.asarray(values, dtype=np.float32)
+    if isinstance(values, array) and values.typecode == "f":
+        return values
+    return array("f", values)
+
+
+def as_list(vector: Vector) -> Union[List[float], Dict[str, float]]:
+    """Plain Python floats, for clients that serialize to JSON."""
+    if isinstance(vector, (list, dict)):
+        return vector
+    return vector.tolist()
+
+
+def copy_vector(vector: Vector) -> Vector:
+    if isinstance(vector, array):
+        return vector[:]
+    return vector.copy()
+
+
+def has_values(vector: Any) -> bool:
+    """True for a non-empty vector; numpy arrays can't be tested for truth directly."""
+    return vector is not None and len(vector) > 0
+
+
+def format_vector(vector: Vector) -> str:
+    """Compact "[x,y,...]" text form, with enough digits to restore each float32 exactly."""
+    return "[" + ",".join(["%.9g" % x for x in as_list(vector)]) + "]"
+
+
+def parse_vector(text: str) -> Vector:
+    """Inverse of format_vector; also reads the str() of a list of floats."""
+    parts = text.strip().strip("[]").split(",")
+    if np is not None:
+        return np.array(parts, dtype=np.float32)
+    return array("f", map(float, parts))
+
+
+def to_bytes(vector: Vector) -> bytes:
+    """Little-endian float32 bytes."""
+    if np is not None:
+        return np.asarray(vector, dtype="<f4").tobytes()
+    buffer = array("f", vector)
+    if sys.byteorder != "little":
+        buffer.byteswap()
+    return buffer.tobytes()
+
+
+def from_bytes(data: bytes) -> Vector:
+    if np is not None:
+        return np.frombuffer(data, dtype="<f4").astype(np.float32)
+    buffer = array("f")
+    buffer.frombytes(data)
+    if sys.byteorder != "little":
+        buffer.byteswap()
+    return buffer
+
+
+def vector_nbytes(vector: Vector) -> int:
+    """Memory held by the vector's values."""
+    if isinstance(vector, array):
+        return vector.itemsize * len(vector)
+    if np is not None and isinstance(vector, np.ndarray):
+        return vector.nbytes
+    return sys.getsizeof(vector) + sum(sys.getsizeof(x) for x in vector)
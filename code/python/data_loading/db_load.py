@@ -19,7 +19,8 @@ from urllib.parse import urlparse
 from typing import List, Dict, Any, Tuple, Union, Optional
 
 from core.config import CONFIG
-from core.embedding import batch_get_embeddings
+from core.embedding import batch_get_embeddings, close_embedding_clients
+from core.vectors import format_vector
 from data_loading.db_load_utils import (
     read_file_lines,
     prepare_documents_from_json,
@@ -856,7 +857,10 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
                             print(f"Computing embeddings for batch of {len(batch_texts)} texts")
                             
                             # Compute embeddings for the batch
-                            embeddings = await batch_get_embeddings(batch_texts, provider, model)
+                            embeddings = await batch_get_embeddings(
+                                batch_texts, provider, model,
+                                use_store=True, force_recompute=force_recompute
+                            )
                             
                             # Add embeddings to documents
                             docs_with_embeddings = []
@@ -869,7 +873,7 @@ async def loadJsonToDB(file_path: str, site: str, batch_size: int = 100, delete_
                                     doc["embedding"] = embedding
                                     
                                     # Format embedding as string - ensure no newlines
-                                    embedding_str = str(embedding).replace(' ', '').replace('\n', '')
+                                    embedding_str = format_vector(embedding)
                                     
                                     # Ensure JSON has no newlines
                                     doc_json = doc['schema_json'].replace('\n', ' ')
@@ -1007,7 +1011,10 @@ async def loadUrlListToDB(file_path: str, site: str, batch_size: int = 100, dele
                                 batch_texts = [doc["schema_json"] for doc in batch_docs]
                                 
                                 # Compute embeddings
-                                embeddings = await batch_get_embeddings(batch_texts, provider, model)
+                                embeddings = await batch_get_embeddings(
+                                    batch_texts, provider, model,
+                                    use_store=True, force_recompute=force_recompute
+                                )
                                 
                                 # Add embeddings to documents
                                 docs_with_embeddings = []
@@ -1196,5 +1203,12 @@ async def main():
     # Normal processing mode
     await process_normal_path(args.file_path, args.site, args.batch_size, args.delete_site, args.force_recompute, args.database)
 
+async def run_main():
+    """Run main and close pooled embedding connections before the event loop ends."""
+    try:
+        await main()
+    finally:
+        await close_embedding_clients()
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(run_main())
\ No newline at end of file
@@ -10,6 +10,7 @@ import numpy as np
 from typing import List, Dict, Any, Optional, Tuple, Union
 from core.config import CONFIG
 from core.utils.trim_schema_json import trim_schema_json
+from core.vectors import as_vector, parse_vector
 
 # Item type categorization
 SKIP_TYPES = ["ItemList", "ListItem", "AboutPage", "WebPage", "WebSite", "Person"]
@@ -219,8 +220,8 @@ def documents_from_csv_line(line, site):
     """
     try:
         url, json_data, embedding_str = line.strip().split('\t')
-        embedding_str = embedding_str.replace("[", "").replace("]", "") 
-        embedding = [float(x) for x in embedding_str.split(',')]
+        # float32, a fraction of the memory of a list of floats
+        embedding = parse_vector(embedding_str)
         js = json.loads(json_data)
         js = trim_schema_json(js, site)
     except Exception as e:
@@ -259,7 +260,7 @@ def documents_from_csv_line(line, site):
             if value is None:
                 print(f"Warning: None value found for field '{key}' in document")
                 if key == "embedding":
-                    doc[key] = []
+                    doc[key] = as_vector([])
                 else:
                     doc[key] = ""
         
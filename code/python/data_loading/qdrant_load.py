@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from core.config import CONFIG
 from core.retriever import upload_documents as upload_documents_wrapper, get_vector_db_client
+from core.vectors import has_values
 
 # Default collection name and embedding size
 COLLECTION_NAME = "nlweb_collection"
@@ -44,7 +45,7 @@ def get_documents_from_csv(csv_file_path, site):
 async def upload_documents_to_database(documents: List[Dict[str, Any]], database: str = None):
     """Upload documents to the configured write endpoint or specified database"""
     # Filter out documents without embeddings
-    valid_documents = [doc for doc in documents if "embedding" in doc and doc["embedding"]]
+    valid_documents = [doc for doc in documents if has_values(doc.get("embedding"))]
     
     if not valid_documents:
         print("No documents with embeddings to upload")
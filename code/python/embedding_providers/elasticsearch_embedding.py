@@ -4,11 +4,18 @@
 """
 Elasticsearch embedding implementation.
 
+get_shared_embedding_client returns one client per endpoint for the whole
+process, so connections (and their TLS sessions) are kept alive across queries
+and loader batches, and the inference endpoint's task type is looked up once.
+close_shared_embedding_clients closes them on shutdown.
+
 WARNING: This code is under development and may undergo changes in future releases.
 Backwards compatibility is not guaranteed at this time.
 """
 
-from typing import List, Optional, Union, Dict
+import asyncio
+import threading
+from typing import List, Optional, Union, Dict, Tuple
 
 from elasticsearch import AsyncElasticsearch, NotFoundError
 from core.config import CONFIG
@@ -16,8 +23,12 @@ from core.config import CONFIG
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 logger = get_configured_logger("elasticsearch_embedding")
 
+# Connections kept open to each Elasticsearch node by a client
+DEFAULT_CONNECTIONS_PER_NODE = 10
+
 class ElasticsearchEmbedding:
-    def __init__(self,  endpoint_name: Optional[str] = None):
+    def __init__(self,  endpoint_name: Optional[str] = None,
+                 connections_per_node: int = DEFAULT_CONNECTIONS_PER_NODE):
         self.endpoint_name = endpoint_name or CONFIG.preferred_embedding_provider
         embedding_config = CONFIG.embedding_providers[self.endpoint_name]
         self._model = embedding_config.model
@@ -46,13 +57,17 @@ class ElasticsearchEmbedding:
         if embedding_config.endpoint is None:
             raise ValueError("The ELASTICSEARCH_URL environment variable is empty")
         
-        self._client = self._initialize_client(embedding_config.endpoint, embedding_config.api_key)
+        self._client = self._initialize_client(embedding_config.endpoint, embedding_config.api_key,
+                                               connections_per_node)
         
-    def _initialize_client(self, endpoint:str, api_key:str)-> AsyncElasticsearch:
+    def _initialize_client(self, endpoint:str, api_key:str,
+                           connections_per_node: int = DEFAULT_CONNECTIONS_PER_NODE)-> AsyncElasticsearch:
         """Initialize the Elasticsearch client"""
         try:
             logger.info(f"Initializing Elasticsearch embedding client for endpoint: {self.endpoint_name}")
-            return AsyncElasticsearch(hosts=endpoint, api_key=api_key)
+            # Connections are pooled and kept alive by the transport between requests
+            return AsyncElasticsearch(hosts=endpoint, api_key=api_key,
+                                      connections_per_node=connections_per_node)
         except Exception as e:
             logger.exception(f"Failed to initialize Elasticsearch embedding client: {str(e)}")
             raise
@@ -190,3 +205,39 @@ class ElasticsearchEmbedding:
         except Exception as e:
             logger.exception(f"Failed to get batch embeddings: {str(e)}")
             raise
+
+
+# Process-wide clients, keyed by endpoint name, with the event loop each was created on
+_shared_clients: Dict[str, Tuple[ElasticsearchEmbedding, asyncio.AbstractEventLoop]] = {}
+_shared_clients_lock = threading.Lock()
+
+def get_shared_embedding_client(endpoint_name: Optional[str] = None) -> ElasticsearchEmbedding:
+    """
+    Return the shared client for the endpoint, creating it on first use.
+    Must be called from a running event loop; the client's connections belong
+    to that loop, so a client created under another loop (e.g. an earlier
+    asyncio.run in a script) is replaced.
+    """
+    endpoint_name = endpoint_name or CONFIG.preferred_embedding_provider
+    loop = asyncio.get_running_loop()
+    with _shared_clients_lock:
+        entry = _shared_clients.get(endpoint_name)
+        if entry is not None and entry[1] is loop and entry[0]._client is not None:
+            return entry[0]
+        if entry is not None and not entry[1].is_closed() and entry[1] is not loop:
+            logger.warning(f"Elasticsearch embedding client for {endpoint_name} was created on another event loop, replacing it")
+        client = ElasticsearchEmbedding(endpoint_name)
+        _shared_clients[endpoint_name] = (client, loop)
+        return client
+
+async def close_shared_embedding_clients():
+    """Close the shared clients created on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _shared_clients_lock:
+        entries = list(_shared_clients.items())
+        for endpoint_name, (_, client_loop) in entries:
+            if client_loop is loop or client_loop.is_closed():
+                del _shared_clients[endpoint_name]
+    for _, (client, client_loop) in entries:
+        if client_loop is loop:
+            await client.close()
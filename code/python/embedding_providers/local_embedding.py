@@ -0,0 +1,234 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Local embedding implementation that runs without network access.
+
+Loads a sentence embedding model exported to ONNX from a local directory
+(model.onnx and tokenizer.json, as written by optimum or sentence-transformers)
+and runs it with onnxruntime on the CPU. When no model directory is
+configured, a hashing vectorizer is used instead: no model files are needed and
+the vectors are good enough for offline tests and benchmarks, though not for
+real relevance. A configured directory that can't be loaded is an error rather
+than a silent switch to hashing, since both kinds of vector would be cached and
+stored under the same provider and model. Loading and inference run in a
+thread pool so the event loop keeps serving requests.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from core.config import CONFIG
+from core.vectors import Vector, as_vector
+
+from misc.logger.logging_config_helper import get_configured_logger, LogLevel
+
+logger = get_configured_logger("local_embedding")
+
+DEFAULT_DIMENSIONS = 384
+DEFAULT_MAX_LENGTH = 256
+DEFAULT_WORKERS = 2
+
+# Loaded models by (model directory, model name), and the pool that runs them
+_models: Dict[tuple, Any] = {}
+_models_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddingModel:
+    """
+    Signed feature hashing of word unigrams and bigrams into a fixed number of
+    dimensions, with log-scaled counts and L2 normalization. Deterministic
+    across processes, so stored vectors stay comparable with query vectors.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _bucket(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimensions, 1.0 if value >> 63 else -1.0
+
+    def embed_one(self, text: str) -> Vector:
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        counts: Dict[str, int] = {}
+        for i, token in enumerate(tokens):
+            counts[token] = counts.get(token, 0) + 1
+            if i:
+                bigram = tokens[i - 1] + " " + token
+                counts[bigram] = counts.get(bigram, 0) + 1
+        values = [0.0] * self.dimensions
+        for feature, count in counts.items():
+            index, sign = self._bucket(feature)
+            values[index] += sign * (1.0 + math.log(count))
+        norm = math.sqrt(sum(x * x for x in values))
+        if norm:
+            values = [x / norm for x in values]
+        return as_vector(values)
+
+    def embed(self, texts: List[str]) -> List[Vector]:
+        return [self.embed_one(text) for text in texts]
+
+
+class OnnxEmbeddingModel:
+    """
+    Transformer encoder exported to ONNX, mean-pooled over the attention mask
+    and L2 normalized, as sentence-transformers does for MiniLM/E5/BGE models.
+    """
+
+    def __init__(self, model_dir: str, max_length: int = DEFAULT_MAX_LENGTH, threads: int = 0):
+        import numpy as np
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self._np = np
+        model_file = os.path.join(model_dir, "model.onnx")
+        if not os.path.exists(model_file):
+            model_file = os.path.join(model_dir, "onnx", "model.onnx")
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            model_file, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.dimensions = self.session.get_outputs()[0].shape[-1]
+
+    def embed(self, texts: List[str]) -> List[Vector]:
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, inputs)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return [row.astype(np.float32) for row in pooled]
+
+
+def _provider_options() -> Dict[str, Any]:
+    provider_config = CONFIG.get_embedding_provider("local")
+    return (provider_config.config if provider_config and provider_config.config else {}) or {}
+
+
+def _get_model_dir() -> Optional[str]:
+    provider_config = CONFIG.get_embedding_provider("local")
+    return provider_config.model_path if provider_config else None
+
+
+def get_local_model(model: Optional[str] = None):
+    """
+    Load, once per process, the model in the configured directory, or the
+    hashing vectorizer when no directory is configured. Blocks while an ONNX
+    model loads, so call it from the executor rather than the event loop.
+
+    Raises:
+        ValueError: If model_path is set but the model can't be loaded
+    """
+    model_dir = _get_model_dir()
+    options = _provider_options()
+    with _models_lock:
+        key = (model_dir, model)
+        if key in _models:
+            return _models[key]
+        if model_dir:
+            if not os.path.isdir(model_dir):
+                raise ValueError(f"Local model directory {model_dir} not found")
+            try:
+                loaded = OnnxEmbeddingModel(
+                    model_dir,
+                    max_length=options.get("max_length", DEFAULT_MAX_LENGTH),
+                    threads=options.get("threads", 0)
+                )
+            except ImportError as e:
+                raise ValueError(f"onnxruntime and tokenizers are needed to load {model_dir} ({e})") from e
+            except Exception as e:
+                raise ValueError(f"Could not load ONNX model from {model_dir} "
+                                 f"({type(e).__name__}: {e})") from e
+            logger.info(f"Loaded ONNX embedding model from {model_dir}, dimension: {loaded.dimensions}")
+        else:
+            loaded = HashingEmbeddingModel(options.get("dimensions", DEFAULT_DIMENSIONS))
+            logger.info(f"No model_path configured, using hashing embeddings, dimension: {loaded.dimensions}")
+        _models[key] = loaded
+        return loaded
+
+
+def _embed(model: Optional[str], texts: List[str]) -> List[Vector]:
+    return get_local_model(model).embed(texts)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = _provider_options().get("workers", DEFAULT_WORKERS)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="local-embedding")
+        return _executor
+
+
+async def get_local_batch_embeddings(
+    texts: List[str], model: Optional[str] = None
+) -> List[Vector]:
+    """
+    Generate embeddings for multiple texts with the local model.
+
+    Args:
+        texts: List of texts to embed
+        model: The model name to use (optional); a label, the model comes from model_path
+
+    Returns:
+        List of embedding vectors, each float32
+    """
+    logger.debug(f"Generating local batch embeddings, batch size: {len(texts)}")
+    try:
+        loop = asyncio.get_running_loop()
+        embeddings = await loop.run_in_executor(_get_executor(), _embed, model, list(texts))
+        logger.debug(f"Local batch embeddings generated, count: {len(embeddings)}")
+        return embeddings
+    except Exception as e:
+        logger.exception("Error generating local batch embeddings")
+        logger.log_with_context(
+            LogLevel.ERROR,
+            "Local batch embedding generation failed",
+            {
+                "model": model,
+                "batch_size": len(texts),
+                "error_type": type(e).__name__,
+                "error_message": str(e),
+            },
+        )
+        raise
+
+
+async def get_local_embedding(text: str, model: Optional[str] = None) -> Vector:
+    """Generate an embedding for one text with the local model."""
+    embeddings = await get_local_batch_embeddings([text], model=model)
+    return embeddings[0]
+
+
+def close_local_embedding():
+    """Stop the inference threads; a later call starts a new pool."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
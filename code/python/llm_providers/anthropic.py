@@ -13,7 +13,7 @@ import json
 import re
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 
 from anthropic import AsyncAnthropic
 from core.config import CONFIG
@@ -29,9 +29,16 @@ class ConfigurationError(RuntimeError):
     pass
 
 
+SYSTEM_PROMPT = "You are a helpful assistant that always responds with valid JSON matching the provided schema."
+
+# Marks the end of a prefix that Anthropic should cache
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
 class AnthropicProvider(LLMProvider):
     """Implementation of LLMProvider for Anthropic API."""
     
+    supports_prompt_suffix = True
     _client_lock = threading.Lock()
     _client = None
     
@@ -60,10 +67,20 @@ class AnthropicProvider(LLMProvider):
         return cls._client
 
     @classmethod
-    def _build_messages(cls, prompt: str, schema: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _build_messages(cls, prompt: str, schema: Dict[str, Any],
+                        prompt_suffix: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Construct the message sequence for JSON-schema enforcement.
+        Construct the message sequence for JSON-schema enforcement. With a
+        prompt_suffix, the prompt is sent as a cached prefix block followed
+        by the suffix block.
         """
+        if prompt_suffix:
+            content = [
+                {"type": "text", "text": prompt, "cache_control": CACHE_CONTROL},
+                {"type": "text", "text": prompt_suffix}
+            ]
+        else:
+            content = prompt
         return [
             {
                 "role": "assistant",
@@ -71,7 +88,7 @@ class AnthropicProvider(LLMProvider):
             },
             {
                 "role": "user",
-                "content": prompt
+                "content": content
             }
         ]
 
@@ -107,7 +124,7 @@ class AnthropicProvider(LLMProvider):
             model = provider_config.models.high
         
         client = self.get_client()
-        messages = self._build_messages(prompt, schema)
+        messages = self._build_messages(prompt, schema, kwargs.get("prompt_suffix"))
 
         try:
             response = await asyncio.wait_for(
@@ -116,7 +133,7 @@ class AnthropicProvider(LLMProvider):
                     messages=messages,
                     max_tokens=max_tokens,
                     temperature=temperature,
-                    system=f"You are a helpful assistant that always responds with valid JSON matching the provided schema."
+                    system=SYSTEM_PROMPT
                 ),
                 timeout
             )
@@ -128,6 +145,44 @@ class AnthropicProvider(LLMProvider):
         content = response.content[0].text
         return self.clean_response(content)
 
+    async def get_completion_stream(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 2048,
+        timeout: float = 30.0,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the response text from Anthropic as it is generated.
+        """
+        if model is None:
+            provider_config = CONFIG.llm_endpoints["anthropic"]
+            model = provider_config.models.high
+        
+        client = self.get_client()
+        messages = self._build_messages(prompt, schema, kwargs.get("prompt_suffix"))
+
+        stream = await asyncio.wait_for(
+            client.messages.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=SYSTEM_PROMPT,
+                stream=True
+            ),
+            timeout
+        )
+        try:
+            async for event in stream:
+                if event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                    yield event.delta.text
+        finally:
+            await stream.close()
+
 
 # Create a singleton instance
 provider = AnthropicProvider()
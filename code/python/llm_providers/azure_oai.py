@@ -13,7 +13,7 @@ from openai import AsyncAzureOpenAI
 from core.config import CONFIG
 import asyncio
 import threading
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Optional
 
 from llm_providers.llm_provider import LLMProvider
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
@@ -226,6 +226,53 @@ class AzureOpenAIProvider(LLMProvider):
             logger.error(f"Azure OpenAI completion failed: {type(e).__name__}: {str(e)}")
             raise
 
+    async def get_completion_stream(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 8.0,
+        high_tier: bool = False,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the completion text from Azure OpenAI as it is generated.
+        
+        Closing the iterator closes the HTTP response, which stops generation.
+        """
+        model_to_use = model if model else self.get_model_from_config(high_tier)
+        
+        client = self.get_client()
+        system_prompt = f"""Provide a response that matches this JSON schema: {json.dumps(schema)}"""
+        
+        logger.debug(f"Sending streaming completion request to Azure OpenAI with model: {model_to_use}")
+        
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=0.1,
+                stream=True,
+                presence_penalty=0.0,
+                frequency_penalty=0.0,
+                model=model_to_use
+            ),
+            timeout=timeout
+        )
+        try:
+            async for chunk in stream:
+                # Azure sends a first chunk with prompt filter results and no choices
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
 
 # Create a singleton instance
 provider = AzureOpenAIProvider()
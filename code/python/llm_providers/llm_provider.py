@@ -7,8 +7,9 @@ Abstract base class for LLM providers.
 This module defines the interface that all LLM providers must implement.
 """
 
+import json
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Optional
 
 class LLMProvider(ABC):
     """
@@ -17,6 +18,12 @@ class LLMProvider(ABC):
     This class defines the interface that all LLM providers must implement
     to ensure consistent behavior across different implementations.
     """
+
+    # Providers that set this accept a prompt_suffix keyword argument: prompt is
+    # then a stable prefix, laid out first so the provider can cache it, and
+    # prompt_suffix the part that varies between calls. Other providers are
+    # sent the concatenated prompt.
+    supports_prompt_suffix = False
     
     @abstractmethod
     async def get_completion(
@@ -49,6 +56,33 @@ class LLMProvider(ABC):
             ValueError: If the response cannot be parsed or request fails
         """
         pass
+
+    async def get_completion_stream(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 30.0,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the raw completion text in chunks as the model generates it.
+        
+        Providers with a streaming API override this. The default waits for
+        get_completion and yields the whole response as a single chunk.
+        Closing the iterator early must abort the underlying request.
+        
+        Args:
+            Same as get_completion
+            
+        Yields:
+            Chunks of the raw response text, to be parsed with clean_response
+        """
+        result = await self.get_completion(prompt, schema, model=model, temperature=temperature,
+                                           max_tokens=max_tokens, timeout=timeout, **kwargs)
+        yield json.dumps(result)
     
     @classmethod
     @abstractmethod
@@ -0,0 +1,178 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Mock LLM provider for offline load and latency testing. Answers are generated
+from the requested return structure, seeded by a hash of the model and prompt,
+so the same prompt always gets the same answer, latency and outcome. Latency,
+error, throttling and timeout rates come from the mock section of config_llm.yaml.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+from typing import Any, AsyncIterator, Dict, Optional
+
+from core.config import CONFIG, LLMMockConfig
+from llm_providers.llm_provider import LLMProvider
+from misc.logger.logging_config_helper import get_configured_logger
+
+logger = get_configured_logger("mock_llm")
+
+_RANGE_PATTERN = re.compile(r"(-?\d+)\s*(?:and|to|-)\s*(-?\d+)")
+_URL_PATTERN = re.compile(r"^\s*url:\s*(\S+)", re.M)
+
+
+class MockLLMError(RuntimeError):
+    """A failure injected by the mock provider."""
+
+
+class MockRateLimitError(MockLLMError):
+    """An injected HTTP 429, recognised by the concurrency limiter as throttling."""
+    status_code = 429
+
+
+class MockProvider(LLMProvider):
+    """Implementation of LLMProvider that answers locally without a model."""
+
+    @classmethod
+    def get_client(cls):
+        return None
+
+    @classmethod
+    def get_config(cls) -> LLMMockConfig:
+        return getattr(CONFIG, "llm_mock", None) or LLMMockConfig()
+
+    @classmethod
+    def clean_response(cls, content: str) -> Dict[str, Any]:
+        match = re.search(r"(\{.*\})", content, re.S)
+        if not match:
+            logger.error("Failed to parse JSON from content: %r", content)
+            return {}
+        return json.loads(match.group(1))
+
+    @staticmethod
+    def _rng(seed: int, model: Optional[str], prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{seed}\x00{model}\x00{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    @staticmethod
+    def sample_latency(config: LLMMockConfig, rng: random.Random) -> float:
+        """Draw a latency in seconds from the configured distribution."""
+        mean = config.latency_mean
+        distribution = config.latency_distribution
+        if distribution == "fixed":
+            latency = mean
+        elif distribution == "uniform":
+            latency = rng.uniform(config.latency_min, config.latency_max)
+        elif distribution == "normal":
+            latency = rng.gauss(mean, config.latency_stddev)
+        elif distribution == "lognormal":
+            # Parameterised by the mean and stddev of the latency itself
+            if mean <= 0:
+                latency = 0.0
+            else:
+                sigma = math.sqrt(math.log(1 + (config.latency_stddev / mean) ** 2))
+                mu = math.log(mean) - sigma ** 2 / 2
+                latency = rng.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"Unknown mock latency distribution: {distribution}")
+        return min(max(latency, config.latency_min), config.latency_max)
+
+    @classmethod
+    def generate(cls, schema: Any, prompt: str, rng: random.Random) -> Any:
+        """A value matching the return structure; descriptions choose the type."""
+        if isinstance(schema, dict):
+            return {key: cls._generate_field(key, value, prompt, rng) for key, value in schema.items()}
+        return cls._generate_field("value", schema, prompt, rng)
+
+    @classmethod
+    def _generate_field(cls, key: str, spec: Any, prompt: str, rng: random.Random) -> Any:
+        if isinstance(spec, dict):
+            return cls.generate(spec, prompt, rng)
+        if isinstance(spec, list):
+            if not spec:
+                return []
+            element = spec[0]
+            urls = _URL_PATTERN.findall(prompt)
+            if isinstance(element, dict) and "url" in element and urls:
+                # Batch prompts list their items as "url: ..." lines; answer for each one
+                return [{**cls.generate(element, prompt, rng), "url": url} for url in urls]
+            return [cls._generate_field(key, element, prompt, rng) for _ in range(rng.randint(1, 3))]
+        if isinstance(spec, bool):
+            return rng.random() < 0.5
+        if isinstance(spec, int):
+            return rng.randint(0, 100)
+        if isinstance(spec, float):
+            return round(rng.random(), 3)
+        text = str(spec).lower()
+        if "integer" in text or "number" in text or "score" in key.lower():
+            match = _RANGE_PATTERN.search(text)
+            low, high = (int(match.group(1)), int(match.group(2))) if match else (0, 100)
+            return rng.randint(min(low, high), max(low, high))
+        if "true or false" in text or "boolean" in text:
+            return rng.choice(["True", "False"])
+        return f"mock {key} {rng.getrandbits(32):08x}"
+
+    async def _prepare(self, prompt: str, schema: Dict[str, Any], model: Optional[str], timeout: float):
+        """Sleep for the sampled latency, inject failures and return the answer."""
+        config = self.get_config()
+        rng = self._rng(config.seed, model, prompt)
+        latency = self.sample_latency(config, rng)
+        outcome = rng.random()
+        answer = self.generate(schema or {}, prompt, rng)
+
+        if outcome < config.timeout_rate:
+            # Hang past the caller's deadline, as an unresponsive endpoint would
+            await asyncio.sleep(timeout + 1)
+            raise asyncio.TimeoutError()
+        outcome -= config.timeout_rate
+        await asyncio.sleep(latency)
+        if outcome < config.throttle_rate:
+            raise MockRateLimitError("Mock rate limit exceeded (429)")
+        outcome -= config.throttle_rate
+        if outcome < config.error_rate:
+            raise MockLLMError("Mock LLM error")
+        return answer
+
+    async def get_completion(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 30.0,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Return a deterministic answer after the configured latency."""
+        return await self._prepare(prompt, schema, model, timeout)
+
+    async def get_completion_stream(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 30.0,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream the answer in fixed-size chunks; the sampled latency is the time to first chunk."""
+        config = self.get_config()
+        text = json.dumps(await self._prepare(prompt, schema, model, timeout))
+        size = max(1, config.stream_chunk_chars)
+        for start in range(0, len(text), size):
+            if start:
+                await asyncio.sleep(config.stream_chunk_delay)
+            yield text[start:start + size]
+
+
+# Create a singleton instance
+provider = MockProvider()
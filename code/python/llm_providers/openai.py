@@ -10,10 +10,11 @@ Backwards compatibility is not guaranteed at this time.
 
 import os
 import json
+import hashlib
 import re
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 
 from openai import AsyncOpenAI
 from core.config import CONFIG
@@ -39,6 +40,7 @@ class ConfigurationError(RuntimeError):
 class OpenAIProvider(LLMProvider):
     """Implementation of LLMProvider for OpenAI API."""
     
+    supports_prompt_suffix = True
     _client_lock = threading.Lock()
     _client = None
 
@@ -64,9 +66,12 @@ class OpenAIProvider(LLMProvider):
         return cls._client
 
     @classmethod
-    def _build_messages(cls, prompt: str, schema: Dict[str, Any]) -> List[Dict[str, str]]:
+    def _build_messages(cls, prompt: str, schema: Dict[str, Any],
+                        prompt_suffix: Optional[str] = None) -> List[Dict[str, str]]:
         """
         Construct the system and user message sequence enforcing a JSON schema.
+        The schema and the stable prompt prefix come first so that OpenAI's
+        automatic prompt caching can reuse them; the suffix comes last.
         """
         return [
             {
@@ -76,9 +81,21 @@ class OpenAIProvider(LLMProvider):
                     f"{json.dumps(schema)}"
                 )
             },
-            {"role": "user", "content": prompt}
+            {"role": "user", "content": prompt + (prompt_suffix or "")}
         ]
 
+    @classmethod
+    def _cache_kwargs(cls, prompt: str, schema: Dict[str, Any],
+                      prompt_suffix: Optional[str]) -> Dict[str, Any]:
+        """
+        Route calls sharing a prompt prefix to the same cache with prompt_cache_key.
+        Sent through extra_body so older client versions accept it.
+        """
+        if not prompt_suffix:
+            return {}
+        digest = hashlib.sha256((json.dumps(schema, sort_keys=True) + prompt).encode("utf-8")).hexdigest()
+        return {"extra_body": {"prompt_cache_key": digest[:32]}}
+
     @classmethod
     def clean_response(cls, content: str) -> Dict[str, Any]:
         """
@@ -111,7 +128,8 @@ class OpenAIProvider(LLMProvider):
             model = provider_config.models.high
         
         client = self.get_client()
-        messages = self._build_messages(prompt, schema)
+        prompt_suffix = kwargs.get("prompt_suffix")
+        messages = self._build_messages(prompt, schema, prompt_suffix)
 
         try:
             response = await asyncio.wait_for(
@@ -120,6 +138,7 @@ class OpenAIProvider(LLMProvider):
                     messages=messages,
                     temperature=temperature,
                     max_tokens=max_tokens,
+                    **self._cache_kwargs(prompt, schema, prompt_suffix)
                 ),
                 timeout
             )
@@ -133,6 +152,46 @@ class OpenAIProvider(LLMProvider):
             logger.error(f"Error processing OpenAI response: {e}")
             return {}
 
+    async def get_completion_stream(
+        self,
+        prompt: str,
+        schema: Dict[str, Any],
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        timeout: float = 30.0,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream the chat completion text as it is generated.
+        """
+        if model is None:
+            provider_config = CONFIG.llm_endpoints["openai"]
+            model = provider_config.models.high
+        
+        client = self.get_client()
+        prompt_suffix = kwargs.get("prompt_suffix")
+        messages = self._build_messages(prompt, schema, prompt_suffix)
+
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                **self._cache_kwargs(prompt, schema, prompt_suffix)
+            ),
+            timeout
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response aborts generation when the caller stops early
+            await stream.close()
+
 
 
 # Create a singleton instance
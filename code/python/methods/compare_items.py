@@ -14,8 +14,8 @@ from typing import List, Dict, Any, Optional, Union
 from core.prompts import PromptRunner
 from core.prompts import find_prompt, fill_prompt
 from misc.logger.logging_config_helper import get_configured_logger
-from core.utils.json_utils import trim_json
-from core.retriever import search, search_by_url
+from core.retriever import search, search_many, search_by_url
+from core.retrieved_item import RetrievedItem
 from core.llm import ask_llm
 
 
@@ -51,11 +51,31 @@ class CompareItemsHandler():
 
             # Find matching items for both searches in parallel
             # Use URL-based retrieval if URLs are provided, otherwise use vector search
+            items = [(self.item1_name, self.item1_url), (self.item2_name, self.item2_url)]
             matching_tasks = [
-                self._get_item_by_url(self.item1_url, self.item1_name) if self.item1_url else self._find_matching_items(self.item1_name),
-                self._get_item_by_url(self.item2_url, self.item2_name) if self.item2_url else self._find_matching_items(self.item2_name)
+                asyncio.create_task(self._get_item_by_url(item_url, item_name))
+                for item_name, item_url in items if item_url
             ]
-            await asyncio.gather(*matching_tasks)
+            search_names = [item_name for item_name, item_url in items if not item_url]
+            try:
+                if search_names:
+                    # Both items are searched for with one multi-query search
+                    candidate_lists = await search_many(
+                        search_names,
+                        self.handler.site,
+                        num_results=20,
+                        query_params=self.handler.query_params
+                    )
+                    matching_tasks.extend(
+                        self._find_matching_items(item_name, candidate_items)
+                        for item_name, candidate_items in zip(search_names, candidate_lists)
+                    )
+                await asyncio.gather(*matching_tasks)
+            finally:
+                # The URL lookups are already running; don't leave them behind if the search failed
+                for task in matching_tasks:
+                    if isinstance(task, asyncio.Task):
+                        task.cancel()
 
             if (self.found_items[self.item1_name] and self.found_items[self.item2_name]):
                 await self.compare_items(self.found_items[self.item1_name]['item'], 
@@ -71,15 +91,16 @@ class CompareItemsHandler():
             await self._send_no_items_found_message()
             return
     
-    async def _find_matching_items(self, item_name):
+    async def _find_matching_items(self, item_name, candidate_items=None):
         """Find items that match the requested item using parallel LLM calls."""
 
-        candidate_items = await search(
-            item_name, 
-            self.handler.site, 
-            num_results=20,
-            query_params=self.handler.query_params
-        )
+        if candidate_items is None:
+            candidate_items = await search(
+                item_name, 
+                self.handler.site, 
+                num_results=20,
+                query_params=self.handler.query_params
+            )
         logger.info(f"Searching for item: {item_name}")
         # Create tasks for parallel evaluation
         tasks = []
@@ -102,7 +123,9 @@ class CompareItemsHandler():
                 logger.error("FindItemPrompt not found")
                 return {"score": 0, "explanation": "Prompt not found"}
             
-            description = trim_json(item[1])
+            # The item is kept in the result, so compare_items reuses its parsed description
+            item = RetrievedItem.wrap(item)
+            description = item.description
             pr_dict = {"item.description": description, "item.name": item_name}
             prompt = fill_prompt(prompt_str, self.handler, pr_dict)
             response = await ask_llm(prompt, ans_struc, level="high", query_params=self.handler.query_params)
@@ -127,8 +150,8 @@ class CompareItemsHandler():
             if not prompt_str:
                 logger.error("CompareItemsPrompt or CompareItemDetailsPrompt not found")
                 return {"score": 0, "explanation": "Prompt not found"}
-            desc1 = trim_json(item1[1])
-            desc2 = trim_json(item2[1])
+            desc1 = RetrievedItem.wrap(item1).description
+            desc2 = RetrievedItem.wrap(item2).description
             pr_dict = {"request.item1_description": desc1, "request.item2_description": desc2, "request.details_requested": details_requested}
             prompt = fill_prompt(prompt_str, self.handler, pr_dict)
             response = await ask_llm(prompt, ans_struc, level="high", query_params=self.handler.query_params)
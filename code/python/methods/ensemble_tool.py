@@ -1,10 +1,11 @@
 import asyncio
 import json
 from typing import List, Dict, Any, Optional
-from core.retriever import search
+from core.retriever import search, search_many
+from core.retrieved_item import RetrievedItem
 from core.utils.trim import trim_json_hard
-from core.llm import ask_llm
-from core.prompts import find_prompt, fill_prompt
+from core.llm import ask_llm, PRIORITY_LOW
+from core.prompts import find_prompt, fill_prompt, fill_prompt_parts
 import logging
 
 logger = logging.getLogger(__name__)
@@ -54,14 +55,11 @@ class EnsembleToolHandler:
             
             for item_data in top_results:
                 # item_data has 'item' (4-tuple) and 'schema_object' from _select_top_results_from_ranked
-                url, json_str, name, site = item_data['item']
+                url, _, name, site = item_data['item']
                 # Use the schema_object that was added in _select_top_results_from_ranked
                 item_dict = item_data.get('schema_object', {})
                 if not item_dict:
-                    try:
-                        item_dict = json.loads(json_str) if isinstance(json_str, str) else json_str
-                    except:
-                        item_dict = {}
+                    item_dict = self._schema_of(item_data['item'])
                 
                 try:
                     trimmed_item = trim_json_hard(item_dict)
@@ -233,31 +231,10 @@ class EnsembleToolHandler:
                 }
             })
     
-    async def _retrieve_and_rank_for_query(self, query: str, query_idx: int, queries_count: int, query_params: Dict[str, Any], original_query: str) -> List[Dict]:
-        """Retrieve and rank results for a single query."""
+    async def _rank_for_query(self, query: str, query_idx: int, results: List[RetrievedItem], original_query: str) -> List[Dict]:
+        """Rank the retrieved results for a single query."""
         try:
-            # Execute search with appropriate limit per query
-            # Aim for ~60 total results across all queries
-            results_per_query = max(10, 60 // queries_count)
-            
-            # Get site from handler or query_params
-            site = self.handler.site if hasattr(self, 'handler') and self.handler else query_params.get('site', 'all')
-            
-            # Send intermediate message for this query
-            await self.handler.send_message({
-                "message_type": "intermediate_message",
-                "message": f"Looking for {query}"
-            })
-            
-            # Use the search abstraction from retriever.py
-            results = await search(
-                query=query,
-                site=site,
-                num_results=results_per_query,
-                query_params=query_params
-            )
-            
-            # Immediately rank the results for this query
+            # Rank the results for this query
             ranked_results = await self._rank_query_results(results, original_query, query, query_idx)
             
             # Send top 2 ranked results as intermediate message
@@ -271,11 +248,8 @@ class EnsembleToolHandler:
                         top_items.append(result)
                     elif isinstance(result, list) and len(result) >= 4:
                         # Result is in [url, json_str, name, site] format
-                        url, json_str, name, site = result[0], result[1], result[2], result[3]
-                        try:
-                            schema_object = json.loads(json_str) if json_str else {}
-                        except:
-                            schema_object = {}
+                        url, name, site = result[0], result[2], result[3]
+                        schema_object = self._schema_of(result)
                         
                         top_items.append({
                             "name": name,
@@ -293,13 +267,58 @@ class EnsembleToolHandler:
             return ranked_results
             
         except Exception as e:
-            logger.error(f"Error in retrieve and rank for query '{query}': {str(e)}")
+            logger.error(f"Error in ranking for query '{query}': {str(e)}")
+            return []
+    
+    async def _search_for_query(self, query: str, site: str, num_results: int, query_params: Dict[str, Any]) -> List[RetrievedItem]:
+        """Retrieve results for a single query, or none if its search fails."""
+        try:
+            return await search(
+                query=query,
+                site=site,
+                num_results=num_results,
+                query_params=query_params
+            )
+        except Exception as e:
+            logger.error(f"Error in retrieval for query '{query}': {str(e)}")
             return []
     
     async def _execute_parallel_retrieval_and_ranking(self, queries: List[str], query_params: Dict[str, Any], original_query: str) -> List[List[Dict]]:
-        """Execute retrieval and ranking in parallel for all queries."""
-        # Execute retrieval and ranking for all queries in parallel
-        tasks = [self._retrieve_and_rank_for_query(query, idx, len(queries), query_params, original_query) for idx, query in enumerate(queries)]
+        """Retrieve results for all queries with one multi-query search, then rank them in parallel."""
+        if not queries:
+            return []
+        
+        # Aim for ~60 total results across all queries
+        results_per_query = max(10, 60 // len(queries))
+        
+        # Get site from handler or query_params
+        site = self.handler.site if hasattr(self, 'handler') and self.handler else query_params.get('site', 'all')
+        
+        for query in queries:
+            await self.handler.send_message({
+                "message_type": "intermediate_message",
+                "message": f"Looking for {query}"
+            })
+        
+        # The queries are embedded in one call and each backend searched once for all of them
+        try:
+            retrieved_per_query = await search_many(
+                queries,
+                site=site,
+                num_results=results_per_query,
+                query_params=query_params
+            )
+        except Exception as e:
+            # Search the queries one by one, so one failing query doesn't empty the others
+            logger.error(f"Error in retrieval for queries {queries}: {str(e)}, searching them separately")
+            retrieved_per_query = await asyncio.gather(*[
+                self._search_for_query(query, site, results_per_query, query_params) for query in queries
+            ])
+        
+        tasks = [
+            self._rank_for_query(query, idx, results, original_query)
+            for idx, (query, results) in enumerate(zip(queries, retrieved_per_query))
+        ]
         ranked_results_per_query = await asyncio.gather(*tasks)
         
         return ranked_results_per_query
@@ -319,13 +338,10 @@ class EnsembleToolHandler:
         
         for result_tuple in results:
             # Unpack the 4-tuple
-            url, json_str, name, site = result_tuple
+            url, _, name, site = result_tuple
             
             # Parse JSON string to dict for processing
-            try:
-                item_dict = json.loads(json_str) if isinstance(json_str, str) else json_str
-            except:
-                item_dict = {}
+            item_dict = self._schema_of(result_tuple)
             
             item_id = self._get_item_identifier(item_dict)
             if item_id and item_id not in seen_ids:
@@ -346,7 +362,7 @@ class EnsembleToolHandler:
         # Create ranked results with metadata
         ranked_results = []
         for result_tuple, score in zip(unique_results, scores):
-            url, json_str, name, site = result_tuple
+            url, _, name, site = result_tuple
             ranked_results.append({
                 'item': result_tuple,  # Store the original tuple
                 'relevance_score': score,
@@ -361,6 +377,11 @@ class EnsembleToolHandler:
         return ranked_results
     
     
+    def _schema_of(self, result) -> Any:
+        """The result's parsed JSON, or {} if it isn't valid JSON. Retrieved items parse it only once."""
+        item_dict = RetrievedItem.wrap(result).schema_object
+        return item_dict if isinstance(item_dict, (dict, list)) else {}
+    
     def _get_item_identifier(self, item: Dict) -> Optional[str]:
         """Extract a unique identifier from an item."""
         if not isinstance(item, dict):
@@ -427,13 +448,10 @@ class EnsembleToolHandler:
         """
         try:
             # Unpack the tuple
-            url, json_str, name, site = result_tuple
+            url, _, name, site = result_tuple
             
             # Parse JSON to get item details
-            try:
-                item_dict = json.loads(json_str) if isinstance(json_str, str) else json_str
-            except:
-                item_dict = {}
+            item_dict = self._schema_of(result_tuple)
             
             # Ensure item_dict is a dictionary, not a list
             if isinstance(item_dict, list):
@@ -483,9 +501,9 @@ class EnsembleToolHandler:
             }
             
             # Fill the prompt with variables
-            filled_prompt = fill_prompt(prompt_str, self.handler, pr_dict)
+            filled_prompt, prompt_suffix = fill_prompt_parts(prompt_str, self.handler, pr_dict)
             
-            result = await ask_llm(filled_prompt, return_struc, level="low", timeout=5, query_params=self.handler.query_params)
+            result = await ask_llm(filled_prompt, return_struc, level="low", timeout=5, query_params=self.handler.query_params, prompt_name="EnsembleItemRankingPrompt", priority=PRIORITY_LOW, prompt_suffix=prompt_suffix)
             
             if result and 'score' in result:
                 return float(result['score'])
@@ -518,11 +536,8 @@ class EnsembleToolHandler:
                     break
                     
                 # Extract item dict from the tuple for ID checking
-                url, json_str, name, site = item['item']
-                try:
-                    item_dict = json.loads(json_str) if isinstance(json_str, str) else json_str
-                except:
-                    item_dict = {}
+                url, _, name, site = item['item']
+                item_dict = self._schema_of(item['item'])
                 
                 item_id = self._get_item_identifier(item_dict)
                 
@@ -11,18 +11,19 @@ Backwards compatibility is not guaranteed at this time.
 
 import asyncio
 from core.baseHandler import NLWebHandler
-from core.llm import ask_llm
+from core.llm import ask_llm, PRIORITY_NORMAL
 from core.prompts import PromptRunner
 from core.retriever import search
-from core.prompts import find_prompt, fill_prompt
+from core.retrieved_item import RetrievedItem
+from core.prompts import find_prompt, fill_prompt_parts
 from core.utils.json_utils import trim_json, trim_json_hard
+from core.utils.task_group import REGULAR_TRACK_LANE
 from misc.logger.logging_config_helper import get_configured_logger
 from core.utils.utils import log
 import core.query_analysis.analyze_query as analyze_query
 import core.query_analysis.relevance_detection as relevance_detection
 import core.query_analysis.memory as memory
 import core.query_analysis.required_info as required_info
-import json
 import traceback
 
 
@@ -45,6 +46,7 @@ class GenerateAnswer(NLWebHandler):
         log(f"GenerateAnswer query_params: {query_params}")
 
     async def runQuery(self):
+        self.start_task_group()
         try:
             logger.info(f"Starting query execution for query_id: {self.query_id}")
             await self.prepare()
@@ -59,6 +61,8 @@ class GenerateAnswer(NLWebHandler):
             logger.exception(f"Error in runQuery: {e}")
             traceback.print_exc()
             raise
+        finally:
+            await self.task_group.close()
     
     async def prepare(self):
         # runs the tasks that need to be done before retrieval, ranking, etc.
@@ -83,25 +87,26 @@ class GenerateAnswer(NLWebHandler):
             
         logger.info("Preparation phase completed")
    
-    async def rankItem(self, url, json_str, name, site):
+    async def rankItem(self, item):
         if not self.connection_alive_event.is_set():
             logger.warning("Connection lost, skipping item ranking")
             return
             
+        url, name, site = item.url, item.name, item.site
         try:
             logger.debug(f"Ranking item: {name} from {site}")
             prompt_str, ans_struc = find_prompt(site, self.item_type, self.RANKING_PROMPT_NAME)
-            description = trim_json_hard(json_str)
-            prompt = fill_prompt(prompt_str, self, {"item.description": description})
+            description = trim_json_hard(item.schema_object)
+            prompt, prompt_suffix = fill_prompt_parts(prompt_str, self, {"item.description": description})
             logger.debug(f"Sending ranking request to LLM for item: {name}")
-            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.query_params)
+            ranking = await ask_llm(prompt, ans_struc, level="low", query_params=self.query_params, prompt_name=self.RANKING_PROMPT_NAME, prompt_suffix=prompt_suffix)
             logger.debug(f"Received ranking score: {ranking.get('score', 'N/A')} for item: {name}")
             ansr = {
                 'url': url,
                 'site': site,
                 'name': name,
                 'ranking': ranking,
-                'schema_object': json.loads(json_str),
+                'schema_object': item.schema_object,
                 'sent': False,
             }
             
@@ -128,8 +133,8 @@ class GenerateAnswer(NLWebHandler):
             logger.debug(f"Retrieved {len(top_embeddings)} items from database")
             # Rank each item
             tasks = []
-            for url, json_str, name, site in top_embeddings:
-                tasks.append(asyncio.create_task(self.rankItem(url, json_str, name, site)))
+            for item in top_embeddings:
+                tasks.append(self.task_group.create_task(self.rankItem(RetrievedItem.wrap(item)), REGULAR_TRACK_LANE))
             
             
             logger.debug(f"Running {len(tasks)} ranking tasks concurrently")
@@ -143,12 +148,12 @@ class GenerateAnswer(NLWebHandler):
             logger.exception(f"Error in get_ranked_answers: {e}")
             raise
 
-    async def getDescription(self, url, json_str, query, answer, name, site):
+    async def getDescription(self, url, schema_object, query, answer, name, site):
         try:
             logger.debug(f"Getting description for item: {name}")
-            description = await PromptRunner(self).run_prompt(self.DESCRIPTION_PROMPT_NAME)
+            description = await PromptRunner(self).run_prompt(self.DESCRIPTION_PROMPT_NAME, priority=PRIORITY_NORMAL)
             logger.debug(f"Got description for item: {name}")
-            return (url, name, site, description["description"], json_str)
+            return (url, name, site, description["description"], schema_object)
         except Exception as e:
             logger.error(f"Error getting description for {name}: {str(e)}")
             logger.debug("Full error trace: ", exc_info=True)
@@ -194,10 +199,10 @@ class GenerateAnswer(NLWebHandler):
                         logger.warning(f"URL {url} referenced in response not found in items")
                         continue
                         
-                    item = matching_items[0]
-                    (url, json_str, name, site) = item
+                    item = RetrievedItem.wrap(matching_items[0])
+                    (url, _, name, site) = item
                     logger.debug(f"Creating description task for item: {name}")
-                    t = asyncio.create_task(self.getDescription(url, json_str, self.decontextualized_query, answer, name, site))
+                    t = self.task_group.create_task(self.getDescription(url, item.schema_object, self.decontextualized_query, answer, name, site))
                     description_tasks.append(t)
                     
                 if description_tasks:
@@ -205,18 +210,18 @@ class GenerateAnswer(NLWebHandler):
                     desc_answers = await asyncio.gather(*description_tasks, return_exceptions=True)
                     
                     for result in desc_answers:
-                        if isinstance(result, Exception):
-                            logger.error(f"Error getting description: {result}")
+                        if isinstance(result, BaseException):
+                            logger.error(f"Error getting description: {result!r}")
                             continue
                             
-                        url, name, site, description, json_str = result
+                        url, name, site, description, schema_object = result
                         logger.debug(f"Adding result for {name} to final message")
                         json_results.append({
                             "url": url,
                             "name": name,
                             "description": description,
                             "site": site,
-                            "schema_object": json.loads(json_str),
+                            "schema_object": schema_object,
                         })
                         
                     # Update message with descriptions
@@ -9,12 +9,11 @@ Backwards compatibility is not guaranteed at this time.
 """
 
 import asyncio
-import json
 from typing import List, Dict, Any, Optional, Union
-from core.prompts import find_prompt, fill_prompt
+from core.prompts import find_prompt, fill_prompt, fill_prompt_parts
 from misc.logger.logging_config_helper import get_configured_logger
-from core.utils.json_utils import trim_json
 from core.retriever import search, search_by_url
+from core.retrieved_item import RetrievedItem
 from core.llm import ask_llm
 
 
@@ -109,10 +108,11 @@ class ItemDetailsHandler():
             # Extract components like ranking.py does
             if isinstance(item, list) and len(item) >= 4:
                 # Item format: [url, json_str, name, site]
-                url, json_str, name, site = item[0], item[1], item[2], item[3]
+                item = RetrievedItem.wrap(item)
+                url, name, site = item[0], item[2], item[3]
             
             # Use the same description method as ranking.py
-            description = trim_json(json_str)
+            description = item.description
             
             # Set handler attributes for prompt filling
             self.handler.item_name = self.item_name
@@ -126,9 +126,9 @@ class ItemDetailsHandler():
             # Fill the prompt using the ranking prompt pattern (same as ranking.py)
 
             pr_dict = {"item.description": description, "request.details_requested": details_requested}
-            prompt = fill_prompt(prompt_str, self.handler, pr_dict)
+            prompt, prompt_suffix = fill_prompt_parts(prompt_str, self.handler, pr_dict)
             
-            response = await ask_llm(prompt, ans_struc, level="high", query_params=self.handler.query_params)
+            response = await ask_llm(prompt, ans_struc, level="high", query_params=self.handler.query_params, prompt_suffix=prompt_suffix)
             if response and "score" in response:
                 score = int(response.get("score", 0))
                 explanation = response.get("explanation", "")
@@ -143,7 +143,7 @@ class ItemDetailsHandler():
                         "explanation": explanation,
                         "url": url,
                         "site": site,
-                        "schema_object": json.loads(json_str)
+                        "schema_object": item.schema_object
                     }
                 else:
                     return
@@ -179,7 +179,8 @@ class ItemDetailsHandler():
             # Extract the item from search results
             item = results[0]
             if isinstance(item, list) and len(item) >= 4:
-                url, json_str, name, site = item[0], item[1], item[2], item[3]
+                item = RetrievedItem.wrap(item)
+                url, name, site = item[0], item[2], item[3]
                 
                 # Use ExtractItemDetailsPrompt to extract the requested details
                 prompt_str, ans_struc = find_prompt(self.handler.site, self.handler.item_type, "ExtractItemDetailsPrompt")
@@ -189,17 +190,17 @@ class ItemDetailsHandler():
                     message = {
                         "message_type": "item_details",
                         "name": name,
-                        "details": trim_json(json_str),
+                        "details": item.description,
                         "url": url,
                         "site": site,
-                        "schema_object": json.loads(json_str)
+                        "schema_object": item.schema_object
                     }
                     await self.handler.send_message(message)
                     return
                 
                 # Fill the prompt with item description and details requested
                 pr_dict = {
-                    "item.description": trim_json(json_str),
+                    "item.description": item.description,
                     "request.details_requested": self.details_requested,
                     "request.query": self.handler.query
                 }
@@ -214,7 +215,7 @@ class ItemDetailsHandler():
                         "additional_context": response.get("additional_context", ""),
                         "url": url,
                         "site": site,
-                        "schema_object": json.loads(json_str)
+                        "schema_object": item.schema_object
                     }
                     await self.handler.send_message(message)
                     logger.info(f"Sent item details for URL: {self.item_url}")
@@ -5,7 +5,7 @@ from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 from misc.logger.logging_config_helper import get_configured_logger
-from core.llm import ask_llm
+from core.llm import ask_llm, PRIORITY_LOW
 from core.prompts import find_prompt, fill_prompt
 from core.config import CONFIG
 
@@ -122,7 +122,7 @@ class StatisticsHandler():
         
         try:
             # Pass the template variables (which now includes score) directly to LLM
-            response = await ask_llm(prompt, template['variables'], level="low", query_params=self.handler.query_params)
+            response = await ask_llm(prompt, template['variables'], level="low", query_params=self.handler.query_params, priority=PRIORITY_LOW)
             
             # Extract the score and values from the response
             score = 0
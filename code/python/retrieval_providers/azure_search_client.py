@@ -7,7 +7,6 @@ Azure AI Search Client - Interface for Azure AI Search operations.
 """
 
 import sys
-import time
 import threading
 import asyncio
 from typing import List, Dict, Union, Optional, Any, Tuple
@@ -30,6 +29,8 @@ from azure.search.documents.indexes.models import (
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.retrieval_scores import clamp_unit
+from core.vectors import as_list, has_values
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -355,7 +356,7 @@ class AzureSearchClient:
         # Determine the embedding size from the first document
         embedding_size = None
         for doc in documents:
-            if "embedding" in doc and doc["embedding"]:
+            if has_values(doc.get("embedding")):
                 embedding_size = len(doc["embedding"])
                 break
                 
@@ -369,6 +370,12 @@ class AzureSearchClient:
         # Get a search client for the index
         search_client = self._get_search_client(index_name)
         
+        # The SDK serializes documents as JSON, which needs plain lists
+        documents = [
+            {**doc, "embedding": as_list(doc["embedding"])} if "embedding" in doc else doc
+            for doc in documents
+        ]
+        
         try:
             # Upload the documents asynchronously
             def upload_sync():
@@ -402,25 +409,35 @@ class AzureSearchClient:
         Returns:
             List[List[str]]: List of search results
         """
-        index_name = index_name or self.default_index_name
-        
         # Get embedding for the query
-        start_embed = time.time()
         embedding = await get_embedding(query, query_params=query_params)
-        embed_time = time.time() - start_embed
-        
-        # Perform the search
-        start_retrieve = time.time()
-        results = await self._retrieve_by_site_and_vector(site, embedding, num_results, index_name)
-        retrieve_time = time.time() - start_retrieve
+        return await self.search_by_vector(embedding, site, num_results, index_name)
+
+    async def search_by_vector(self, vector: List[float], site: Union[str, List[str]],
+                               num_results: int = 50, index_name: Optional[str] = None,
+                               with_scores: bool = False, **kwargs) -> List[List[str]]:
+        """
+        Search the Azure AI Search index with an already computed query embedding
         
-       
-        return results
+        Args:
+            vector: Query embedding
+            site: Site to filter by (string or list of strings, or "all")
+            num_results: Maximum number of results to return
+            index_name: Optional index name (defaults to configured index name)
+            with_scores: Append each result's similarity in [0, 1]
+            
+        Returns:
+            List[List[str]]: List of search results
+        """
+        index_name = index_name or self.default_index_name
+        sites = [] if site == "all" else site
+        return await self._retrieve_by_site_and_vector(sites, vector, num_results, index_name, with_scores)
     
     async def _retrieve_by_site_and_vector(self, sites: Union[str, List[str]], 
                                          vector_embedding: List[float], 
                                          top_n: int = 10, 
-                                         index_name: Optional[str] = None) -> List[List[str]]:
+                                         index_name: Optional[str] = None,
+                                         with_scores: bool = False) -> List[List[str]]:
         """
         Internal method to retrieve top n records filtered by site and ranked by vector similarity
         
@@ -429,6 +446,7 @@ class AzureSearchClient:
             vector_embedding: The embedding vector to search with
             top_n: Maximum number of results to return
             index_name: Optional index name (defaults to configured index name)
+            with_scores: Append @search.score, which for cosine vector search is already in (0, 1]
             
         Returns:
             List[List[str]]: List of search results
@@ -458,11 +476,10 @@ class AzureSearchClient:
         
         # Create the search options with vector search and filtering
         search_options = {
-            "filter": site_restrict,
             "vector_queries": [
                 {
                     "kind": "vector",
-                    "vector": vector_embedding,
+                    "vector": as_list(vector_embedding),
                     "fields": "embedding",
                     "k": top_n
                 }
@@ -470,6 +487,8 @@ class AzureSearchClient:
             "top": top_n,
             "select": "url,name,site,schema_json"
         }
+        if site_restrict:
+            search_options["filter"] = site_restrict
         
         try:
             # Execute the search asynchronously
@@ -482,6 +501,8 @@ class AzureSearchClient:
             processed_results = []
             for result in results:
                 processed_result = [result["url"], result["schema_json"], result["name"], result["site"]]
+                if with_scores:
+                    processed_result.append(clamp_unit(result.get("@search.score") or 0.0))
                 processed_results.append(processed_result)
             
             logger.debug(f"Retrieved {len(processed_results)} results")
@@ -589,7 +610,7 @@ class AzureSearchClient:
                 "vector_queries": [
                     {
                         "kind": "vector",
-                        "vector": query_embedding,
+                        "vector": as_list(query_embedding),
                         "fields": "embedding",
                         "k": num_results
                     }
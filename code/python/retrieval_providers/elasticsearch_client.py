@@ -14,6 +14,8 @@ from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.retrieval_scores import clamp_unit
+from core.vectors import as_list
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -318,7 +320,7 @@ class ElasticsearchClient:
                 "site": doc.get('site', ''),
                 "name": doc.get('name', ''),
                 "schema_json": str(doc.get('schema_json', '{}')),
-                "embedding": doc.get('embedding', [])
+                "embedding": as_list(doc.get('embedding', []))
             }
             actions.append(action)
         
@@ -352,12 +354,13 @@ class ElasticsearchClient:
             )
             raise
     
-    async def _format_es_response(self, response: Dict[str, Any]) -> List[List[str]]:
+    async def _format_es_response(self, response: Dict[str, Any], with_scores: bool = False) -> List[List[str]]:
         """ 
         Converts the Elasticsearch response in a list of values [url, schema_json, name, site_name]
 
         Args:
             response (List[Dict[str, Any]]): the Elasticsearch response
+            with_scores: Append the kNN score, which Elasticsearch already scales to [0, 1]
 
         Returns:
             List[List[str]]: the list of values [url, schema_json, name, site_name]
@@ -369,7 +372,10 @@ class ElasticsearchClient:
             schema_json = source.get('schema_json', '{}')
             name = source.get('name', '')
             site_name = source.get('site', '')
-            processed_results.append([url, schema_json, name, site_name])
+            result = [url, schema_json, name, site_name]
+            if with_scores:
+                result.append(clamp_unit(hit.get('_score') or 0.0))
+            processed_results.append(result)
             
         return processed_results
     
@@ -392,7 +398,7 @@ class ElasticsearchClient:
         search_query = {
             "knn": {
                 "field": "embedding",
-                "query_vector": embedding,
+                "query_vector": as_list(embedding),
                 "k": k
             }
         }
@@ -430,25 +436,31 @@ class ElasticsearchClient:
         Returns:
             List[List[str]]: List of search results [url, schema_json, name, site]
         """
-        index_name = kwargs.get('index_name', self.default_index_name)
-        logger.info(f"Starting Elasticsearch - query: '{query[:50]}...', site: {site}, index: {index_name}")
+        logger.info(f"Starting Elasticsearch - query: '{query[:50]}...', site: {site}")
         
         start_embed = time.time()
         embedding = await get_embedding(query, query_params=query_params)
         embed_time = time.time() - start_embed
         logger.debug(f"Embedding generated in {embed_time:.2f}s, dimension: {len(embedding)}")
+        return await self.search_by_vector(embedding, site, num_results, **kwargs)
+
+    async def search_by_vector(self, vector: List[float], site: Union[str, List[str]],
+                               num_results: int = 50, **kwargs) -> List[List[str]]:
+        """
+        Search for documents nearest to an already computed query embedding.
         
-        # Handle both single site and multiple sites
-        if isinstance(site, str):
-            sites = [site]
-        else:
-            sites = site
-        
-        # Build site filter
-        if len(sites) == 1:
-            filter = {"term": {"site": sites[0]}}
-        else:
-            filter = {"terms": {"site": sites}}
+        Args:
+            vector: Query embedding
+            site: Site identifier, list of sites, or "all"
+            num_results: Maximum number of results to return
+            **kwargs: Additional parameters (e.g. index_name, with_scores)
+            
+        Returns:
+            List[List[str]]: List of search results [url, schema_json, name, site]
+        """
+        index_name = kwargs.get('index_name', self.default_index_name)
+        embedding = vector
+        filter = self._site_filter(site)
                 
         source = ["url", "site", "schema_json", "name"]
         start_retrieve = time.time()
@@ -462,18 +474,93 @@ class ElasticsearchClient:
         )
         retrieve_time = time.time() - start_retrieve
         
-        results = await self._format_es_response(response)
+        results = await self._format_es_response(response, kwargs.get('with_scores', False))
         logger.log_with_context(
             LogLevel.INFO,
             "Elasticsearch search completed",
             {
-                "embedding_time": f"{embed_time:.2f}s",
+                "index": index_name,
                 "retrieval_time": f"{retrieve_time:.2f}s",
-                "total_time": f"{embed_time + retrieve_time:.2f}s",
                 "results_count": len(results)
             }
         )
         return results
+
+    async def search_many_by_vector(self, vectors: List[List[float]], site: Union[str, List[str]],
+                                    num_results: int = 50, **kwargs) -> List[List[List[str]]]:
+        """
+        Search for documents nearest to each of several query embeddings with
+        one _msearch request.
+        
+        Args:
+            vectors: Query embeddings
+            site: Site identifier, list of sites, or "all"
+            num_results: Maximum number of results to return per query
+            **kwargs: Additional parameters (e.g. index_name, with_scores)
+            
+        Returns:
+            One list of search results [url, schema_json, name, site] per vector
+        """
+        if not vectors:
+            return []
+        index_name = kwargs.get('index_name', self.default_index_name)
+        filter = self._site_filter(site)
+        source = ["url", "site", "schema_json", "name"]
+        
+        searches = []
+        for vector in vectors:
+            knn = {"field": "embedding", "query_vector": as_list(vector), "k": num_results}
+            if filter:
+                knn['filter'] = filter
+            searches.append({"index": index_name})
+            searches.append({"query": {"knn": knn}, "_source": source, "size": num_results})
+        
+        client = await self._get_es_client()
+        start_retrieve = time.time()
+        try:
+            response = await client.msearch(searches=searches)
+        except Exception as e:
+            logger.exception(f"Error in Elasticsearch multi-search")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Elasticsearch multi-search failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "filter": filter,
+                    "queries": len(vectors),
+                    "num_results": num_results
+                }
+            )
+            raise
+        retrieve_time = time.time() - start_retrieve
+        
+        results = []
+        for query_response in response['responses']:
+            if 'error' in query_response:
+                raise RuntimeError(f"Elasticsearch multi-search query failed: {query_response['error']}")
+            results.append(await self._format_es_response(query_response, kwargs.get('with_scores', False)))
+        logger.log_with_context(
+            LogLevel.INFO,
+            "Elasticsearch multi-search completed",
+            {
+                "index": index_name,
+                "retrieval_time": f"{retrieve_time:.2f}s",
+                "queries": len(vectors),
+                "results_count": sum(len(r) for r in results)
+            }
+        )
+        return results
+
+    @staticmethod
+    def _site_filter(site: Union[str, List[str]]) -> Optional[Dict[str, Any]]:
+        """The kNN filter for a site or list of sites, None for "all"."""
+        if site == "all":
+            return None
+        sites = [site] if isinstance(site, str) else site
+        if len(sites) == 1:
+            return {"term": {"site": sites[0]}}
+        return {"terms": {"site": sites}}
     
     
     async def search_by_url(self, url: str, **kwargs) -> Optional[List[str]]:
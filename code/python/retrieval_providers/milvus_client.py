@@ -17,6 +17,8 @@ import numpy as np
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.retrieval_scores import cosine_to_unit
+from core.vectors import has_values
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -286,12 +288,12 @@ class MilvusVectorClient:
         milvus_docs = []
         for doc in documents:
             # Skip documents without embeddings
-            if "embedding" not in doc or not doc["embedding"]:
+            if not has_values(doc.get("embedding")):
                 continue
                 
             milvus_docs.append({
                 "id": int(doc["id"]) if isinstance(doc["id"], (int, str)) else doc["id"],
-                "vector": doc["embedding"],
+                "vector": np.asarray(doc["embedding"], dtype=np.float32),
                 "text": doc["schema_json"],
                 "url": doc["url"],
                 "name": doc["name"],
@@ -329,10 +331,48 @@ class MilvusVectorClient:
             # Generate embedding for the query
             embedding = await get_embedding(query, query_params=query_params)
             logger.debug(f"Generated embedding with dimension: {len(embedding)}")
+        
+        except Exception as e:
+            logger.exception(f"Error in Milvus search")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Milvus search failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "collection": collection_name,
+                    "site": site,
+                    "query_length": len(query)
+                }
+            )
+            raise
+        
+        return await self.search_by_vector(embedding, site, num_results, collection_name, query_params)
+    
+    async def search_by_vector(self, vector: List[float], site: Union[str, List[str]],
+                               num_results: int = 50, collection_name: Optional[str] = None,
+                               query_params: Optional[Dict[str, Any]] = None,
+                               with_scores: bool = False, **kwargs) -> List[List[str]]:
+        """
+        Search the Milvus collection with an already computed query embedding.
+        
+        Args:
+            vector: Query embedding
+            site: Site to filter by (string, list of strings, or "all")
+            num_results: Maximum number of results to return
+            collection_name: Optional collection name (defaults to configured name)
+            query_params: Additional query parameters
+            with_scores: Append each result's similarity in [0, 1]
             
+        Returns:
+            List[List[str]]: List of search results in format [url, text_json, name, site]
+        """
+        collection_name = collection_name or self.default_collection_name
+        try:
             # Run the search operation asynchronously
             results = await asyncio.get_event_loop().run_in_executor(
-                None, self._search_sync, query, site, num_results, embedding, collection_name, query_params
+                None, self._search_sync, None, site, num_results,
+                np.asarray(vector, dtype=np.float32), collection_name, query_params, with_scores
             )
             
             logger.info(f"Milvus search completed successfully, found {len(results)} results")
@@ -347,15 +387,14 @@ class MilvusVectorClient:
                     "error_type": type(e).__name__,
                     "error_message": str(e),
                     "collection": collection_name,
-                    "site": site,
-                    "query_length": len(query)
+                    "site": site
                 }
             )
             raise
     
     def _search_sync(self, query: str, site: Union[str, List[str]], num_results: int, 
                    embedding: List[float], collection_name: str, 
-                   query_params: Optional[Dict[str, Any]]) -> List[List[str]]:
+                   query_params: Optional[Dict[str, Any]], with_scores: bool = False) -> List[List[str]]:
         """Synchronous implementation of search for thread execution"""
         logger.debug(f"Executing synchronous search - site: {site}, num_results: {num_results}")
         
@@ -399,7 +438,11 @@ class MilvusVectorClient:
                     try:
                         # Parse text field as JSON
                         schema_json = json.loads(ent["text"])
-                        retval.append([ent["url"], schema_json, ent["name"], ent["site"]])
+                        result = [ent["url"], schema_json, ent["name"], ent["site"]]
+                        if with_scores:
+                            # Quick-setup collections use the COSINE metric, where distance is the similarity
+                            result.append(cosine_to_unit(item["distance"]))
+                        retval.append(result)
                     except json.JSONDecodeError as e:
                         logger.error(f"Failed to parse text field as JSON: {str(e)}")
                         continue
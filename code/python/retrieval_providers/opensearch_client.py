@@ -14,6 +14,8 @@ import httpx
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.retrieval_scores import clamp_unit
+from core.vectors import as_list
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -395,7 +397,7 @@ class OpenSearchClient:
                 "site": doc.get('site', ''),
                 "schema_json": doc.get('schema_json', '{}'),
                 "name": doc.get('name', ''),
-                "embedding": doc.get('embedding', [])
+                "embedding": as_list(doc.get('embedding', []))
             }
             bulk_body.append(doc_source)
         
@@ -466,46 +468,32 @@ class OpenSearchClient:
         Returns:
             List[List[str]]: List of search results [url, schema_json, name, site]
         """
-        index_name = kwargs.get('index_name', self.default_index_name)
-        logger.info(f"Starting OpenSearch - query: '{query[:50]}...', site: {site}, index: {index_name}")
+        logger.info(f"Starting OpenSearch - query: '{query[:50]}...', site: {site}")
         
         start_embed = time.time()
         embedding = await get_embedding(query, query_params=query_params)
         embed_time = time.time() - start_embed
         logger.debug(f"Embedding generated in {embed_time:.2f}s, dimension: {len(embedding)}")
+        return await self.search_by_vector(embedding, site, num_results, **kwargs)
+
+    async def search_by_vector(self, vector: List[float], site: Union[str, List[str]],
+                               num_results: int = 50, **kwargs) -> List[List[str]]:
+        """
+        Search for documents nearest to an already computed query embedding.
         
-        # Handle both single site and multiple sites
-        if isinstance(site, str):
-            sites = [site]
-        else:
-            sites = site
-        
-        # Build site filter
-        if len(sites) == 1:
-            site_filter = {"term": {"site": sites[0]}}
-        else:
-            site_filter = {"terms": {"site": sites}}
-        
-        # Build OpenSearch query with kNN vector search and site filtering
-        search_query = {
-            "size": num_results,
-            "_source": ["url", "site", "schema_json", "name"],
-            "query": {
-                "bool": {
-                    "must": [
-                        {
-                            "knn": {
-                                "embedding": {
-                                    "vector": embedding,
-                                    "k": num_results
-                                }
-                            }
-                        }
-                    ],
-                    "filter": [site_filter]
-                }
-            }
-        }
+        Args:
+            vector: Query embedding
+            site: Site identifier, list of sites, or "all"
+            num_results: Maximum number of results to return
+            **kwargs: Additional parameters (e.g. index_name, with_scores)
+            
+        Returns:
+            List[List[str]]: List of search results [url, schema_json, name, site]
+        """
+        index_name = kwargs.get('index_name', self.default_index_name)
+        with_scores = kwargs.get('with_scores', False)
+        sites = [site] if isinstance(site, str) else site
+        search_query = self._knn_query(vector, site, num_results)
         
         start_retrieve = time.time()
         try:
@@ -519,19 +507,7 @@ class OpenSearchClient:
                 response.raise_for_status()
                 
                 result = response.json()
-                hits = result.get('hits', {}).get('hits', [])
-                
-                # Process results into the expected format
-                processed_results = []
-                for hit in hits:
-                    source = hit.get('_source', {})
-                    url = source.get('url', '')
-                    schema_json = source.get('schema_json', '{}')
-                    name = source.get('name', '')
-                    site_name = source.get('site', '')
-                    
-                    processed_result = [url, schema_json, name, site_name]
-                    processed_results.append(processed_result)
+                processed_results = self._format_hits(result.get('hits', {}).get('hits', []), with_scores)
                 
                 retrieve_time = time.time() - start_retrieve
                 
@@ -539,9 +515,8 @@ class OpenSearchClient:
                     LogLevel.INFO,
                     "OpenSearch completed",
                     {
-                        "embedding_time": f"{embed_time:.2f}s",
+                        "index": index_name,
                         "retrieval_time": f"{retrieve_time:.2f}s",
-                        "total_time": f"{embed_time + retrieve_time:.2f}s",
                         "results_count": len(processed_results)
                     }
                 )
@@ -560,6 +535,127 @@ class OpenSearchClient:
                 }
             )
             raise
+
+    async def search_many_by_vector(self, vectors: List[List[float]], site: Union[str, List[str]],
+                                    num_results: int = 50, **kwargs) -> List[List[List[str]]]:
+        """
+        Search for documents nearest to each of several query embeddings with
+        one _msearch request.
+        
+        Args:
+            vectors: Query embeddings
+            site: Site identifier, list of sites, or "all"
+            num_results: Maximum number of results to return per query
+            **kwargs: Additional parameters (e.g. index_name, with_scores)
+            
+        Returns:
+            One list of search results [url, schema_json, name, site] per vector
+        """
+        if not vectors:
+            return []
+        index_name = kwargs.get('index_name', self.default_index_name)
+        with_scores = kwargs.get('with_scores', False)
+        
+        # _msearch takes a header line and a query line per search
+        lines = []
+        for vector in vectors:
+            lines.append(json.dumps({"index": index_name}))
+            lines.append(json.dumps(self._knn_query(vector, site, num_results)))
+        headers = self._get_auth_headers()
+        headers["Content-Type"] = "application/x-ndjson"
+        
+        start_retrieve = time.time()
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{self.api_endpoint}/_msearch",
+                    content='\n'.join(lines) + '\n',
+                    headers=headers,
+                    timeout=60
+                )
+                response.raise_for_status()
+                
+                results = []
+                for query_result in response.json().get('responses', []):
+                    if 'error' in query_result:
+                        raise RuntimeError(f"OpenSearch multi-search query failed: {query_result['error']}")
+                    results.append(self._format_hits(query_result.get('hits', {}).get('hits', []), with_scores))
+                
+                logger.log_with_context(
+                    LogLevel.INFO,
+                    "OpenSearch multi-search completed",
+                    {
+                        "index": index_name,
+                        "retrieval_time": f"{time.time() - start_retrieve:.2f}s",
+                        "queries": len(vectors),
+                        "results_count": sum(len(r) for r in results)
+                    }
+                )
+                return results
+        
+        except Exception as e:
+            logger.exception(f"Error in OpenSearch multi-search")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "OpenSearch multi-search failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "site": site,
+                    "queries": len(vectors),
+                    "num_results": num_results
+                }
+            )
+            raise
+
+    @staticmethod
+    def _knn_query(vector: List[float], site: Union[str, List[str]], num_results: int) -> Dict[str, Any]:
+        """OpenSearch query with kNN vector search and site filtering."""
+        sites = [site] if isinstance(site, str) else site
+        if site == "all":
+            site_filters = []
+        elif len(sites) == 1:
+            site_filters = [{"term": {"site": sites[0]}}]
+        else:
+            site_filters = [{"terms": {"site": sites}}]
+        
+        return {
+            "size": num_results,
+            "_source": ["url", "site", "schema_json", "name"],
+            "query": {
+                "bool": {
+                    "must": [
+                        {
+                            "knn": {
+                                "embedding": {
+                                    "vector": as_list(vector),
+                                    "k": num_results
+                                }
+                            }
+                        }
+                    ],
+                    "filter": site_filters
+                }
+            }
+        }
+
+    @staticmethod
+    def _format_hits(hits: List[Dict[str, Any]], with_scores: bool = False) -> List[List[str]]:
+        """Search hits as [url, schema_json, name, site] lists."""
+        processed_results = []
+        for hit in hits:
+            source = hit.get('_source', {})
+            url = source.get('url', '')
+            schema_json = source.get('schema_json', '{}')
+            name = source.get('name', '')
+            site_name = source.get('site', '')
+            
+            processed_result = [url, schema_json, name, site_name]
+            if with_scores:
+                # k-NN scores of the cosinesimil space are already in (0, 1]
+                processed_result.append(clamp_unit(hit.get('_score') or 0.0))
+            processed_results.append(processed_result)
+        return processed_results
     
     async def _search_by_site_and_vector(self, sites: Union[str, List[str]], 
                                        vector_embedding: List[float], 
@@ -577,6 +673,7 @@ class OpenSearchClient:
         Returns:
             List[List[str]]: List of search results
         """
+        vector_embedding = as_list(vector_embedding)
         index_name = index_name or self.default_index_name
         logger.debug(f"Retrieving by site and vector - sites: {sites}, top_n: {top_n}")
         
@@ -769,7 +866,7 @@ class OpenSearchClient:
         logger.debug(f"Query: {query}")
         
         try:
-            query_embedding = await get_embedding(query, query_params=query_params)
+            query_embedding = as_list(await get_embedding(query, query_params=query_params))
             logger.debug(f"Generated embedding with dimension: {len(query_embedding)}")
             
             # Build OpenSearch query based on k-NN availability (no site filter)
@@ -19,10 +19,12 @@ from urllib.parse import urlparse, parse_qs
 import psycopg
 from psycopg.rows import dict_row
 from psycopg_pool import AsyncConnectionPool
+import numpy as np  # Required by pgvector
 import pgvector.psycopg
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.retrieval_scores import clamp_unit, distance_to_unit
 from misc.logger.logging_config_helper  import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -313,24 +315,20 @@ class PgVectorClient:
                                 logger.warning(f"Skipping document with missing fields: {missing}")
                                 continue
 
-                            # Validate embedding format - should be a list of numbers
-                            embedding = doc["embedding"]
-                            if not isinstance(embedding, list):
-                                logger.warning(f"Skipping document with invalid embedding type: {type(embedding)}")
+                            # Validate embedding format - should be a sequence of numbers
+                            try:
+                                embedding = np.asarray(doc["embedding"], dtype=np.float32)
+                            except (TypeError, ValueError):
+                                logger.warning(f"Skipping document with non-numeric embedding values")
+                                print(f"Invalid embedding example: {str(doc['embedding'])[:100]}...")
                                 continue
                                 
-                            if len(embedding) == 0:
-                                logger.warning(f"Skipping document with empty embedding")
-                                continue
-                                
-                            # Check if embedding is properly formatted
-                            if not all(isinstance(x, (int, float)) for x in embedding):
-                                logger.warning(f"Skipping document with non-numeric embedding values")
-                                print(f"Invalid embedding example: {str(embedding[:5])}...")
+                            if embedding.ndim != 1 or len(embedding) == 0:
+                                logger.warning(f"Skipping document with empty or invalid embedding, shape {embedding.shape}")
                                 continue
                             
-                            # Add placeholder for this row
-                            placeholders.append("(%s, %s, %s, %s, %s, %s::vector)")
+                            # Add placeholder for this row; %b sends the vector in pgvector's binary format
+                            placeholders.append("(%s, %s, %s, %s, %s, %b)")
                             
                             # Add values
                             values.extend([
@@ -339,7 +337,7 @@ class PgVectorClient:
                                 doc["name"],
                                 doc["schema_json"],
                                 doc["site"],
-                                embedding  # This should be a list of floats
+                                embedding  # float32 numpy array
                             ])
                             
                         except Exception as e:
@@ -408,7 +406,6 @@ class PgVectorClient:
             List of search results, where each result is a list of strings:
             [url, schema_json, name, site]
         """
-        start_time = time.time()
         logger.info(f"Searching for '{query[:50]}...' in site: {site}, num_results: {num_results}")
         
         # Get vector embedding for the query
@@ -419,6 +416,26 @@ class PgVectorClient:
             logger.exception(f"Error generating embedding for query: {e}")
             raise
         
+        return await self.search_by_vector(query_embedding, site, num_results, **kwargs)
+
+    async def search_by_vector(self, vector: List[float], site: Union[str, List[str]],
+                               num_results: int = 50, **kwargs) -> List[List[str]]:
+        """
+        Search for documents nearest to an already computed query embedding.
+        
+        Args:
+            vector: Query embedding
+            site: Site identifier or list of sites
+            num_results: Maximum number of results to return
+            **kwargs: Additional parameters (e.g., similarity_metric, with_scores)
+            
+        Returns:
+            List of search results in format [url, schema_json, name, site]
+        """
+        start_time = time.time()
+        query_embedding = np.asarray(vector, dtype=np.float32)
+        with_scores = kwargs.get("with_scores", False)
+        
         # Process site parameter
         sites = []
         if isinstance(site, list):
@@ -426,14 +443,7 @@ class PgVectorClient:
         elif isinstance(site, str) and site != "all":
             sites = [site]
         
-        similarity_metric = kwargs.get("similarity_metric", "cosine")  # Default to cosine similarity
-        
-        # Select appropriate similarity function based on metric
-        similarity_func = {
-            "cosine": "<=>",          # Cosine distance
-            "inner_product": "<#>",    # Negative inner product
-            "euclidean": "<->",        # Euclidean distance
-        }.get(similarity_metric, "<=>")  # Default to cosine
+        similarity_func, to_unit = self._similarity_operator(kwargs.get("similarity_metric", "cosine"))
         
         async def _search_docs(conn):
             # Use dict_row to get results as dictionaries
@@ -453,7 +463,7 @@ class PgVectorClient:
                     SELECT 
                         name,
                         url,
-                        embedding {similarity_func} %s::vector AS similarity_score,
+                        embedding {similarity_func} %b AS similarity_score,
                         site,
                         schema_json
                     FROM {self.table_name}
@@ -471,10 +481,12 @@ class PgVectorClient:
                 for row in rows:
                     result = [
                         row["url"],
-                        json.dumps(row["schema_json"], indent=4),
+                        json.dumps(row["schema_json"]),
                         row["name"],
                         row["site"],
                     ]
+                    if with_scores:
+                        result.append(to_unit(row["similarity_score"]))
                     results.append(result)
                 
                 return results
@@ -490,6 +502,110 @@ class PgVectorClient:
         except Exception as e:
             logger.exception(f"Error in search: {e}")
             raise
+
+    async def search_many_by_vector(self, vectors: List[List[float]], site: Union[str, List[str]],
+                                    num_results: int = 50, **kwargs) -> List[List[List[str]]]:
+        """
+        Search for documents nearest to each of several query embeddings with
+        a single statement: a LATERAL join runs the nearest-neighbour query
+        once per row of a VALUES list of the embeddings.
+        
+        Args:
+            vectors: Query embeddings
+            site: Site identifier or list of sites
+            num_results: Maximum number of results to return per query
+            **kwargs: Additional parameters (e.g., similarity_metric, with_scores)
+            
+        Returns:
+            One list of search results in format [url, schema_json, name, site] per vector
+        """
+        if not vectors:
+            return []
+        start_time = time.time()
+        query_embeddings = [np.asarray(vector, dtype=np.float32) for vector in vectors]
+        with_scores = kwargs.get("with_scores", False)
+        sites = site if isinstance(site, list) else ([site] if isinstance(site, str) and site != "all" else [])
+        similarity_func, to_unit = self._similarity_operator(kwargs.get("similarity_metric", "cosine"))
+        
+        async def _search_docs(conn):
+            async with conn.cursor(row_factory=dict_row) as cur:
+                values = ", ".join(f"({i}, %b::vector)" for i in range(len(query_embeddings)))
+                params = list(query_embeddings)
+                
+                where_clause = ""
+                if sites:
+                    site_placeholders = ", ".join(["%s"] * len(sites))
+                    where_clause = f"WHERE t.site IN ({site_placeholders})"
+                    params.extend(sites)
+                
+                query_sql = f"""
+                    SELECT
+                        q.query_index,
+                        d.name,
+                        d.url,
+                        d.similarity_score,
+                        d.site,
+                        d.schema_json
+                    FROM (VALUES {values}) AS q(query_index, embedding)
+                    CROSS JOIN LATERAL (
+                        SELECT
+                            t.name,
+                            t.url,
+                            t.embedding {similarity_func} q.embedding AS similarity_score,
+                            t.site,
+                            t.schema_json
+                        FROM {self.table_name} t
+                        {where_clause}
+                        ORDER BY similarity_score
+                        LIMIT %s
+                    ) AS d
+                    ORDER BY q.query_index, d.similarity_score
+                """
+                
+                params.append(num_results)
+                await cur.execute(query_sql, params)
+                rows = await cur.fetchall()
+                
+                results = [[] for _ in query_embeddings]
+                for row in rows:
+                    result = [
+                        row["url"],
+                        json.dumps(row["schema_json"]),
+                        row["name"],
+                        row["site"],
+                    ]
+                    if with_scores:
+                        result.append(to_unit(row["similarity_score"]))
+                    results[row["query_index"]].append(result)
+                
+                return results
+        
+        try:
+            results = await self._execute_with_retry(_search_docs)
+            logger.info(f"Search of {len(vectors)} queries completed in {time.time() - start_time:.2f}s, "
+                        f"found {sum(len(r) for r in results)} results")
+            return results
+        except Exception as e:
+            logger.exception(f"Error in multi-query search: {e}")
+            raise
+    
+    @staticmethod
+    def _similarity_operator(similarity_metric: str):
+        """The pgvector distance operator for a metric, and the function from its distance to [0, 1]."""
+        # Select appropriate similarity function based on metric
+        similarity_func = {
+            "cosine": "<=>",          # Cosine distance
+            "inner_product": "<#>",    # Negative inner product
+            "euclidean": "<->",        # Euclidean distance
+        }.get(similarity_metric, "<=>")  # Default to cosine
+        
+        # Distance from the operator to a similarity in [0, 1]
+        to_unit = {
+            "<=>": lambda d: clamp_unit(1.0 - d / 2.0),   # 1 - cosine distance, scaled from [-1, 1]
+            "<#>": lambda d: clamp_unit((1.0 - d) / 2.0),  # Inner product, as cosine for unit vectors
+            "<->": distance_to_unit,
+        }[similarity_func]
+        return similarity_func, to_unit
     
     async def search_by_url(self, url: str, **kwargs) -> Optional[List[str]]:
         """
@@ -514,7 +630,7 @@ class PgVectorClient:
                 row = await cur.fetchone()
                 
                 if row:
-                    return [row["url"], json.dumps(row["schema_json"], indent=4), row["name"], row["site"]]
+                    return [row["url"], json.dumps(row["schema_json"]), row["name"], row["site"]]
                 return None
         
         try:
@@ -11,6 +11,7 @@ import threading
 import time
 import uuid
 import json
+import warnings
 from typing import List, Dict, Union, Optional, Any, Tuple, Set
 
 from qdrant_client import AsyncQdrantClient
@@ -19,11 +20,16 @@ from qdrant_client.http.exceptions import UnexpectedResponse
 
 from core.config import CONFIG
 from core.embedding import get_embedding
+from core.retrieval_scores import cosine_to_unit
+from core.vectors import as_list, has_values
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
 logger = get_configured_logger("qdrant_client")
 
+# Distinct sites one facet request may return; collections with more are scrolled instead
+SITE_FACET_LIMIT = 100000
+
 class QdrantVectorClient:
     """
     Client for Qdrant vector database operations, providing a unified interface for 
@@ -40,6 +46,7 @@ class QdrantVectorClient:
         self.endpoint_name = endpoint_name or CONFIG.write_endpoint
         self._client_lock = threading.Lock()
         self._qdrant_clients = {}  # Cache for Qdrant clients
+        self._site_indexed_collections: Set[str] = set()  # Collections with the site payload index
         
         # Get endpoint configuration
         self.endpoint_config = self._get_endpoint_config()
@@ -121,6 +128,8 @@ class QdrantVectorClient:
             params["url"] = url
             if api_key:
                 params["api_key"] = api_key
+            if self.endpoint_config.prefer_grpc:
+                params["prefer_grpc"] = True
         elif path:
             # Resolve relative paths for local file-based storage
             resolved_path = self._resolve_path(path)
@@ -242,6 +251,7 @@ class QdrantVectorClient:
                 collection_name=collection_name,
                 vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
             )
+            await self._ensure_site_index(client, collection_name)
             logger.info(f"Successfully created collection '{collection_name}'")
             return True
         
@@ -254,6 +264,7 @@ class QdrantVectorClient:
                         collection_name=collection_name,
                         vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
                     )
+                    await self._ensure_site_index(client, collection_name)
                     logger.info(f"Successfully created collection '{collection_name}' on second attempt")
                     return True
                 except Exception as e2:
@@ -281,6 +292,7 @@ class QdrantVectorClient:
             if await client.collection_exists(collection_name):
                 logger.info(f"Dropping existing collection '{collection_name}'")
                 await client.delete_collection(collection_name)
+                self._site_indexed_collections.discard(collection_name)
 
             # Create new collection
             logger.info(f"Creating collection '{collection_name}' with vector size {vector_size}")
@@ -288,6 +300,7 @@ class QdrantVectorClient:
                 collection_name=collection_name,
                 vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
             )
+            await self._ensure_site_index(client, collection_name)
             
             logger.info(f"Successfully recreated collection '{collection_name}'")
             return True
@@ -301,6 +314,7 @@ class QdrantVectorClient:
                         collection_name=collection_name,
                         vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
                     )
+                    await self._ensure_site_index(client, collection_name)
                     logger.info(f"Successfully created collection '{collection_name}' on second attempt")
                     return True
                 except Exception as e2:
@@ -308,6 +322,27 @@ class QdrantVectorClient:
                     raise
             raise
     
+    async def _ensure_site_index(self, client: AsyncQdrantClient, collection_name: str, wait: bool = True):
+        """
+        Create the keyword payload index on site, used by site filters and by the
+        facet request in get_sites. Done once per collection; Qdrant ignores a
+        request for an index that already exists.
+        """
+        if collection_name in self._site_indexed_collections:
+            return
+        try:
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", message="Payload indexes have no effect in the local Qdrant")
+                await client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name="site",
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                    wait=wait
+                )
+            self._site_indexed_collections.add(collection_name)
+        except Exception as e:
+            logger.warning(f"Could not create site index on collection '{collection_name}': {str(e)}")
+    
     async def ensure_collection_exists(self, collection_name: Optional[str] = None, 
                                      vector_size: int = 1536) -> bool:
         """
@@ -391,7 +426,7 @@ class QdrantVectorClient:
         # Calculate vector size from the first document with an embedding
         vector_size = None
         for doc in documents:
-            if "embedding" in doc and doc["embedding"]:
+            if has_values(doc.get("embedding")):
                 vector_size = len(doc["embedding"])
                 break
         
@@ -407,7 +442,7 @@ class QdrantVectorClient:
             points = []
             for doc in documents:
                 # Skip documents without embeddings
-                if "embedding" not in doc or not doc["embedding"]:
+                if not has_values(doc.get("embedding")):
                     continue
                     
                 # Generate a deterministic UUID from the document ID or URL
@@ -416,7 +451,7 @@ class QdrantVectorClient:
                 
                 points.append(models.PointStruct(
                     id=point_id,
-                    vector=doc["embedding"],
+                    vector=as_list(doc["embedding"]),
                     payload={
                         "url": doc.get("url"),
                         "name": doc.get("name"),
@@ -445,6 +480,7 @@ class QdrantVectorClient:
                                 collection_name=collection_name,
                                 vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
                             )
+                            await self._ensure_site_index(client, collection_name)
                             # Try upload again
                             await client.upsert(collection_name=collection_name, points=batch)
                             total_uploaded += len(batch)
@@ -485,12 +521,14 @@ class QdrantVectorClient:
             must=[models.FieldCondition(key="site", match=models.MatchAny(any=sites))]
         )
     
-    def _format_results(self, search_result: List[models.ScoredPoint]) -> List[List[str]]:
+    def _format_results(self, search_result: List[models.ScoredPoint],
+                        with_scores: bool = False) -> List[List[str]]:
         """
         Format Qdrant search results to match expected API: [url, text_json, name, site].
         
         Args:
             search_result: Qdrant search results
+            with_scores: Append the similarity, the cosine score mapped to [0, 1]
             
         Returns:
             List[List[str]]: Formatted results
@@ -503,7 +541,10 @@ class QdrantVectorClient:
             name = payload.get("name", "")
             site_name = payload.get("site", "")
 
-            results.append([url, schema, name, site_name])
+            result = [url, schema, name, site_name]
+            if with_scores:
+                result.append(cosine_to_unit(item.score))
+            results.append(result)
 
         return results
     
@@ -520,19 +561,37 @@ class QdrantVectorClient:
             collection_name: Optional collection name (defaults to configured name)
             query_params: Additional query parameters
             
+        Returns:
+            List[List[str]]: List of search results in format [url, text_json, name, site]
+        """
+        logger.debug(f"Query: {query}")
+        start_embed = time.time()
+        embedding = await get_embedding(query, query_params=query_params)
+        embed_time = time.time() - start_embed
+        logger.debug(f"Generated embedding with dimension: {len(embedding)} in {embed_time:.2f}s")
+        return await self.search_by_vector(embedding, site, num_results, collection_name)
+
+    async def search_by_vector(self, vector: List[float], site: Union[str, List[str]],
+                               num_results: int = 50, collection_name: Optional[str] = None,
+                               with_scores: bool = False, **kwargs) -> List[List[str]]:
+        """
+        Search the Qdrant collection with an already computed query embedding.
+        
+        Args:
+            vector: Query embedding
+            site: Site to filter by (string or list of strings, or "all")
+            num_results: Maximum number of results to return
+            collection_name: Optional collection name (defaults to configured name)
+            with_scores: Append each result's similarity in [0, 1]
+            
         Returns:
             List[List[str]]: List of search results in format [url, text_json, name, site]
         """
         collection_name = collection_name or self.default_collection_name
         logger.info(f"Starting Qdrant search - collection: {collection_name}, site: {site}, num_results: {num_results}")
-        logger.debug(f"Query: {query}")
+        embedding = as_list(vector)
         
         try:
-            start_embed = time.time()
-            embedding = await get_embedding(query, query_params=query_params)
-            embed_time = time.time() - start_embed
-            logger.debug(f"Generated embedding with dimension: {len(embedding)} in {embed_time:.2f}s")
-            
             start_retrieve = time.time()
             
             # Get client and prepare filter
@@ -557,7 +616,7 @@ class QdrantVectorClient:
                 )
                 
                 # Format the results
-                results = self._format_results(search_result)
+                results = self._format_results(search_result, with_scores)
             
             retrieve_time = time.time() - start_retrieve
             
@@ -565,9 +624,7 @@ class QdrantVectorClient:
                 LogLevel.INFO,
                 "Qdrant search completed",
                 {
-                    "embedding_time": f"{embed_time:.2f}s",
                     "retrieval_time": f"{retrieve_time:.2f}s",
-                    "total_time": f"{embed_time + retrieve_time:.2f}s",
                     "results_count": len(results),
                     "embedding_dim": len(embedding),
                 }
@@ -589,7 +646,7 @@ class QdrantVectorClient:
                     self._qdrant_clients = {}
                     
                 # Try search again with new local client
-                return await self.search(query, site, num_results, collection_name, query_params)
+                return await self.search_by_vector(vector, site, num_results, collection_name, with_scores)
             
             logger.log_with_context(
                 LogLevel.ERROR,
@@ -602,7 +659,78 @@ class QdrantVectorClient:
                 }
             )
             raise
-    
+
+    async def search_many_by_vector(self, vectors: List[List[float]], site: Union[str, List[str]],
+                                    num_results: int = 50, collection_name: Optional[str] = None,
+                                    with_scores: bool = False, **kwargs) -> List[List[List[str]]]:
+        """
+        Search the Qdrant collection with several query embeddings in one
+        search_batch request.
+
+        Args:
+            vectors: Query embeddings
+            site: Site to filter by (string or list of strings, or "all")
+            num_results: Maximum number of results to return per query
+            collection_name: Optional collection name (defaults to configured name)
+            with_scores: Append each result's similarity in [0, 1]
+
+        Returns:
+            One list of search results per vector, in format [url, text_json, name, site]
+        """
+        collection_name = collection_name or self.default_collection_name
+        logger.info(f"Starting Qdrant batch search - collection: {collection_name}, site: {site}, "
+                    f"queries: {len(vectors)}, num_results: {num_results}")
+        if not vectors:
+            return []
+        embeddings = [as_list(vector) for vector in vectors]
+
+        try:
+            start_retrieve = time.time()
+            client = await self._get_qdrant_client()
+            filter_condition = self._create_site_filter(site)
+
+            collection_created = not await self.ensure_collection_exists(collection_name, len(embeddings[0]))
+            if collection_created:
+                logger.info(f"Collection '{collection_name}' was just created. Returning empty results.")
+                return [[] for _ in embeddings]
+
+            requests = [
+                models.SearchRequest(
+                    vector=embedding,
+                    filter=filter_condition,
+                    limit=num_results,
+                    with_payload=True,
+                )
+                for embedding in embeddings
+            ]
+            batch_result = await client.search_batch(collection_name=collection_name, requests=requests)
+            results = [self._format_results(search_result, with_scores) for search_result in batch_result]
+
+            logger.log_with_context(
+                LogLevel.INFO,
+                "Qdrant batch search completed",
+                {
+                    "retrieval_time": f"{time.time() - start_retrieve:.2f}s",
+                    "queries": len(embeddings),
+                    "results_count": sum(len(r) for r in results),
+                }
+            )
+            return results
+
+        except Exception as e:
+            logger.exception(f"Error in Qdrant batch search: {str(e)}")
+            logger.log_with_context(
+                LogLevel.ERROR,
+                "Qdrant batch search failed",
+                {
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "collection": collection_name,
+                    "site": site,
+                }
+            )
+            raise
+
     async def search_by_url(self, url: str, collection_name: Optional[str] = None) -> Optional[List[str]]:
         """
         Retrieve a specific item by URL from Qdrant database.
@@ -702,6 +830,56 @@ class QdrantVectorClient:
         # This is just a convenience wrapper around the regular search method with site="all"
         return await self.search(query, "all", num_results, collection_name, query_params)
     
+    async def _get_sites_by_facet(self, client: AsyncQdrantClient, collection_name: str) -> Optional[List[str]]:
+        """
+        Distinct sites from the site payload index, without reading any points.
+        Returns None if the facet request isn't available (no index yet, Qdrant
+        older than 1.12) or there may be more sites than one request returns.
+        """
+        try:
+            response = await client.facet(
+                collection_name=collection_name,
+                key="site",
+                limit=SITE_FACET_LIMIT,
+                exact=False
+            )
+        except Exception as e:
+            logger.info(f"Site facet unavailable for collection '{collection_name}', scrolling instead: {str(e)}")
+            return None
+        if len(response.hits) >= SITE_FACET_LIMIT:
+            return None
+        return sorted(str(hit.value) for hit in response.hits if hit.value and hit.count > 0)
+    
+    async def _get_sites_by_scroll(self, client: AsyncQdrantClient, collection_name: str) -> List[str]:
+        """Distinct sites read from the payload of every point in the collection."""
+        sites = set()
+        offset = None
+        batch_size = 1000
+        
+        while True:
+            points, next_offset = await client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=["site"]
+            )
+            
+            if not points:
+                break
+            
+            # Extract site values
+            for point in points:
+                site = point.payload.get("site")
+                if site:
+                    sites.add(site)
+            
+            offset = next_offset
+            if offset is None:
+                break
+        
+        # Convert to sorted list
+        return sorted(list(sites))
+    
     async def get_sites(self, collection_name: Optional[str] = None) -> List[str]:
         """
         Get a list of unique site names from the Qdrant collection.
@@ -723,34 +901,12 @@ class QdrantVectorClient:
                 logger.warning(f"Collection '{collection_name}' does not exist")
                 return []
             
-            # Use scroll to get all points with site field
-            sites = set()
-            offset = None
-            batch_size = 1000
-            
-            while True:
-                points, next_offset = await client.scroll(
-                    collection_name=collection_name,
-                    limit=batch_size,
-                    offset=offset,
-                    with_payload=["site"]
-                )
-                
-                if not points:
-                    break
-                
-                # Extract site values
-                for point in points:
-                    site = point.payload.get("site")
-                    if site:
-                        sites.add(site)
-                
-                offset = next_offset
-                if offset is None:
-                    break
-            
-            # Convert to sorted list
-            site_list = sorted(list(sites))
+            # Collections created before the index existed get it here; until it is
+            # built, the facet request fails and the collection is scrolled instead
+            await self._ensure_site_index(client, collection_name, wait=False)
+            site_list = await self._get_sites_by_facet(client, collection_name)
+            if site_list is None:
+                site_list = await self._get_sites_by_scroll(client, collection_name)
             logger.info(f"Found {len(site_list)} unique sites in collection '{collection_name}'")
             return site_list
             
@@ -766,6 +922,7 @@ class QdrantVectorClient:
                 # Clear client cache to force recreation
                 with self._client_lock:
                     self._qdrant_clients = {}
+                self._site_indexed_collections = set()
                     
                 # Try get_sites again with new local client
                 return await self.get_sites(collection_name)
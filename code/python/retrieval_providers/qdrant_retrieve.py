@@ -13,6 +13,7 @@ import json
 import time
 import threading
 from core.embedding import get_embedding
+from core.vectors import as_list
 from core.config import CONFIG
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
@@ -125,7 +126,7 @@ async def search_db(query, site, num_results=50, endpoint_name=None, query_param
 
     try:
         start_embed = time.time()
-        embedding = await get_embedding(query, query_params=query_params)
+        embedding = as_list(await get_embedding(query, query_params=query_params))
         embed_time = time.time() - start_embed
 
         start_retrieve = time.time()
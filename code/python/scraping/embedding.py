@@ -2,10 +2,10 @@
 import sys
 import os
 import asyncio
-import json
 
 # Import common utilities from the repository
 from core.embedding import get_embedding, batch_get_embeddings
+from core.vectors import format_vector
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("scraping_embedding")
@@ -85,7 +85,7 @@ async def process_files(input_file, output_dir, size="small", model=None, num_to
                         
                         # Write results for the batch
                         for i in range(len(batch_texts)):
-                            embedding_str = json.dumps(embeddings[i])
+                            embedding_str = format_vector(embeddings[i])
                             output_file.write(f"{batch_urls[i]}\t{batch_jsons[i]}\t{embedding_str}\n")
                         
                         logger.info(f"Processed {num_done} lines")
@@ -109,7 +109,7 @@ async def process_files(input_file, output_dir, size="small", model=None, num_to
             if batch_texts:
                 embeddings = await batch_get_embeddings(batch_texts, model=model)
                 for i in range(len(batch_texts)):
-                    embedding_str = json.dumps(embeddings[i])
+                    embedding_str = format_vector(embeddings[i])
                     output_file.write(f"{batch_urls[i]}\t{batch_jsons[i]}\t{embedding_str}\n")
                 logger.info(f"Processed final batch, total: {num_done} lines")
                     
@@ -28,7 +28,7 @@ from .extractMarkup import extract_schema_markup, extract_canonical_url
 
 # Import database and embedding modules
 from data_loading.db_load_utils import prepare_documents_from_json
-from core.embedding import batch_get_embeddings
+from core.embedding import batch_get_embeddings, close_embedding_clients
 from core.retriever import upload_documents
 
 # Import common utilities
@@ -349,7 +349,7 @@ class IncrementalCrawler:
                 texts = [doc["schema_json"] for doc in documents_to_upload]
                 
                 # Generate embeddings
-                embeddings = await batch_get_embeddings(texts, provider, model)
+                embeddings = await batch_get_embeddings(texts, provider, model, use_store=True)
                 
                 # Add embeddings to documents
                 for i, doc in enumerate(documents_to_upload):
@@ -547,5 +547,12 @@ Examples:
     await crawler.crawl(all_urls, resume=not args.no_resume)
 
 
+async def run_main():
+    """Run main and close pooled embedding connections before the event loop ends."""
+    try:
+        await main()
+    finally:
+        await close_embedding_clients()
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(run_main())
\ No newline at end of file
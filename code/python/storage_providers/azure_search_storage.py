@@ -33,6 +33,7 @@ from azure.search.documents.models import VectorizedQuery
 
 from core.storage import StorageProvider, ConversationEntry
 from core.embedding import get_embedding
+from core.vectors import as_list
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("azure_search_storage")
@@ -174,7 +175,7 @@ class AzureSearchStorageProvider(StorageProvider):
             # Generate embedding for the conversation
             # Combine user prompt and response for better context
             conversation_text = f"User: {user_prompt}\nAssistant: {response}"
-            embedding = await get_embedding(conversation_text)
+            embedding = as_list(await get_embedding(conversation_text))
             
             # Create conversation entry
             entry = ConversationEntry(
@@ -314,7 +315,7 @@ class AzureSearchStorageProvider(StorageProvider):
         """Search conversations using vector similarity and/or text search."""
         try:
             # Get embedding for the query
-            query_embedding = await get_embedding(query)
+            query_embedding = as_list(await get_embedding(query))
             
             # Build filter
             filters = []
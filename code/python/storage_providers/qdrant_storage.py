@@ -15,6 +15,7 @@ from qdrant_client.http import models
 
 from core.storage import StorageProvider, ConversationEntry
 from core.embedding import get_embedding
+from core.vectors import as_list
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("qdrant_storage")
@@ -122,7 +123,7 @@ class QdrantStorageProvider(StorageProvider):
             # Generate embedding for the conversation
             # Combine user prompt and response for better context
             conversation_text = f"User: {user_prompt}\nAssistant: {response}"
-            embedding = await get_embedding(conversation_text)
+            embedding = as_list(await get_embedding(conversation_text))
             
             # Create conversation entry
             entry = ConversationEntry(
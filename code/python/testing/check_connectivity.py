@@ -17,6 +17,7 @@ try:
     from core.config import CONFIG
     from core.llm import ask_llm
     from core.embedding import get_embedding
+    from core.vectors import as_list
     from core.retriever import search, get_vector_db_client
     from testing.connectivity.azure_connectivity import check_azure_search_api, check_azure_openai_api, check_openai_api, check_azure_embedding_api
     from testing.connectivity.snowflake_connectivity import check_embedding, check_complete, check_search
@@ -71,7 +72,7 @@ async def check_embedding_api(embedding_name) -> bool:
 
     try:
         test_prompt = "What is the capital of France?"
-        output = await get_embedding(test_prompt, provider=embedding_name, model=CONFIG.embedding_providers[embedding_name].model, timeout=30)
+        output = as_list(await get_embedding(test_prompt, provider=embedding_name, model=CONFIG.embedding_providers[embedding_name].model, timeout=30))
         #print(f"Output from {embedding_name}: {output}")
         #print(str(output))
         if not output:
@@ -16,6 +16,7 @@ try:
     from core.config import CONFIG
     from core.llm import ask_llm
     from core.embedding import get_embedding
+    from core.vectors import as_list, has_values
     from core.retriever import search, get_vector_db_client
     from testing.connectivity.azure_connectivity import check_azure_search_api, check_azure_openai_api, check_openai_api, check_azure_embedding_api
     from testing.connectivity.snowflake_connectivity import check_embedding, check_complete, check_search
@@ -91,11 +92,12 @@ async def check_embedding_api(embedding_name) -> bool:
         output = await get_embedding(test_prompt, provider=embedding_name, model=CONFIG.embedding_providers[embedding_name].model, timeout=30)
         #print(f"Output from {embedding_name}: {output}")
         #print(str(output))
-        if not output:
+        if not has_values(output):
             print(f"❌ Embedding API connectivity check failed for {embedding_name}: No valid output received.")
             return False
+        output = as_list(output)
         # Verify output is a list of floats
-        elif isinstance(output, list) and len(output) > 2 and all(isinstance(i, float) for i in output):
+        if isinstance(output, list) and len(output) > 2 and all(isinstance(i, float) for i in output):
             print(f"✅ Embedding API connectivity check successful for {embedding_name}. Output is list of floats.")
             return True
         else:
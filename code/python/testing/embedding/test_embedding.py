@@ -0,0 +1,54 @@
+import asyncio
+
+import core.embedding as embedding
+
+
+class FakeSingleTextProvider:
+    """Stands in for _embed_text: records calls and the most calls in flight at once."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.texts = []
+        self.in_flight = 0
+        self.most_in_flight = 0
+
+    async def __call__(self, text, provider, model_id, timeout):
+        self.texts.append(text)
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return [float(len(text))]
+        finally:
+            self.in_flight -= 1
+
+async def test_batch_without_provider_batch_api_embeds_texts_concurrently(monkeypatch):
+    fake = FakeSingleTextProvider()
+    monkeypatch.setattr(embedding, "_embed_text", fake)
+    monkeypatch.setattr(embedding, "SINGLE_TEXT_CONCURRENCY", 4)
+
+    async def no_batcher(*args, **kwargs):
+        raise AssertionError("texts must not be sent back through get_embedding")
+    monkeypatch.setattr(embedding, "get_embedding", no_batcher)
+
+    texts = ["x" * i for i in range(1, 11)]
+    vectors = await embedding._embed_batch(texts, "custom", "model", timeout=5)
+
+    assert vectors == [[float(i)] for i in range(1, 11)]
+    assert sorted(fake.texts) == sorted(texts)
+    assert fake.most_in_flight == 4
+
+async def test_concurrent_identical_get_embedding_calls_share_one_provider_call(monkeypatch):
+    fake = FakeSingleTextProvider(delay=0.05)
+    monkeypatch.setattr(embedding, "_embed_text", fake)
+    monkeypatch.setattr(embedding, "_get_embedding_cache", lambda: None)
+    monkeypatch.setattr(embedding, "_get_embedding_batcher", lambda provider: None)
+
+    vectors = await asyncio.gather(*[embedding.get_embedding("pasta  recipes", provider="openai")
+                                     for _ in range(5)])
+
+    assert fake.texts == ["pasta recipes"]
+    assert all(list(vector) == [13.0] for vector in vectors)
+    # Each caller gets its own copy of the vector
+    vectors[0][0] = 0.0
+    assert vectors[1][0] == 13.0
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from core.embedding_batcher import MicroBatcher, embed_in_chunks, estimate_tokens, plan_chunks
+
+
+class RecordingDispatch:
+    """Dispatch function that records each batch and answers with the items upper-cased."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, group, items):
+        self.batches.append((group, list(items)))
+        if self.fail:
+            raise RuntimeError("provider down")
+        return [item.upper() for item in items]
+
+async def test_concurrent_submits_share_one_batch():
+    dispatch = RecordingDispatch()
+    batcher = MicroBatcher(dispatch, window=0.01, max_batch=10)
+
+    results = await asyncio.gather(*[batcher.submit("model", text) for text in ("a", "b", "c")])
+
+    assert results == ["A", "B", "C"]
+    assert dispatch.batches == [("model", ["a", "b", "c"])]
+    assert batcher.get_stats()["average_batch"] == 3.0
+
+async def test_groups_are_batched_separately():
+    dispatch = RecordingDispatch()
+    batcher = MicroBatcher(dispatch, window=0.01)
+
+    results = await asyncio.gather(batcher.submit("small", "a"), batcher.submit("large", "b"),
+                                   batcher.submit("small", "c"))
+
+    assert results == ["A", "B", "C"]
+    assert sorted(dispatch.batches) == [("large", ["b"]), ("small", ["a", "c"])]
+
+async def test_full_batch_is_sent_before_window_ends():
+    dispatch = RecordingDispatch()
+    batcher = MicroBatcher(dispatch, window=10, max_batch=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.submit("model", "a"), batcher.submit("model", "b")), timeout=1)
+
+    assert results == ["A", "B"]
+
+async def test_failed_batch_raises_in_every_caller():
+    batcher = MicroBatcher(RecordingDispatch(fail=True), window=0.01)
+
+    results = await asyncio.gather(batcher.submit("model", "a"), batcher.submit("model", "b"),
+                                   return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.get_stats()["failed_batches"] == 1
+
+async def test_wrong_result_count_fails_batch():
+    async def dispatch(group, items):
+        return items[:1]
+    batcher = MicroBatcher(dispatch, window=0.01)
+
+    with pytest.raises(ValueError):
+        await asyncio.gather(batcher.submit("model", "a"), batcher.submit("model", "b"))
+
+async def test_cancelled_caller_is_left_out_of_batch():
+    dispatch = RecordingDispatch()
+    batcher = MicroBatcher(dispatch, window=0.05)
+
+    cancelled = asyncio.ensure_future(batcher.submit("model", "a"))
+    kept = asyncio.ensure_future(batcher.submit("model", "b"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await kept == "B"
+    assert dispatch.batches == [("model", ["b"])]
+
+def test_plan_chunks_by_batch_size():
+    assert plan_chunks(["x"] * 5, max_batch=2) == [(0, 2), (2, 4), (4, 5)]
+    assert plan_chunks([], max_batch=2) == []
+
+def test_plan_chunks_by_token_budget():
+    # 30 characters is 10 estimated tokens
+    texts = ["a" * 30, "b" * 30, "c" * 30, "d" * 3]
+
+    assert estimate_tokens(texts[0]) == 10
+    assert plan_chunks(texts, max_batch=10, max_batch_tokens=20) == [(0, 2), (2, 4)]
+
+def test_plan_chunks_gives_oversized_text_its_own_chunk():
+    texts = ["a" * 3, "b" * 300, "c" * 3]
+
+    assert plan_chunks(texts, max_batch=10, max_batch_tokens=20) == [(0, 1), (1, 2), (2, 3)]
+
+async def test_embed_in_chunks_keeps_text_order():
+    texts = [str(i) for i in range(7)]
+
+    async def embed_chunk(chunk):
+        # Later chunks answer first
+        await asyncio.sleep(0.01 * (7 - int(chunk[0])))
+        return [int(text) for text in chunk]
+
+    vectors = await embed_in_chunks(texts, plan_chunks(texts, max_batch=3), embed_chunk, concurrency=3)
+
+    assert vectors == list(range(7))
+
+async def test_embed_in_chunks_retries_failed_chunk():
+    attempts = []
+
+    async def embed_chunk(chunk):
+        attempts.append(chunk)
+        if len(attempts) == 1:
+            raise RuntimeError("rate limited")
+        return chunk
+
+    vectors = await embed_in_chunks(["a", "b"], [(0, 2)], embed_chunk, retry_backoff=0.001)
+
+    assert vectors == ["a", "b"]
+    assert len(attempts) == 2
+
+async def test_embed_in_chunks_raises_after_retries():
+    async def embed_chunk(chunk):
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        await embed_in_chunks(["a"], [(0, 1)], embed_chunk, max_retries=1, retry_backoff=0.001)
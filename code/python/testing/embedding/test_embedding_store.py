@@ -0,0 +1,109 @@
+import pytest
+
+import core.embedding as embedding
+import core.embedding_store as embedding_store
+from core.embedding_store import EmbeddingStore
+from core.vectors import as_list
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "embeddings.db"))
+    yield store
+    store.close()
+
+def key(text):
+    return EmbeddingStore.make_key("openai", "small", text)
+
+class FakeBatchEmbed:
+    """Stands in for _batch_embed, embedding each text as [len(text), version]."""
+
+    def __init__(self, version=1.0):
+        self.version = version
+        self.calls = []
+
+    async def __call__(self, texts, provider, model_id, timeout):
+        self.calls.append(list(texts))
+        return [[float(len(text)), self.version] for text in texts]
+
+def test_keys_depend_on_provider_model_and_text():
+    assert key("pasta") == EmbeddingStore.make_key("openai", "small", "pasta")
+    assert key("pasta") != EmbeddingStore.make_key("openai", "large", "pasta")
+    assert key("pasta") != EmbeddingStore.make_key("azure_openai", "small", "pasta")
+    assert key("pasta") != key("pasta ")
+
+def test_get_many_across_lookup_chunks(store, monkeypatch):
+    monkeypatch.setattr(embedding_store, "_LOOKUP_CHUNK", 3)
+    stored = [f"text {i}" for i in range(8)]
+    store.put_many((key(text), [float(i)]) for i, text in enumerate(stored))
+
+    found = store.get_many([key(text) for text in stored + ["missing", "text 2"]])
+
+    assert len(found) == 8
+    assert {text: as_list(found[key(text)]) for text in stored} == {text: [float(i)] for i, text in enumerate(stored)}
+    assert store.get_stats()["hits"] == 8
+    assert store.get_stats()["misses"] == 1
+
+def test_put_many_skips_sparse_vectors(store):
+    store.put_many([(key("dense"), [0.5, 0.25]), (key("sparse"), {"pasta": 0.5})])
+
+    assert store.count() == 1
+    assert as_list(store.get_many([key("dense")])[key("dense")]) == [0.5, 0.25]
+    assert store.get_stats()["stored"] == 1
+
+def test_put_many_overwrites(store):
+    store.put_many([(key("pasta"), [1.0])])
+    store.put_many([(key("pasta"), [2.0])])
+
+    assert store.count() == 1
+    assert as_list(store.get_many([key("pasta")])[key("pasta")]) == [2.0]
+
+def test_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    first = EmbeddingStore(path)
+    first.put_many([(key("pasta"), [1.0, 2.0])])
+    first.close()
+
+    reopened = EmbeddingStore(path)
+
+    assert as_list(reopened.get_many([key("pasta")])[key("pasta")]) == [1.0, 2.0]
+    reopened.close()
+
+async def test_only_missing_texts_are_embedded_once_each(store, monkeypatch):
+    fake = FakeBatchEmbed()
+    monkeypatch.setattr(embedding, "_batch_embed", fake)
+    store.put_many([(key("stored"), [0.0, 0.0])])
+
+    vectors = await embedding._batch_get_embeddings_with_store(
+        store, ["new", "stored", "new", "other"], "openai", "small", 30, force_recompute=False)
+
+    assert fake.calls == [["new", "other"]]
+    assert [as_list(vector) for vector in vectors] == [[3.0, 1.0], [0.0, 0.0], [3.0, 1.0], [5.0, 1.0]]
+    # Duplicate texts get separate vectors
+    assert vectors[0] is not vectors[2]
+    assert store.count() == 3
+
+async def test_force_recompute_re_embeds_and_overwrites(store, monkeypatch):
+    fake = FakeBatchEmbed(version=2.0)
+    monkeypatch.setattr(embedding, "_batch_embed", fake)
+    store.put_many([(key("pasta"), [5.0, 1.0]), (key("soup"), [4.0, 1.0])])
+
+    vectors = await embedding._batch_get_embeddings_with_store(
+        store, ["pasta", "soup", "pasta"], "openai", "small", 30, force_recompute=True)
+
+    assert fake.calls == [["pasta", "soup"]]
+    assert [as_list(vector) for vector in vectors] == [[5.0, 2.0], [4.0, 2.0], [5.0, 2.0]]
+    stored = store.get_many([key("pasta"), key("soup")])
+    assert as_list(stored[key("pasta")]) == [5.0, 2.0]
+    assert as_list(stored[key("soup")]) == [4.0, 2.0]
+
+async def test_everything_stored_skips_the_provider(store, monkeypatch):
+    fake = FakeBatchEmbed()
+    monkeypatch.setattr(embedding, "_batch_embed", fake)
+    store.put_many([(key("pasta"), [5.0, 1.0])])
+
+    vectors = await embedding._batch_get_embeddings_with_store(
+        store, ["pasta"], "openai", "small", 30, force_recompute=False)
+
+    assert fake.calls == []
+    assert as_list(vectors[0]) == [5.0, 1.0]
@@ -0,0 +1,67 @@
+import json
+import random
+from array import array
+
+import pytest
+
+import core.vectors as vectors
+from core.vectors import as_list, as_vector, format_vector, has_values, vector_nbytes
+
+
+def random_values(dimensions=64, seed=7):
+    rng = random.Random(seed)
+    return [rng.uniform(-1, 1) for _ in range(dimensions)]
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    """Run a test with numpy and with the array('f') fallback used without numpy."""
+    if request.param == "array":
+        monkeypatch.setattr(vectors, "np", None)
+    return request.param
+
+def test_format_parse_round_trip_is_exact(backend):
+    vector = vectors.as_vector(random_values())
+
+    restored = vectors.parse_vector(vectors.format_vector(vector))
+
+    assert as_list(restored) == as_list(vector)
+    assert " " not in format_vector(vector)
+
+@pytest.mark.parametrize("legacy", [str, json.dumps])
+def test_parse_vector_reads_legacy_loader_format(backend, legacy):
+    values = random_values(8)
+
+    restored = vectors.parse_vector(legacy(values))
+
+    # Legacy files hold float64 text; reading them rounds each value to float32
+    assert as_list(restored) == as_list(array("f", values))
+
+def test_bytes_round_trip(backend):
+    vector = vectors.as_vector(random_values())
+
+    data = vectors.to_bytes(vector)
+
+    assert len(data) == 4 * len(vector)
+    assert as_list(vectors.from_bytes(data)) == as_list(vector)
+
+def test_bytes_are_little_endian_float32(backend):
+    assert vectors.to_bytes([1.0, -2.0]) == b"\x00\x00\x80\x3f\x00\x00\x00\xc0"
+    assert as_list(vectors.from_bytes(b"\x00\x00\x80\x3f")) == [1.0]
+
+def test_float32_vectors_are_compact(backend):
+    values = random_values(384)
+
+    assert vector_nbytes(vectors.as_vector(values)) == 4 * 384
+    assert vector_nbytes(values) > 8 * 384
+
+def test_sparse_vectors_pass_through():
+    sparse = {"pasta": 0.5, "recipe": 0.25}
+
+    assert as_vector(sparse) is sparse
+    assert as_list(sparse) is sparse
+
+def test_has_values():
+    assert has_values(as_vector([0.0]))
+    assert not has_values(as_vector([]))
+    assert not has_values(None)
+    assert not has_values([])
@@ -0,0 +1,10 @@
+# Copyright (c) 2025 Microsoft Corporation.
+# Licensed under the MIT License
+
+"""
+Testing LLM call handling for NLWeb system tests: caching, coalescing,
+concurrency limits, hedging and streamed responses.
+
+WARNING: This code is under development and may undergo changes in future releases.
+Backwards compatibility is not guaranteed at this time.
+"""
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+import core.ranking as ranking
+from core.ranking import Ranking
+from core.utils.json_stream import IncrementalJSONParser
+
+
+def feed_all(chunks):
+    """Feed chunks to a parser, returning it and the fields completed by each chunk."""
+    parser = IncrementalJSONParser()
+    completed = [parser.feed(chunk) for chunk in chunks]
+    return parser, completed
+
+def split_every(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+ANSWER = {
+    "score": 72,
+    "description": "Say \"ciao\" \\ to\nfresh pasta, {not} [nested]",
+    "tags": ["pasta", {"course": "main", "sides": [1, 2.5]}],
+    "nutrition": {"kcal": 640, "vegan": False, "notes": None},
+    "rating": -3.25e1,
+}
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_any_chunking_gives_the_whole_object(size):
+    parser, _ = feed_all(split_every(json.dumps(ANSWER), size))
+
+    assert parser.fields == ANSWER
+    assert parser.done
+
+def test_chunks_split_mid_key_and_mid_escape():
+    parser, completed = feed_all(['{"sc', 'ore": 8', '0, "descr', 'iption": "a \\', '"quoted\\', '" word"}'])
+
+    assert completed == [{}, {}, {"score": 80}, {}, {}, {"description": 'a "quoted" word'}]
+    assert parser.done
+
+def test_escaped_quote_in_key():
+    parser, _ = feed_all(['{"a\\', '"b": 1}'])
+
+    assert parser.fields == {'a"b': 1}
+
+def test_fields_are_reported_as_soon_as_complete():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"score": 35, "descri') == {"score": 35}
+    assert parser.feed('ption": "not about pasta') == {}
+    assert parser.feed('"}') == {"description": "not about pasta"}
+
+def test_skips_fenced_preamble():
+    text = 'Here is the ranking:\n```json\n{"score": 90, "description": "fits"}\n```'
+
+    parser, _ = feed_all(split_every(text, 4))
+
+    assert parser.fields == {"score": 90, "description": "fits"}
+
+def test_nested_values_reported_once_closed():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"items": [{"url": "a", "score": 1}, ') == {}
+    assert parser.feed('{"url": "b", "score": 2}]') == {"items": [{"url": "a", "score": 1}, {"url": "b", "score": 2}]}
+
+def test_trailing_number_completes_at_closing_brace():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"description": "fits", "score": 8') == {"description": "fits"}
+    assert parser.feed('7') == {}
+    assert parser.feed('}') == {"score": 87}
+    assert parser.done
+
+def test_stops_after_first_object():
+    parser, _ = feed_all(['{"score": 1} {"score": 2}'])
+
+    assert parser.fields == {"score": 1}
+
+def test_unparseable_value_is_dropped():
+    parser, _ = feed_all(['{"score": 8O, "description": "fits"}'])
+
+    assert parser.fields == {"description": "fits"}
+
+
+class FakeHandler:
+    query_params = {}
+
+class FakeStream:
+    """Stands in for ask_llm_stream, yielding partial answers and recording how far it got."""
+
+    def __init__(self, partials):
+        self.partials = partials
+        self.yielded = 0
+        self.closed = False
+
+    def __call__(self, prompt, schema, **kwargs):
+        return self._generate()
+
+    async def _generate(self):
+        try:
+            for partial in self.partials:
+                self.yielded += 1
+                yield partial
+        finally:
+            self.closed = True
+
+SCHEMA = {"score": "integer between 0 and 100", "description": "short description of the item"}
+
+async def test_low_score_stops_generation(monkeypatch):
+    stream = FakeStream([{"score": Ranking.STREAM_DISCARD_THRESHOLD},
+                         {"score": Ranking.STREAM_DISCARD_THRESHOLD, "description": "unused"}])
+    monkeypatch.setattr(ranking, "ask_llm_stream", stream)
+
+    result = await Ranking(FakeHandler(), []).streamRanking("prompt", SCHEMA)
+
+    assert result == {"score": Ranking.STREAM_DISCARD_THRESHOLD, "description": ""}
+    assert stream.yielded == 1
+    assert stream.closed
+
+async def test_high_score_waits_for_every_field(monkeypatch):
+    stream = FakeStream([{"score": "80"},
+                         {"score": "80", "description": "fits"},
+                         {"score": 80, "description": "fits"}])
+    monkeypatch.setattr(ranking, "ask_llm_stream", stream)
+
+    result = await Ranking(FakeHandler(), []).streamRanking("prompt", SCHEMA)
+
+    assert result == {"score": "80", "description": "fits"}
+    assert stream.yielded == 2
+    assert stream.closed
@@ -0,0 +1,116 @@
+import asyncio
+import sqlite3
+
+import core.llm as llm
+import core.llm_cache as llm_cache
+from core.llm_cache import LLMResponseCache
+
+
+SCHEMA = {"score": "integer"}
+
+class FakeProvider:
+    """LLM provider that answers every prompt with a fixed response and counts calls."""
+
+    def __init__(self, response=None):
+        self.response = response if response is not None else {"score": 80}
+        self.calls = 0
+
+    async def get_completion(self, prompt, schema, model=None, timeout=8, max_tokens=512, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return dict(self.response)
+
+def use_fake_provider(monkeypatch, provider, cache=None):
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: provider)
+    monkeypatch.setattr(llm, "_get_response_cache", lambda: cache)
+    monkeypatch.setattr(llm, "_get_hedger", lambda: None)
+
+async def test_hit_returns_independent_copy():
+    cache = LLMResponseCache(default_ttl=60)
+    await cache.set("key", {"items": [1]})
+
+    first = await cache.get("key")
+    first["items"].append(2)
+
+    assert await cache.get("key") == {"items": [1]}
+
+async def test_lru_evicts_least_recently_used():
+    cache = LLMResponseCache(max_entries=2, default_ttl=60)
+    await cache.set("a", {"v": "a"})
+    await cache.set("b", {"v": "b"})
+    await cache.get("a")
+    await cache.set("c", {"v": "c"})
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"v": "a"}
+    assert await cache.get("c") == {"v": "c"}
+
+async def test_entries_expire_after_prompt_ttl(monkeypatch):
+    cache = LLMResponseCache(default_ttl=0, prompt_ttls={"RankingPrompt": 60, "PrevQueryDecontextualizer": 10})
+    now = 1000.0
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now)
+    await cache.set("ranking", {"score": 1}, "RankingPrompt")
+    await cache.set("decontextualize", {"query": "q"}, "PrevQueryDecontextualizer")
+
+    now = 1030.0
+
+    assert await cache.get("ranking", "RankingPrompt") == {"score": 1}
+    assert await cache.get("decontextualize", "PrevQueryDecontextualizer") is None
+
+async def test_only_prompts_with_a_ttl_are_cached_by_default():
+    cache = LLMResponseCache(prompt_ttls={"RankingPrompt": 60})
+    await cache.set("unnamed", {"answer": 1})
+    await cache.set("other", {"answer": 2}, "CompareItemsPrompt")
+    await cache.set("ranking", {"score": 3}, "RankingPrompt")
+
+    assert await cache.get("unnamed") is None
+    assert await cache.get("other", "CompareItemsPrompt") is None
+    assert await cache.get("ranking", "RankingPrompt") == {"score": 3}
+
+async def test_empty_results_are_never_stored():
+    cache = LLMResponseCache(default_ttl=60)
+    await cache.set("key", {})
+
+    assert await cache.get("key") is None
+    assert cache.get_stats()["entries"] == 0
+
+async def test_counts_hits_and_misses_per_prompt():
+    cache = LLMResponseCache(default_ttl=60)
+    await cache.set("ranking", {"score": 1}, "RankingPrompt")
+    await cache.get("ranking", "RankingPrompt")
+    await cache.get("ranking", "RankingPrompt")
+    await cache.get("missing", "RankingPrompt")
+    await cache.get("missing")
+
+    stats = cache.get_stats()
+
+    assert stats["prompts"]["RankingPrompt"] == {"hits": 2, "disk_hits": 0, "misses": 1}
+    assert stats["prompts"]["unnamed"] == {"hits": 0, "disk_hits": 0, "misses": 1}
+    assert stats["totals"] == {"hits": 2, "disk_hits": 0, "misses": 2}
+
+async def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    await LLMResponseCache(default_ttl=60, disk_path=path).set("key", {"score": 1})
+
+    restarted = LLMResponseCache(default_ttl=60, disk_path=path)
+
+    assert await restarted.get("key") == {"score": 1}
+    assert restarted.get_stats()["totals"]["disk_hits"] == 1
+
+async def test_sqlite_errors_do_not_fail_ask_llm(monkeypatch, tmp_path):
+    cache = LLMResponseCache(default_ttl=60, disk_path=str(tmp_path / "llm_cache.db"))
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(cache, "_disk_set", locked)
+    monkeypatch.setattr(cache, "_disk_get", locked)
+    provider = FakeProvider()
+    use_fake_provider(monkeypatch, provider, cache)
+
+    result = await llm.ask_llm("Rate pasta", SCHEMA, provider="mock")
+
+    assert result == {"score": 80}
+    assert provider.calls == 1
+    # The memory tier still has the answer
+    assert await llm.ask_llm("Rate pasta", SCHEMA, provider="mock") == {"score": 80}
+    assert provider.calls == 1
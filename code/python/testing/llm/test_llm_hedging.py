@@ -0,0 +1,178 @@
+import asyncio
+import time
+
+import pytest
+
+import core.llm_hedging as llm_hedging
+from core.llm_hedging import CircuitBreaker, EndpointHedger, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeEndpoints:
+    """call(endpoint, timeout) for run(): each endpoint answers after a set delay."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.started = {}
+        self.cancelled = []
+
+    async def __call__(self, endpoint, timeout):
+        self.started[endpoint] = time.monotonic()
+        delay, answer = self.answers[endpoint]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(endpoint)
+            raise
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+def by_model(endpoint):
+    return f"{endpoint}:model"
+
+async def test_secondary_starts_only_after_p90_delay():
+    hedger = EndpointHedger(["secondary"], min_samples=10, default_delay=5.0, min_delay=0.01)
+    for seconds in [0.01] * 8 + [0.1, 0.2]:
+        hedger.latency("primary:model").record(seconds)
+    assert hedger.hedge_delay("primary:model", 8) == 0.1
+
+    endpoints = FakeEndpoints({"primary": (1.0, {"answer": "primary"}),
+                               "secondary": (0.0, {"answer": "secondary"})})
+    start = time.monotonic()
+    result = await hedger.run("primary", endpoints, by_model, timeout=5)
+
+    assert result == {"answer": "secondary"}
+    assert 0.09 <= endpoints.started["secondary"] - start < 0.5
+    assert hedger.get_stats()["hedged"] == 1
+    assert hedger.get_stats()["hedge_wins"] == 1
+
+async def test_fast_primary_is_never_hedged():
+    hedger = EndpointHedger(["secondary"], default_delay=0.2)
+    endpoints = FakeEndpoints({"primary": (0.01, {"answer": "primary"}),
+                               "secondary": (0.0, {"answer": "secondary"})})
+
+    result = await hedger.run("primary", endpoints, by_model, timeout=5)
+
+    assert result == {"answer": "primary"}
+    assert "secondary" not in endpoints.started
+    assert hedger.get_stats()["hedged"] == 0
+
+async def test_first_non_empty_answer_wins_and_other_call_is_cancelled():
+    hedger = EndpointHedger(["secondary", "tertiary"], default_delay=0.02, min_delay=0.01)
+    endpoints = FakeEndpoints({"primary": (1.0, {"answer": "primary"}),
+                               "secondary": (0.03, {}),
+                               "tertiary": (0.05, {"answer": "tertiary"})})
+
+    result = await hedger.run("primary", endpoints, by_model, timeout=5)
+    await asyncio.sleep(0)
+
+    assert result == {"answer": "tertiary"}
+    assert endpoints.cancelled == ["primary"]
+
+async def test_failed_primary_falls_back_without_waiting():
+    hedger = EndpointHedger(["secondary"], default_delay=5.0)
+    endpoints = FakeEndpoints({"primary": (0.0, RuntimeError("HTTP 500")),
+                               "secondary": (0.0, {"answer": "secondary"})})
+    start = time.monotonic()
+
+    result = await hedger.run("primary", endpoints, by_model, timeout=8)
+
+    assert result == {"answer": "secondary"}
+    assert time.monotonic() - start < 1
+
+async def test_shared_deadline_raises_timeout():
+    hedger = EndpointHedger(["secondary"], default_delay=0.05, min_delay=0.01)
+    endpoints = FakeEndpoints({"primary": (5.0, {"answer": "primary"}),
+                               "secondary": (5.0, {"answer": "secondary"})})
+    start = time.monotonic()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await hedger.run("primary", endpoints, by_model, timeout=0.2)
+    await asyncio.sleep(0)
+
+    assert time.monotonic() - start < 0.5
+    assert sorted(endpoints.cancelled) == ["primary", "secondary"]
+
+def test_breaker_opens_at_error_rate_after_min_calls():
+    breaker = CircuitBreaker("primary", error_rate=0.5, min_calls=4)
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CLOSED
+
+    breaker.record(True)
+
+    assert breaker.state == OPEN
+    assert not breaker.available()
+
+def test_breaker_stays_closed_below_error_rate():
+    breaker = CircuitBreaker("primary", error_rate=0.5, min_calls=4)
+    for success in [True, False, True, True, False, True]:
+        breaker.record(success)
+
+    assert breaker.state == CLOSED
+
+def test_half_open_breaker_allows_exactly_one_trial(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(llm_hedging.time, "monotonic", lambda: now)
+    breaker = CircuitBreaker("primary", error_rate=0.5, min_calls=2, open_seconds=30)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == OPEN
+
+    now = 131.0
+    assert breaker.claim()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.claim()
+    assert not breaker.available()
+
+    breaker.record(True)
+
+    assert breaker.state == CLOSED
+    assert breaker.claim()
+
+def test_failed_trial_reopens_breaker(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(llm_hedging.time, "monotonic", lambda: now)
+    breaker = CircuitBreaker("primary", error_rate=0.5, min_calls=2, open_seconds=30)
+    breaker.record(False)
+    breaker.record(False)
+    now = 131.0
+    assert breaker.claim()
+
+    breaker.record(False)
+
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+async def test_concurrent_runs_send_one_trial_to_half_open_endpoint():
+    hedger = EndpointHedger(["secondary"], default_delay=5.0, breaker_min_calls=2,
+                            breaker_open_seconds=0.0)
+    hedger.breaker("primary").record(False)
+    hedger.breaker("primary").record(False)
+    calls = []
+
+    async def call(endpoint, timeout):
+        calls.append(endpoint)
+        await asyncio.sleep(0.02)
+        return {"answer": endpoint}
+
+    results = await asyncio.gather(*[hedger.run("primary", call, by_model, timeout=5) for _ in range(3)])
+
+    assert calls.count("primary") == 1
+    assert calls.count("secondary") == 2
+    assert sorted(result["answer"] for result in results) == ["primary", "secondary", "secondary"]
+    assert hedger.breaker("primary").state == CLOSED
+
+async def test_open_circuit_reroutes_to_secondary():
+    hedger = EndpointHedger(["secondary"], breaker_min_calls=2)
+    hedger.breaker("primary").record(False)
+    hedger.breaker("primary").record(False)
+    endpoints = FakeEndpoints({"primary": (0.0, {"answer": "primary"}),
+                               "secondary": (0.0, {"answer": "secondary"})})
+
+    result = await hedger.run("primary", endpoints, by_model, timeout=5)
+
+    assert result == {"answer": "secondary"}
+    assert "primary" not in endpoints.started
+    assert hedger.get_stats()["rerouted"] == 1
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+import core.llm as llm
+import core.llm_limiter as llm_limiter
+from core.llm_limiter import AdaptiveLimiter, is_throttling_error, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+
+class RateLimitError(Exception):
+    pass
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+class APITimeoutError(Exception):
+    pass
+
+def test_success_grows_limit_by_about_one_per_round():
+    limiter = AdaptiveLimiter("test", initial_limit=4, max_limit=8)
+
+    for _ in range(4):
+        limiter.in_flight += 1
+        limiter.release("success")
+
+    assert 4.9 < limiter.limit < 5.0
+
+def test_success_never_exceeds_max_limit():
+    limiter = AdaptiveLimiter("test", initial_limit=8, max_limit=8)
+    limiter.in_flight += 1
+    limiter.release("success")
+
+    assert limiter.limit == 8
+
+def test_throttling_cuts_limit_once_per_cooldown(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr(llm_limiter.time, "monotonic", lambda: now)
+    limiter = AdaptiveLimiter("test", initial_limit=32, min_limit=4, decrease_factor=0.5, cooldown=1.0)
+
+    for _ in range(3):
+        limiter.in_flight += 1
+        limiter.release("throttled")
+    assert limiter.limit == 16
+
+    now = 101.5
+    limiter.in_flight += 1
+    limiter.release("throttled")
+    assert limiter.limit == 8
+
+    for step in range(5):
+        now = 110.0 + 2 * step
+        limiter.in_flight += 1
+        limiter.release("throttled")
+    assert limiter.limit == 4
+
+def test_errors_and_cancellations_leave_limit_alone():
+    limiter = AdaptiveLimiter("test", initial_limit=8)
+    for outcome in ("error", "cancelled"):
+        limiter.in_flight += 1
+        limiter.release(outcome)
+
+    assert limiter.limit == 8
+    assert limiter.in_flight == 0
+
+async def test_high_priority_waiters_are_served_first():
+    limiter = AdaptiveLimiter("test", initial_limit=1, min_limit=1)
+    await limiter.acquire()
+    served = []
+
+    async def wait(priority, name):
+        await limiter.acquire(priority)
+        served.append(name)
+
+    waiters = [asyncio.ensure_future(wait(PRIORITY_LOW, "low")),
+               asyncio.ensure_future(wait(PRIORITY_NORMAL, "normal")),
+               asyncio.ensure_future(wait(PRIORITY_HIGH, "high"))]
+    await asyncio.sleep(0)
+    assert limiter.get_stats()["queue_depth"] == 3
+
+    for _ in range(3):
+        limiter.release("success")
+        await asyncio.sleep(0)
+    await asyncio.gather(*waiters)
+
+    assert served == ["high", "normal", "low"]
+
+async def test_cancelled_waiter_leaves_queue():
+    limiter = AdaptiveLimiter("test", initial_limit=1, min_limit=1)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire(PRIORITY_NORMAL))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limiter.release("success")
+
+    assert limiter.in_flight == 0
+    assert limiter.get_stats()["queue_depth"] == 0
+
+class SlowProvider:
+    def __init__(self, delay):
+        self.delay = delay
+        self.timeouts = []
+
+    async def get_completion(self, prompt, schema, model=None, timeout=8, max_tokens=512, **kwargs):
+        self.timeouts.append(timeout)
+        await asyncio.sleep(self.delay)
+        return {"score": 80}
+
+async def test_cancelled_call_releases_its_slot(monkeypatch):
+    limiter = AdaptiveLimiter("test", initial_limit=4)
+    monkeypatch.setattr(llm, "_get_limiter", lambda provider_name, model_id: limiter)
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: SlowProvider(delay=5))
+
+    call = asyncio.ensure_future(llm._complete_on("mock", "mock", "mock-low", "prompt", {}, 8, 512, PRIORITY_NORMAL))
+    await asyncio.sleep(0.01)
+    assert limiter.in_flight == 1
+
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert limiter.in_flight == 0
+    assert limiter.limit == 4
+
+async def test_time_in_queue_comes_out_of_the_call_timeout(monkeypatch):
+    limiter = AdaptiveLimiter("test", initial_limit=1, min_limit=1)
+    provider = SlowProvider(delay=0)
+    monkeypatch.setattr(llm, "_get_limiter", lambda provider_name, model_id: limiter)
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: provider)
+
+    await limiter.acquire()
+    call = asyncio.ensure_future(llm._complete_on("mock", "mock", "mock-low", "prompt", {}, 1, 512, PRIORITY_NORMAL))
+    await asyncio.sleep(0.3)
+    limiter.release("success")
+
+    assert await call == {"score": 80}
+    assert provider.timeouts[0] <= 0.75
+
+@pytest.mark.parametrize("error, throttled", [
+    (asyncio.TimeoutError(), True),
+    (HTTPError(429), True),
+    (RateLimitError("slow down"), True),
+    (HTTPError(500), False),
+    (APITimeoutError("Request timed out"), False),
+    (ValueError("timeout parsing response"), False),
+    (ValueError("response had 4290 tokens"), False),
+])
+def test_is_throttling_error(error, throttled):
+    assert is_throttling_error(error) is throttled
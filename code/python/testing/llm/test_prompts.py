@@ -0,0 +1,141 @@
+import os
+from xml.etree import ElementTree as ET
+
+import pytest
+
+import core.prompts as prompts
+from core.config import CONFIG
+from core.prompts import compile_template, fill_prompt, fill_prompt_parts, register_prompt_layout, PROMPT_STRING_TAG
+
+
+class FakeState:
+    def __init__(self, decontextualized=False):
+        self.decontextualized = decontextualized
+
+    def is_decontextualization_done(self):
+        return self.decontextualized
+
+class FakeTool:
+    description = "Search for recipes"
+
+class FakeHandler:
+    """Handler with every attribute the prompt variables read."""
+
+    def __init__(self, decontextualized=False):
+        self.site = ["seriouseats"]
+        self.item_type = "{http://schema.org/}Recipe"
+        self.query = "spicy pasta"
+        self.prev_queries = ["pasta", "vegan pasta"]
+        self.decontextualized_query = "spicy vegan pasta"
+        self.state = FakeState(decontextualized)
+        self.context_url = "https://example.com/context"
+        self.context_description = "A page about Italian food"
+        self.last_answers = [{"title": "Arrabbiata", "url": "https://example.com/a"}]
+        self.final_ranked_answers = [{"name": "Penne"}]
+        self.tool = FakeTool()
+        self.tools = FakeTool()
+        self.top_k = 5
+        self.item_name = "Penne arrabbiata"
+        self.details_requested = "ingredients"
+
+PR_DICT = {
+    "item.description": '{"@type": "Recipe", "name": "Penne"}',
+    "item.name": "Penne",
+    "item.type": "Recipe",
+    "items.description": "url: https://example.com/a\nPenne",
+    "ensemble.queries": "pasta; wine",
+    "ensemble.results": "[Penne, Chianti]",
+    "request.answer": "Use penne",
+    "request.item1_description": "Penne",
+    "request.item2_description": "Rigatoni",
+}
+
+def legacy_fill_prompt(prompt_str, handler, pr_dict):
+    """The fill_prompt this module replaced: one str.replace per variable."""
+    for variable in prompts.extract_variables_from_prompt(prompt_str):
+        if variable in pr_dict:
+            value = pr_dict[variable]
+        else:
+            value = prompts.get_prompt_variable_value(variable, handler)
+        if not isinstance(value, str):
+            value = str(value)
+        prompt_str = prompt_str.replace("{" + variable + "}", value)
+    return prompt_str
+
+def prompt_file_templates():
+    root = ET.parse(os.path.join(CONFIG.config_directory, "prompts.xml")).getroot()
+    return [element.text for element in root.iter(PROMPT_STRING_TAG) if element.text]
+
+@pytest.mark.parametrize("decontextualized", [False, True])
+def test_fill_matches_legacy_fill_for_every_prompt(decontextualized):
+    templates = prompt_file_templates()
+    assert len(templates) > 30
+    # Loading the registry registers the prompts' suffixVariables layouts
+    prompts.find_compiled_prompt(["seriouseats"], "{http://schema.org/}Recipe", "RankingPrompt")
+    split = 0
+
+    for template in templates:
+        handler = FakeHandler(decontextualized)
+        expected = legacy_fill_prompt(template, handler, PR_DICT)
+
+        assert fill_prompt(template, handler, PR_DICT) == expected
+        prefix, suffix = fill_prompt_parts(template, handler, PR_DICT)
+        assert prefix + suffix == expected
+        split += bool(suffix)
+    assert split >= 5
+
+def test_fill_matches_legacy_fill_for_unusual_braces():
+    template = 'Return {"score": {x}} for { request.query } and {request.query}, {site.itemType}s {unclosed'
+    handler = FakeHandler()
+
+    filled = fill_prompt(template, handler, {})
+
+    assert filled == legacy_fill_prompt(template, handler, {})
+    assert filled == 'Return } for { request.query } and spicy pasta previous queries: ' \
+                     "['pasta', 'vegan pasta'], Recipes {unclosed"
+
+def test_fill_parts_splits_before_first_suffix_variable():
+    template = "Rate this {site.itemType} for {request.query}. The item: {item.description}. Again: {request.query}"
+    register_prompt_layout(template, ["item.description"])
+    handler = FakeHandler()
+
+    prefix, suffix = fill_prompt_parts(template, handler, {"item.description": "Penne"})
+
+    assert prefix == ("Rate this Recipe for spicy pasta previous queries: ['pasta', 'vegan pasta']. "
+                      "The item: ")
+    assert suffix == "Penne. Again: spicy pasta previous queries: ['pasta', 'vegan pasta']"
+
+def test_fill_parts_without_layout_or_suffix_variable():
+    template = "Answer {request.rawQuery}"
+    handler = FakeHandler()
+
+    assert fill_prompt_parts(template, handler) == ("Answer spicy pasta", "")
+    assert compile_template(template).fill_parts(handler, {}, ("item.description",)) == ("Answer spicy pasta", "")
+
+def test_stable_variables_are_memoized_per_handler():
+    template = "{request.site}|{request.contextUrl}|{request.rawQuery}"
+    handler = FakeHandler()
+    handler.site = ["seriouseats", "imdb"]
+    first = fill_prompt(template, handler)
+
+    handler.site = ["other"]
+    handler.context_url = "https://example.com/changed"
+    handler.query = "rewritten query"
+
+    assert first == "['seriouseats', 'imdb']|https://example.com/context|spicy pasta"
+    assert fill_prompt(template, handler) == "['seriouseats', 'imdb']|https://example.com/context|rewritten query"
+    assert fill_prompt(template, FakeHandler()) == "['seriouseats']|https://example.com/context|spicy pasta"
+
+def test_changing_variables_are_read_on_every_fill():
+    template = "{request.query}|{request.prevAnswers}"
+    handler = FakeHandler()
+    fill_prompt(template, handler)
+
+    handler.state.decontextualized = True
+    handler.last_answers = []
+
+    assert fill_prompt(template, handler) == "spicy vegan pasta|"
+
+def test_pr_dict_overrides_handler_values():
+    assert fill_prompt("{request.query} {item.description}", FakeHandler(),
+                       {"request.query": "override", "item.description": 42}) == "override 42"
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+import core.llm as llm
+from core.utils.singleflight import SingleFlight
+
+
+SCHEMA = {"score": "integer"}
+
+class SlowProvider:
+    """LLM provider that takes a while to answer and counts calls."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def get_completion(self, prompt, schema, model=None, timeout=8, max_tokens=512, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"score": 80, "details": {"tags": ["pasta"]}}
+
+async def test_concurrent_identical_ask_llm_calls_share_one_provider_call(monkeypatch):
+    provider = SlowProvider()
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: provider)
+    monkeypatch.setattr(llm, "_get_response_cache", lambda: None)
+    monkeypatch.setattr(llm, "_get_hedger", lambda: None)
+
+    results = await asyncio.gather(*[llm.ask_llm("Rate pasta", SCHEMA, provider="mock") for _ in range(5)])
+
+    assert provider.calls == 1
+    assert all(result == results[0] for result in results)
+    # Each caller gets its own copy to modify
+    results[0]["details"]["tags"].append("changed")
+    assert results[1]["details"]["tags"] == ["pasta"]
+
+async def test_different_prompts_are_not_coalesced(monkeypatch):
+    provider = SlowProvider()
+    monkeypatch.setattr(llm, "_get_provider", lambda llm_type: provider)
+    monkeypatch.setattr(llm, "_get_response_cache", lambda: None)
+    monkeypatch.setattr(llm, "_get_hedger", lambda: None)
+
+    await asyncio.gather(llm.ask_llm("Rate pasta", SCHEMA, provider="mock"),
+                         llm.ask_llm("Rate risotto", SCHEMA, provider="mock"))
+
+    assert provider.calls == 2
+
+async def test_waiters_share_result_and_exception():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    results = await asyncio.gather(*[flight.do("key", fail) for _ in range(3)], return_exceptions=True)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.coalesced == 2
+    assert flight.in_flight() == 0
+
+async def test_cancelling_one_waiter_leaves_others_running():
+    flight = SingleFlight()
+    started = asyncio.Event()
+
+    async def call():
+        started.set()
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    first = asyncio.ensure_future(flight.do("key", call))
+    second = asyncio.ensure_future(flight.do("key", call))
+    await started.wait()
+    first.cancel()
+
+    assert await second == "answer"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+async def test_shared_call_cancelled_when_every_waiter_is_gone():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def call():
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(2)]
+    await started.wait()
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    waiters[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    await asyncio.sleep(0)
+    assert flight.in_flight() == 0
+
+async def test_new_call_after_previous_finished():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return len(calls)
+
+    assert await flight.do("key", call) == 1
+    assert await flight.do("key", call) == 2
@@ -0,0 +1,98 @@
+import time
+
+from core.retriever import RetrievalCache
+
+
+RESULTS = [["https://example.com/a", '{"name": "a"}', "a", "example"]]
+
+def cache_results(cache, query, site, endpoints=("qdrant",)):
+    key = RetrievalCache.make_key(query, site, 10, list(endpoints))
+    cache.put(key, site, list(endpoints), RESULTS, cache.snapshot(site))
+    return key
+
+def test_cache_hit_returns_a_copy():
+    cache = RetrievalCache()
+    key = cache_results(cache, "pasta", "seriouseats")
+
+    first = cache.get(key)
+    first[0][2] = "changed"
+
+    assert cache.get(key) == RESULTS
+    assert cache.get_stats()["hits"] == 2
+
+def test_cache_key_normalizes_whitespace_and_sites():
+    assert (RetrievalCache.make_key(" pasta  recipes", ["b", "a"], 10, ["y", "x"])
+            == RetrievalCache.make_key("pasta recipes", ["a", "b", "a"], 10, ["x", "y"]))
+
+def test_cache_entries_expire():
+    cache = RetrievalCache(ttl=60)
+    key = cache_results(cache, "pasta", "seriouseats")
+    cache._entries[key] = (time.time() - 1,) + cache._entries[key][1:]
+
+    assert cache.get(key) is None
+    assert cache.get_stats()["expired"] == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = RetrievalCache(max_entries=2)
+    first = cache_results(cache, "first", "seriouseats")
+    second = cache_results(cache, "second", "seriouseats")
+    cache.get(first)
+    third = cache_results(cache, "third", "seriouseats")
+
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
+    assert cache.get(third) is not None
+
+def test_write_invalidates_only_written_sites_and_all_sites():
+    cache = RetrievalCache()
+    written = cache_results(cache, "pasta", "seriouseats")
+    other_site = cache_results(cache, "pasta", "imdb")
+    all_sites = cache_results(cache, "pasta", "all")
+    other_endpoint = cache_results(cache, "risotto", "seriouseats", endpoints=("postgres",))
+
+    cache.invalidate("qdrant", ["seriouseats"])
+
+    assert cache.get(written) is None
+    assert cache.get(all_sites) is None
+    assert cache.get(other_site) is not None
+    assert cache.get(other_endpoint) is not None
+
+def test_write_of_unknown_sites_invalidates_every_result_of_endpoint():
+    cache = RetrievalCache()
+    keys = [cache_results(cache, "pasta", site) for site in ("seriouseats", "imdb", "all")]
+
+    cache.invalidate("qdrant")
+
+    assert all(cache.get(key) is None for key in keys)
+
+def test_search_running_during_write_is_not_stored():
+    cache = RetrievalCache()
+    key = RetrievalCache.make_key("pasta", "seriouseats", 10, ["qdrant"])
+    token = cache.snapshot("seriouseats")
+
+    # A write lands between the search starting and its results coming back
+    cache.invalidate("qdrant", ["seriouseats"])
+    cache.put(key, "seriouseats", ["qdrant"], RESULTS, token)
+
+    assert cache.get(key) is None
+    assert cache.get_stats()["stale"] == 1
+
+def test_write_to_other_site_does_not_block_put():
+    cache = RetrievalCache()
+    key = RetrievalCache.make_key("pasta", "seriouseats", 10, ["qdrant"])
+    token = cache.snapshot("seriouseats")
+
+    cache.invalidate("qdrant", ["imdb"])
+    cache.put(key, "seriouseats", ["qdrant"], RESULTS, token)
+
+    assert cache.get(key) == RESULTS
+
+def test_any_write_blocks_put_of_search_over_all_sites():
+    cache = RetrievalCache()
+    key = RetrievalCache.make_key("pasta", "all", 10, ["qdrant"])
+    token = cache.snapshot("all")
+
+    cache.invalidate("qdrant", ["imdb"])
+    cache.put(key, "all", ["qdrant"], RESULTS, token)
+
+    assert cache.get(key) is None
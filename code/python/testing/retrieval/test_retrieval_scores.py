@@ -0,0 +1,64 @@
+from core.retrieval_scores import find_knee, prune_results, reciprocal_rank_fusion
+
+
+def scored(scores):
+    return [[f"https://example.com/{i}", "{}", str(i), "example", score] for i, score in enumerate(scores)]
+
+def test_find_knee_at_large_gap():
+    scores = [0.90, 0.89, 0.88, 0.87, 0.60, 0.59, 0.58]
+
+    assert find_knee(scores, min_results=1, threshold=0.02) == 4
+
+def test_find_knee_none_for_even_decline():
+    scores = [0.90, 0.85, 0.80, 0.75, 0.70, 0.65]
+
+    assert find_knee(scores, min_results=1, threshold=0.02) is None
+
+def test_find_knee_respects_min_results():
+    scores = [0.90, 0.50, 0.49, 0.48, 0.47, 0.46]
+
+    assert find_knee(scores, min_results=1, threshold=0.02) == 1
+    # The knee may not leave fewer than min_results items
+    assert find_knee(scores, min_results=3, threshold=0.02) == 3
+    assert find_knee(scores, min_results=6, threshold=0.02) is None
+
+def test_find_knee_needs_three_scores():
+    assert find_knee([0.9, 0.1], min_results=0, threshold=0.02) is None
+
+def test_prune_results_cuts_below_knee_and_keeps_order():
+    items = scored([0.60, 0.90, 0.59, 0.88, 0.89, 0.87, 0.58])
+
+    kept = prune_results(items, min_results=1, threshold=0.02)
+
+    assert [item[4] for item in kept] == [0.90, 0.88, 0.89, 0.87]
+
+def test_prune_results_keeps_unscored_items():
+    items = scored([0.90, 0.89, 0.88, 0.87, 0.60, 0.59, 0.58])
+    unscored = ["https://example.com/unscored", "{}", "unscored", "example"]
+
+    kept = prune_results(items + [unscored], min_results=1, threshold=0.02)
+
+    assert len(kept) == 5
+    assert kept[-1] is unscored
+
+def test_prune_results_unchanged_without_knee():
+    items = scored([0.90, 0.85, 0.80, 0.75, 0.70, 0.65])
+
+    assert prune_results(items, min_results=1, threshold=0.02) is items
+
+def test_prune_results_keeps_min_results_on_ties():
+    items = scored([0.90, 0.50, 0.50, 0.50, 0.50, 0.40])
+
+    kept = prune_results(items, min_results=3, threshold=0.02)
+
+    # Only one item is above the cutoff, so the first min_results are kept instead
+    assert kept == items[:3]
+
+def test_reciprocal_rank_fusion_rewards_items_found_by_several_endpoints():
+    a = scored([0.9, 0.8])
+    b = [a[1], ["https://example.com/b", "{}", "b", "example"]]
+
+    fused = reciprocal_rank_fusion({"first": a, "second": b}, k=60)
+
+    assert fused[a[1][0]] == 1 / 62 + 1 / 61
+    assert fused[a[1][0]] > fused[a[0][0]] > fused["https://example.com/b"]
@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from core.retriever import RetrievalStream
+from core.retrieved_item import RetrievedItem
+
+
+def make_results(prefix, count):
+    return [[f"https://example.com/{prefix}{i}", f'{{"name": "{prefix}{i}"}}', f"{prefix}{i}", "example"]
+            for i in range(count)]
+
+async def answer_after(delay, results):
+    await asyncio.sleep(delay)
+    return results
+
+async def fail_after(delay):
+    await asyncio.sleep(delay)
+    raise RuntimeError("endpoint down")
+
+def urls(items):
+    return [item[0].rsplit("/", 1)[1] for item in items]
+
+def make_stream(endpoints, num_results, **kwargs):
+    tasks = {asyncio.ensure_future(coro): name for name, coro in endpoints.items()}
+    return RetrievalStream(tasks, num_results, **kwargs), tasks
+
+async def test_stream_yields_each_endpoint_share_then_fills_remaining():
+    stream, _ = make_stream({
+        "fast": answer_after(0, make_results("a", 5)),
+        "slow": answer_after(0.05, make_results("b", 1)),
+    }, num_results=6)
+
+    batches = [urls(batch) async for batch in stream]
+
+    # Each endpoint gets ceil(6 / 2) = 3 slots as it answers; the slots the slow
+    # endpoint couldn't fill go to the fast endpoint's held-back items at the end
+    assert batches == [["a0", "a1", "a2"], ["b0"], ["a3", "a4"]]
+    assert urls(stream.items) == ["a0", "a1", "a2", "b0", "a3", "a4"]
+    assert all(isinstance(item, RetrievedItem) for item in stream.items)
+
+async def test_stream_deduplicates_urls_across_endpoints():
+    shared = make_results("s", 2)
+    stream, _ = make_stream({
+        "first": answer_after(0, shared + make_results("a", 1)),
+        "second": answer_after(0.05, shared + make_results("b", 1)),
+    }, num_results=10)
+
+    items = await stream.collect()
+
+    assert urls(items) == ["s0", "s1", "a0", "b0"]
+
+async def test_stream_stops_at_num_results():
+    stream, _ = make_stream({
+        "first": answer_after(0, make_results("a", 10)),
+        "second": answer_after(0.05, make_results("b", 10)),
+    }, num_results=3)
+
+    items = await stream.collect()
+
+    assert urls(items) == ["a0", "a1", "b0"]
+
+async def test_stream_reports_complete_results_once_every_endpoint_answered():
+    completed = []
+    stream, _ = make_stream({
+        "first": answer_after(0, make_results("a", 2)),
+        "second": answer_after(0.01, make_results("b", 2)),
+    }, num_results=4, on_complete=lambda items, by_endpoint: completed.append((urls(items), sorted(by_endpoint))))
+
+    await stream.collect()
+
+    assert completed == [(["a0", "a1", "b0", "b1"], ["first", "second"])]
+
+async def test_stream_drops_late_endpoints_at_deadline():
+    completed = []
+    stream, tasks = make_stream({
+        "fast": answer_after(0, make_results("a", 2)),
+        "slow": answer_after(5, make_results("b", 2)),
+    }, num_results=4, deadline=0.05, late_results="drop",
+        on_complete=lambda items, by_endpoint: completed.append(items))
+
+    items = await stream.collect()
+    await asyncio.sleep(0)
+
+    assert urls(items) == ["a0", "a1"]
+    slow_task = next(task for task, name in tasks.items() if name == "slow")
+    assert slow_task.cancelled()
+    # A search cut short by the deadline is never cached
+    assert completed == []
+
+async def test_stream_appends_late_results_after_deadline():
+    stream, tasks = make_stream({
+        "fast": answer_after(0, make_results("a", 2)),
+        "slow": answer_after(0.1, make_results("b", 2)),
+    }, num_results=4, deadline=0.05, late_results="append")
+
+    batches = [urls(batch) async for batch in stream]
+    assert batches == [["a0", "a1"]]
+
+    slow_task = next(task for task, name in tasks.items() if name == "slow")
+    await slow_task
+    await asyncio.sleep(0)
+
+    # Late items are added for the stages after ranking, but never yielded
+    assert urls(stream.items) == ["a0", "a1", "b0", "b1"]
+
+async def test_stream_from_cached_results():
+    cached = make_results("c", 3)
+    stream = RetrievalStream.from_results(cached)
+    finished = []
+    stream.on_finished = finished.append
+
+    batches = [urls(batch) async for batch in stream]
+
+    assert batches == [["c0", "c1", "c2"]]
+    assert finished == [stream.items]
+
+async def test_stream_skips_failed_endpoint():
+    stream, _ = make_stream({
+        "up": answer_after(0.01, make_results("a", 2)),
+        "down": fail_after(0),
+    }, num_results=4)
+
+    items = await stream.collect()
+
+    assert urls(items) == ["a0", "a1"]
+
+async def test_stream_raises_when_all_endpoints_fail():
+    completed = []
+    stream, _ = make_stream({
+        "first": fail_after(0),
+        "second": fail_after(0.01),
+    }, num_results=4, on_complete=lambda items, by_endpoint: completed.append(items))
+
+    with pytest.raises(ValueError, match="All endpoint searches failed"):
+        await stream.collect()
+    assert completed == []
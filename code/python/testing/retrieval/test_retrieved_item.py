@@ -0,0 +1,66 @@
+import copy
+import json
+import pickle
+
+from core.retrieved_item import RetrievedItem
+from core.utils.json_utils import trim_json
+
+
+SCHEMA = {"@type": "Recipe", "name": "Pasta", "recipeIngredient": ["flour", "eggs"]}
+RESULT = ["https://example.com/pasta", json.dumps(SCHEMA), "Pasta", "seriouseats"]
+
+def test_item_is_a_list_of_url_json_name_site():
+    item = RetrievedItem.from_result(RESULT)
+
+    assert item == RESULT
+    assert RESULT == item
+    assert isinstance(item, list)
+    url, json_str, name, site = item
+    assert (url, json_str, name, site) == tuple(RESULT)
+    assert (item.url, item.name, item.site) == (RESULT[0], RESULT[2], RESULT[3])
+    assert item.score is None
+
+def test_score_comes_from_fifth_element():
+    item = RetrievedItem.from_result(RESULT + [0.75])
+
+    assert item.score == 0.75
+    assert item == RESULT
+
+def test_schema_object_is_parsed_once(monkeypatch):
+    item = RetrievedItem.from_result(RESULT)
+    calls = []
+    real_loads = json.loads
+    monkeypatch.setattr(json, "loads", lambda text: calls.append(text) or real_loads(text))
+
+    assert item.schema_object == SCHEMA
+    assert item.schema_object is item.schema_object
+    assert len(calls) == 1
+
+def test_schema_object_keeps_invalid_json_and_parsed_objects():
+    assert RetrievedItem("u", "not json", "n", "s").schema_object == "not json"
+    item = RetrievedItem("u", SCHEMA, "n", "s")
+    assert item.schema_object is SCHEMA
+    assert json.loads(item.json_str) == SCHEMA
+
+def test_description_is_trimmed_schema_computed_once():
+    item = RetrievedItem.from_result(RESULT)
+
+    assert item.description == trim_json(SCHEMA)
+    assert item.description is item.description
+
+def test_wrap_is_idempotent():
+    item = RetrievedItem.wrap(RESULT)
+
+    assert isinstance(item, RetrievedItem)
+    assert RetrievedItem.wrap(item) is item
+
+def test_pickle_and_copy_keep_score_and_drop_parsed_state():
+    item = RetrievedItem.from_result(RESULT + [0.5])
+    item.schema_object
+
+    for restored in (pickle.loads(pickle.dumps(item)), copy.deepcopy(item)):
+        assert isinstance(restored, RetrievedItem)
+        assert restored == item
+        assert restored.score == 0.5
+        assert restored.schema_object == SCHEMA
+        assert restored.schema_object is not item.schema_object
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+import core.retriever as retriever
+from core.config import CONFIG, RetrievalScoringConfig
+from core.retriever import RetrievalCache, VectorDBClient
+
+
+def result(query, rank, score=None):
+    item = [f"https://example.com/{query}/{rank}", f'{{"name": "{query} {rank}"}}', f"{query} {rank}", "example"]
+    if score is not None:
+        item.append(score)
+    return item
+
+class KeywordBackend:
+    """Backend without vector search; records the queries and kwargs it was sent."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.queries = []
+
+    async def search(self, query, site, num_results, **kwargs):
+        assert "handler" not in kwargs
+        self.queries.append(query)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("endpoint down")
+        return [result(query, rank) for rank in range(2)]
+
+class VectorBackend(KeywordBackend):
+    """Backend with vector search, whose vectors are [len(query)]."""
+
+    def __init__(self, scores=(0.9, 0.8)):
+        super().__init__()
+        self.scores = scores
+        self.vectors = []
+
+    async def search_by_vector(self, vector, site, num_results, with_scores=False, **kwargs):
+        self.vectors.append(vector)
+        query = f"v{vector[0]}"
+        return [result(query, rank, score) for rank, score in enumerate(self.scores)]
+
+def make_client(monkeypatch, backends, cache=None, embeddings_fail=False):
+    client = VectorDBClient.__new__(VectorDBClient)
+    client.query_params = {}
+    client.enabled_endpoints = dict.fromkeys(backends)
+    embedded = []
+
+    async def endpoints_for_site(site):
+        return list(backends)
+
+    async def get_client(endpoint_name):
+        return backends[endpoint_name]
+
+    async def get_embeddings(queries, query_params=None):
+        embedded.append(list(queries))
+        if embeddings_fail:
+            raise RuntimeError("embedding provider down")
+        return [[len(query)] for query in queries]
+
+    monkeypatch.setattr(client, "_endpoints_for_site", endpoints_for_site)
+    monkeypatch.setattr(client, "get_client", get_client)
+    monkeypatch.setattr(retriever, "get_embeddings", get_embeddings)
+    monkeypatch.setattr(retriever, "_get_retrieval_cache", lambda: cache)
+    return client, embedded
+
+def names(items):
+    return [item.name for item in items]
+
+async def test_results_come_back_in_query_order_with_duplicates(monkeypatch):
+    keyword = KeywordBackend()
+    client, _ = make_client(monkeypatch, {"keyword": keyword})
+
+    results = await client.search_many(["pasta", "risotto", "pasta"], "example", 10, handler=object())
+
+    assert [names(items) for items in results] == [["pasta 0", "pasta 1"], ["risotto 0", "risotto 1"],
+                                                   ["pasta 0", "pasta 1"]]
+    assert sorted(keyword.queries) == ["pasta", "risotto"]
+    # Each query gets its own items
+    assert results[0][0] is not results[2][0]
+
+async def test_cached_queries_are_not_searched_again(monkeypatch):
+    cache = RetrievalCache()
+    vector = VectorBackend()
+    client, embedded = make_client(monkeypatch, {"vector": vector}, cache=cache)
+    await client.search_many(["pasta"], "example", 10)
+
+    results = await client.search_many(["risotto", "pasta"], "example", 10)
+
+    assert embedded == [["pasta"], ["risotto"]]
+    assert vector.vectors == [[5], [7]]
+    assert [names(items) for items in results] == [["v7 0", "v7 1"], ["v5 0", "v5 1"]]
+    assert cache.get_stats()["hits"] == 1
+
+async def test_vector_and_keyword_endpoints_are_merged(monkeypatch):
+    client, embedded = make_client(monkeypatch, {"vector": VectorBackend(), "keyword": KeywordBackend()})
+
+    results = await client.search_many(["pasta", "soup"], "example", 10)
+
+    assert embedded == [["pasta", "soup"]]
+    assert names(results[0]) == ["v5 0", "pasta 0", "v5 1", "pasta 1"]
+    assert names(results[1]) == ["v4 0", "soup 0", "v4 1", "soup 1"]
+
+async def test_failed_endpoint_is_skipped_and_results_are_not_cached(monkeypatch):
+    cache = RetrievalCache()
+    client, _ = make_client(monkeypatch, {"keyword": KeywordBackend(), "down": KeywordBackend(fail=True)},
+                            cache=cache)
+
+    results = await client.search_many(["pasta"], "example", 10)
+
+    assert names(results[0]) == ["pasta 0", "pasta 1"]
+    assert cache.get_stats()["entries"] == 0
+
+async def test_all_endpoints_failing_raises(monkeypatch):
+    client, _ = make_client(monkeypatch, {"down": KeywordBackend(fail=True)})
+
+    with pytest.raises(ValueError):
+        await client.search_many(["pasta"], "example", 10)
+
+async def test_failed_embedding_falls_back_to_per_query_search(monkeypatch):
+    vector = VectorBackend()
+    client, _ = make_client(monkeypatch, {"vector": vector}, embeddings_fail=True)
+
+    results = await client.search_many(["pasta", "soup"], "example", 10)
+
+    assert vector.vectors == []
+    assert sorted(vector.queries) == ["pasta", "soup"]
+    assert [names(items) for items in results] == [["pasta 0", "pasta 1"], ["soup 0", "soup 1"]]
+
+async def test_prune_drops_low_similarity_tail(monkeypatch):
+    monkeypatch.setattr(CONFIG, "retrieval_scoring", RetrievalScoringConfig(prune=True, min_results=2))
+    scores = (0.91, 0.9, 0.89, 0.88, 0.5, 0.49)
+    client, _ = make_client(monkeypatch, {"vector": VectorBackend(scores)})
+
+    pruned, = await client.search_many(["pasta"], "example", 10, prune=True)
+    unpruned, = await client.search_many(["pasta"], "example", 10)
+
+    assert names(pruned) == ["v5 0", "v5 1", "v5 2", "v5 3"]
+    assert len(unpruned) == 6
@@ -142,6 +142,13 @@ class AioHTTPServer:
         """Cleanup resources"""
         if app['client_session']:
             await app['client_session'].close()
+        
+        # Close pooled embedding provider connections
+        from core.embedding import close_embedding_clients
+        try:
+            await close_embedding_clients()
+        except Exception as e:
+            logger.warning(f"Error closing embedding clients: {e}")
     
     async def _on_shutdown(self, app: web.Application):
         """Graceful shutdown"""
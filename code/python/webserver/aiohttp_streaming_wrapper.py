@@ -52,6 +52,13 @@ class AioHttpStreamingWrapper:
         except Exception as e:
             logger.debug(f"Heartbeat error: {e}")
     
+    def is_connected(self) -> bool:
+        """Check whether the client is still there without writing to the stream"""
+        if not self.connection_alive:
+            return False
+        transport = self.request.transport
+        return transport is not None and not transport.is_closing()
+
     async def write_keepalive(self):
         """Send SSE keepalive comment"""
         if not self.connection_alive:
@@ -15,6 +15,9 @@ def setup_health_routes(app: web.Application):
     """Setup health check routes"""
     app.router.add_get('/health', health_check)
     app.router.add_get('/ready', readiness_check)
+    app.router.add_get('/health/llm', llm_stats)
+    app.router.add_get('/health/embedding', embedding_stats)
+    app.router.add_get('/health/retrieval', retrieval_stats)
 
 
 async def health_check(request: web.Request) -> web.Response:
@@ -63,4 +66,36 @@ async def readiness_check(request: web.Request) -> web.Response:
         'status': 'ready' if all_ready else 'not_ready',
         'checks': checks,
         'timestamp': datetime.utcnow().isoformat()
-    }, status=status_code)
\ No newline at end of file
+    }, status=status_code)
+
+
+async def llm_stats(request: web.Request) -> web.Response:
+    """LLM layer statistics: response cache hits and misses per prompt, concurrency limits and queues, hedging"""
+    from core.llm import get_cache_stats, get_concurrency_stats, get_hedging_stats
+    
+    return web.json_response({
+        'cache': get_cache_stats(),
+        'concurrency': get_concurrency_stats(),
+        'hedging': get_hedging_stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+
+async def embedding_stats(request: web.Request) -> web.Response:
+    """Embedding layer statistics: query embedding cache hits, misses and evictions, coalesced calls"""
+    from core.embedding import get_embedding_cache_stats
+    
+    return web.json_response({
+        'cache': get_embedding_cache_stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+
+async def retrieval_stats(request: web.Request) -> web.Response:
+    """Retrieval layer statistics: shared clients, the site catalog of each endpoint, result cache hits and misses"""
+    from core.retriever import get_retrieval_stats
+    
+    return web.json_response({
+        **get_retrieval_stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    })